@@ -1,5 +1,8 @@
 """Initialise the application."""
-from psiutils.utilities import psi_logger
+# psiutils.utilities re-exports psi_logger but imports tkinter, which the
+# command line must run without. psiutils is pinned to 0.2.x, whose
+# package __init__ imports nothing else; later releases import tkinter.
+from psiutils._logger import psi_logger
 from directors_rota.constants import APP_NAME
 
 logger = psi_logger(APP_NAME)
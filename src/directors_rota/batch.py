@@ -0,0 +1,155 @@
+"""Generate the rotas of several workbooks at once, in a process pool.
+
+Each job is a workbook, the config profile to use with it, and a month.
+A profile is a config file; if none is given the usual config is used.
+A profile that is missing or not valid TOML fails the job, rather than
+quietly generating the rota from the default sheets and columns.
+The jobs run in separate worker processes, so parsing scales across
+cores, and a job that fails, or whose worker dies, is reported in the
+results without stopping the others.
+"""
+
+import datetime
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import NamedTuple
+
+from directors_rota import logger
+from directors_rota.config import CONFIG_PATH, read_profile
+from directors_rota.diagnostics import Diagnostics
+from directors_rota.process import DirectorRegistry, generate_rota
+
+
+class BatchJob(NamedTuple):
+    workbook: Path
+    profile: Path | None
+    month: datetime.date
+
+
+class JobResult(NamedTuple):
+    job: BatchJob
+    email: str | None
+    directors: DirectorRegistry | None
+    diagnostics: Diagnostics | None
+    error: str = ""
+
+
+@dataclass
+class BatchReport:
+    """The outcome of each job in a batch, in the order of the jobs."""
+    results: list[JobResult] = field(default_factory=list)
+
+    @property
+    def succeeded(self) -> list[JobResult]:
+        return [result for result in self.results if not result.error]
+
+    @property
+    def failed(self) -> list[JobResult]:
+        return [result for result in self.results if result.error]
+
+    def issue_counts(self) -> dict[str, int]:
+        """Return the number of diagnostics of each kind over all jobs."""
+        counts = Counter()
+        for result in self.results:
+            if result.diagnostics is not None:
+                counts.update(result.diagnostics.counts())
+        return dict(counts)
+
+
+def run_job(job: BatchJob) -> JobResult:
+    """Generate the job's rota; an error is returned in the result."""
+    try:
+        if job.profile:
+            config = read_profile(job.profile, required=True)
+        else:
+            config = read_profile(CONFIG_PATH)
+        workbook = Path(job.workbook).resolve()
+        config.update("workbook_dir", str(workbook.parent), force=True)
+        config.update("workbook_file_name", workbook.name, force=True)
+        month = datetime.datetime(job.month.year, job.month.month, 1)
+        response = generate_rota(month, config)
+    except Exception as err:
+        return _failed(job, err)
+    if not response:
+        return JobResult(job, None, None, None, "Workbook not read")
+    (email, directors, diagnostics) = response
+    if email is None:
+        return JobResult(
+            job, None, directors, diagnostics, "Rota not created")
+    return JobResult(job, email, directors, diagnostics)
+
+
+def run_batch(
+    jobs: list[BatchJob],
+    workers: int | None = None,
+    run: object = run_job,
+) -> BatchReport:
+    """Generate the rota for each job in a pool of worker processes.
+
+    workers defaults to the number of CPUs. Workers are spawned, not
+    forked, as the calling process may be running threads. run is
+    called for each job in a worker.
+
+    A worker that dies (e.g. killed for using too much memory) breaks
+    the pool, and every job still in it fails with BrokenProcessPool.
+    Those jobs are then run again one at a time, each in a pool of its
+    own, so only the job that kills its worker fails.
+    """
+    results = {}
+    broken = _run_pool(jobs, range(len(jobs)), workers, run, results)
+    for index in broken:
+        if _run_pool(jobs, [index], 1, run, results):
+            results[index] = JobResult(
+                jobs[index], None, None, None, "Worker process died")
+            logger.error(
+                f"Batch job failed for {jobs[index].workbook}. "
+                f"Worker process died")
+
+    report = BatchReport([results[index] for index in range(len(jobs))])
+    logger.info(
+        "Batch generated",
+        jobs=len(jobs),
+        failed=[str(result.job.workbook) for result in report.failed],
+        **report.issue_counts(),
+    )
+    return report
+
+
+def _run_pool(
+    jobs: list[BatchJob],
+    indexes: object,
+    workers: int | None,
+    run: object,
+    results: dict[int, JobResult],
+) -> list[int]:
+    """Run the jobs at indexes in a new pool, adding to results.
+
+    Return the indexes of the jobs lost when the pool broke.
+    """
+    broken = []
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=context
+    ) as executor:
+        futures = {
+            executor.submit(run, jobs[index]): index for index in indexes
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except BrokenProcessPool:
+                broken.append(index)
+            except Exception as err:
+                results[index] = _failed(jobs[index], err)
+    return sorted(broken)
+
+
+def _failed(job: BatchJob, err: Exception) -> JobResult:
+    error = f"{type(err).__name__}: {err}"
+    logger.error(f"Batch job failed for {job.workbook}. {error}")
+    return JobResult(job, None, None, None, error)
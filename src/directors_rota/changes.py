@@ -0,0 +1,321 @@
+"""Changes to the rota between versions of the workbook.
+
+Each row of the main sheet is hashed, and the hash is kept in the rota
+store with the (date, session, initials) assignments read from the row.
+On the next run only the rows whose hash differs are read again, and the
+assignments that differ are the changes. Only the directors who have
+gained or lost a duty are sent a "your duty changed" email, and the
+reminder for each changed duty moves to its new director.
+
+The first run for a workbook records its rows and finds no changes.
+"""
+
+import datetime
+import hashlib
+import smtplib
+import sqlite3
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from psiutils.constants import Status
+
+from directors_rota import logger
+from directors_rota.config import read_config
+from directors_rota.date_index import as_datetime
+from directors_rota.emails import (
+    SendReport,
+    SendResult,
+    SmtpSession,
+    build_message,
+)
+from directors_rota.process import (
+    DirectorRegistry,
+    get_rota_sources,
+    session_columns,
+)
+from directors_rota.progress import Progress
+from directors_rota.reminders import ReminderQueue, schedule_reminders
+from directors_rota.rota_store import RotaStore, record_sent
+
+
+class Change(NamedTuple):
+    date: datetime.datetime
+    session: str
+    old: str | None
+    new: str | None
+
+
+class RowState(NamedTuple):
+    hash: str
+    assignments: list[tuple[str, str, str | None]]
+
+
+class ChangeSet(NamedTuple):
+    workbook: str
+    changes: list[Change]
+    rows: dict[int, RowState]
+    directors: DirectorRegistry
+    first_run: bool
+
+
+def row_hash(row: tuple) -> str:
+    """Return a hash of the row's values."""
+    return hashlib.blake2b(
+        repr(row).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def find_changes(
+    rows: object,
+    sessions: list[tuple[str, int]],
+    previous: dict[int, RowState],
+) -> tuple[list[Change], dict[int, RowState]]:
+    """Return the changed assignments and the state of each row now.
+
+    Rows with the same hash as in previous are not read again. Each
+    session is a (day, date column) pair, as for DateIndex.from_rows.
+    """
+    rows_now = {}
+    old = {}
+    new = {}
+    for row_number, row in enumerate(rows, 1):
+        digest = row_hash(row)
+        before = previous.get(row_number)
+        if before and before.hash == digest:
+            rows_now[row_number] = before
+            continue
+        assignments = _row_assignments(row, sessions)
+        rows_now[row_number] = RowState(digest, assignments)
+        if before:
+            old.update(_assignment_map(before.assignments))
+        new.update(_assignment_map(assignments))
+    for row_number in previous.keys() - rows_now.keys():
+        old.update(_assignment_map(previous[row_number].assignments))
+
+    changes = [
+        Change(datetime.datetime.fromisoformat(rota_date), session,
+               old.get((rota_date, session)), new.get((rota_date, session)))
+        for rota_date, session in sorted(old.keys() | new.keys())
+        if old.get((rota_date, session)) != new.get((rota_date, session))
+    ]
+    return (changes, rows_now)
+
+
+def pending_changes(
+    store: RotaStore | None = None, progress: Progress | None = None
+) -> ChangeSet | None:
+    """Return the changes to the workbook since the last run, or None.
+
+    None if the workbook cannot be read.
+    """
+    config = read_config()
+    sources = get_rota_sources(config, progress=progress)
+    if not sources:
+        return None
+    (main_sheet, directors) = sources
+    workbook = str(
+        Path(config.workbook_dir, config.workbook_file_name).resolve())
+    own_store = store is None
+    if own_store:
+        store = RotaStore()
+    try:
+        previous = {
+            row: RowState(digest, [tuple(item) for item in assignments])
+            for row, (digest, assignments) in store.row_hashes(
+                workbook).items()
+        }
+    finally:
+        if own_store:
+            store.close()
+
+    (changes, rows) = find_changes(
+        main_sheet.iter_rows(values_only=True),
+        session_columns(config),
+        previous,
+    )
+    if not previous:
+        changes = []
+    logger.info("Rota changes found", changes=len(changes),
+                rows=len(rows), first_run=not previous)
+    return ChangeSet(workbook, changes, rows, directors, not previous)
+
+
+def save_changes(
+    change_set: ChangeSet, store: RotaStore | None = None
+) -> None:
+    """Record the rows of the change set as the version to compare with."""
+    own_store = store is None
+    if own_store:
+        store = RotaStore()
+    try:
+        store.save_row_hashes(
+            change_set.workbook,
+            {row: tuple(state) for row, state in change_set.rows.items()},
+        )
+    finally:
+        if own_store:
+            store.close()
+
+
+def change_emails(
+    change_set: ChangeSet, today: datetime.date | None = None
+) -> dict[str, str]:
+    """Return the "your duty changed" email body for each director affected.
+
+    Changes to dates before today, and inactive directors, are left out.
+    """
+    today = today or datetime.date.today()
+    lines = {}
+    for change in change_set.changes:
+        if change.date.date() < today:
+            continue
+        when = f"{change.date:%A %d %b %Y} ({change.session})"
+        if change.old:
+            lines.setdefault(change.old, []).append(
+                f"{when}: you are no longer the director")
+        if change.new:
+            lines.setdefault(change.new, []).append(
+                f"{when}: you are now the director")
+
+    bodies = {}
+    for initials, director_lines in lines.items():
+        director = change_set.directors.get(initials)
+        if not director or not director.email:
+            logger.warning(
+                f"Change not sent to unknown director '{initials}'")
+            continue
+        if not director.active:
+            logger.info(f"Change not sent to inactive director '{initials}'")
+            continue
+        bodies[initials] = "\n".join([
+            f"Dear {director.first_name}",
+            "",
+            "Your duty on the directors' rota has changed:",
+            "",
+            *director_lines,
+            "",
+        ])
+    return bodies
+
+
+def update_reminders(
+    change_set: ChangeSet, queue: ReminderQueue | None = None
+) -> int:
+    """Move the reminder for each changed duty to its new director.
+
+    The old director's reminder for the date is cancelled, and one is
+    queued for the new director if they are sent reminders. Return the
+    number queued.
+    """
+    config = read_config()
+    own_queue = queue is None
+    if own_queue:
+        queue = ReminderQueue(config.email_reminder_dir)
+    queued = 0
+    try:
+        for change in change_set.changes:
+            if change.old:
+                queue.cancel(change.old, change.date)
+            director = change_set.directors.reminders.get(change.new)
+            if director:
+                queued += schedule_reminders(
+                    config, director, queue, dates=[change.date])
+    finally:
+        if own_queue:
+            queue.close()
+    return queued
+
+
+def record_changes(
+    change_set: ChangeSet,
+    store: RotaStore | None = None,
+    reminders: ReminderQueue | None = None,
+) -> None:
+    """Move the reminders to the new directors, then record the rows.
+
+    For a change set with no emails to send, e.g. when every change is
+    to a date that has passed.
+    """
+    _move_reminders(change_set, reminders)
+    save_changes(change_set, store)
+
+
+def send_changes(
+    change_set: ChangeSet,
+    smtp_class: type = smtplib.SMTP_SSL,
+    store: RotaStore | None = None,
+    reminders: ReminderQueue | None = None,
+    today: datetime.date | None = None,
+) -> SendReport:
+    """Email each director affected by the changes, then record the rows.
+
+    The reminders are moved to the new directors first. The rows are
+    recorded only if every email was sent, so a run after a failure finds
+    the same changes again. Changes before today are not emailed.
+    """
+    config = read_config()
+    report = SendReport()
+    _move_reminders(change_set, reminders)
+    bodies = change_emails(change_set, today)
+    with SmtpSession(smtp_class) as session:
+        for initials, body in bodies.items():
+            director = change_set.directors[initials]
+            message = build_message(
+                f"{config.email_subject} change", body, director.email)
+            start = time.perf_counter()
+            error = ""
+            try:
+                session.send(
+                    message["From"], director.email, message.as_string())
+            except (smtplib.SMTPException, OSError) as err:
+                error = str(err) or type(err).__name__
+                logger.error(f"Change email to {director.email} failed. "
+                             f"{error}")
+                session.close()
+            report.results.append(SendResult(
+                initials,
+                director.email,
+                Status.ERROR if error else Status.SUCCESS,
+                time.perf_counter() - start,
+                error,
+            ))
+
+    if change_set.changes:
+        record_sent(min(change.date for change in change_set.changes),
+                    report.results)
+    if report.status == Status.SUCCESS:
+        try:
+            save_changes(change_set, store)
+        except (OSError, sqlite3.Error) as err:
+            logger.error(f"Rota rows not recorded. {err}")
+    logger.info("Change emails sent", sent=len(report.sent),
+                failed=[result.email for result in report.failed])
+    return report
+
+
+def _move_reminders(
+    change_set: ChangeSet, reminders: ReminderQueue | None
+) -> None:
+    try:
+        update_reminders(change_set, reminders)
+    except (OSError, sqlite3.Error, ValueError) as err:
+        logger.error(f"Reminders not moved to the new directors. {err}")
+
+
+def _row_assignments(
+    row: tuple, sessions: list[tuple[str, int]]
+) -> list[tuple[str, str, str | None]]:
+    assignments = []
+    for day, date_col in sessions:
+        rota_date = as_datetime(row[date_col])
+        if rota_date:
+            assignments.append(
+                (rota_date.isoformat(), day, row[date_col + 1] or None))
+    return assignments
+
+
+def _assignment_map(assignments: list) -> dict[tuple[str, str], str | None]:
+    return {
+        (rota_date, session): initials
+        for rota_date, session, initials in assignments
+    }
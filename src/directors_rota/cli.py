@@ -0,0 +1,276 @@
+"""Command line interface for Phoenix Director's Rota.
+
+Generate and send the rota without the GUI, e.g. from cron:
+
+    directors-rota generate --month "Nov 2026" --send --dry-run
+
+With --outbox the emails are queued in the outbox, and sent by:
+
+    directors-rota send-outbox
+
+Reminders due are sent by "directors-rota reminders"; with --daemon it
+keeps running and sends each reminder when it falls due.
+
+After the workbook has been edited, "directors-rota changes --send"
+emails only the directors whose duties changed since it was last run.
+
+Several workbooks are generated at once, in a pool of processes, by:
+
+    directors-rota batch --job "club.xlsx,club.toml,Nov 2026" \
+        --job "other.xlsx,,Nov 2026"
+
+where each job is a workbook, a config file (blank for the usual
+config) and a month.
+
+Nothing under forms/, nor root.py, is imported here.
+"""
+
+import argparse
+import datetime
+import sys
+from pathlib import Path
+
+from dateutil.parser import ParserError
+from dateutil.parser import parse as date_parse
+from dateutil.relativedelta import relativedelta
+from psiutils.constants import Status
+
+from directors_rota.batch import BatchJob, run_batch
+from directors_rota.changes import pending_changes, save_changes, send_changes
+from directors_rota.config import read_config
+from directors_rota.constants import MMYYYY
+from directors_rota.emails import SmtpSession, email_configured, send_emails
+from directors_rota.outbox import Outbox, spool_emails
+from directors_rota.process import generate_rota
+from directors_rota.reminders import ReminderQueue, run_reminders
+from directors_rota.timing import add_profile_argument, profile_path, profiled
+
+EXIT_OK = 0
+EXIT_NO_ROTA = 1
+EXIT_NOT_CONFIGURED = 2
+EXIT_NOT_SENT = 3
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the command line and return the exit code."""
+    parser = _parser()
+    args = parser.parse_args(argv)
+    with profiled(profile_path(args)):
+        return args.command(args)
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="directors-rota",
+        description="Create the director's rota for Phoenix Bridge Club.",
+    )
+    add_profile_argument(parser)
+    subparsers = parser.add_subparsers(required=True)
+
+    generate = subparsers.add_parser(
+        "generate", help="generate the rota email for a month"
+    )
+    generate.add_argument(
+        "--month",
+        type=_month,
+        default=_next_month(),
+        help="month of the rota, e.g. 'Nov 2026' (default: next month)",
+    )
+    generate.add_argument(
+        "--send",
+        action="store_true",
+        help="email the rota to the active directors",
+    )
+    generate.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="with --send, list the recipients but send nothing",
+    )
+    generate.add_argument(
+        "--outbox",
+        action="store_true",
+        help="with --send, queue the emails in the outbox",
+    )
+    generate.set_defaults(command=_generate)
+
+    send_outbox = subparsers.add_parser(
+        "send-outbox", help="send the emails queued in the outbox"
+    )
+    send_outbox.set_defaults(command=_send_outbox)
+
+    reminders = subparsers.add_parser(
+        "reminders", help="send the reminder emails that are due"
+    )
+    reminders.add_argument(
+        "--daemon",
+        action="store_true",
+        help="keep running, sending each reminder when it falls due",
+    )
+    reminders.set_defaults(command=_reminders)
+
+    changes = subparsers.add_parser(
+        "changes",
+        help="list the changes to the rota since this was last run",
+    )
+    changes.add_argument(
+        "--send",
+        action="store_true",
+        help="email the directors whose duties have changed",
+    )
+    changes.set_defaults(command=_changes)
+
+    batch = subparsers.add_parser(
+        "batch", help="generate the rotas of several workbooks at once"
+    )
+    batch.add_argument(
+        "--job",
+        type=_job,
+        action="append",
+        required=True,
+        dest="jobs",
+        help="'WORKBOOK,CONFIG,MONTH'; CONFIG may be blank (repeatable)",
+    )
+    batch.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="number of worker processes (default: one per CPU)",
+    )
+    batch.set_defaults(command=_batch)
+    return parser
+
+
+def _generate(args: argparse.Namespace) -> int:
+    response = generate_rota(args.month)
+    if not response or response[0] is None:
+        print(f"Rota not created for {args.month:{MMYYYY}}", file=sys.stderr)
+        return EXIT_NO_ROTA
+    (email, directors, diagnostics) = response
+    print(email)
+    if diagnostics.issues:
+        print(diagnostics.report(), file=sys.stderr)
+    if not args.send:
+        return EXIT_OK
+
+    if args.dry_run:
+        for director in directors.active.values():
+            print(f"Would send to {director.name} <{director.email}>")
+        return EXIT_OK
+
+    if not email_configured():
+        print("Emails not sent.  Invalid email configuration.",
+              file=sys.stderr)
+        return EXIT_NOT_CONFIGURED
+    if args.outbox:
+        count = spool_emails(email, directors, month=args.month)
+        print(f"{count} emails queued in the outbox")
+        return EXIT_OK
+    if send_emails(email, directors, args.month) != Status.SUCCESS:
+        print("Emails not sent to all directors.", file=sys.stderr)
+        return EXIT_NOT_SENT
+    return EXIT_OK
+
+
+def _send_outbox(args: argparse.Namespace) -> int:
+    if not email_configured():
+        print("Emails not sent.  Invalid email configuration.",
+              file=sys.stderr)
+        return EXIT_NOT_CONFIGURED
+    outbox = Outbox()
+    report = outbox.drain()
+    print(f"{len(report.sent)} emails sent, {len(outbox)} waiting")
+    if report.failed:
+        print("Emails not sent to all directors.", file=sys.stderr)
+        return EXIT_NOT_SENT
+    return EXIT_OK
+
+
+def _reminders(args: argparse.Namespace) -> int:
+    if not email_configured():
+        print("Reminders not sent.  Invalid email configuration.",
+              file=sys.stderr)
+        return EXIT_NOT_CONFIGURED
+    queue = ReminderQueue(read_config().email_reminder_dir)
+    try:
+        with SmtpSession() as session:
+            sent = run_reminders(queue, session, daemon=args.daemon)
+    except KeyboardInterrupt:
+        return EXIT_OK
+    finally:
+        queue.close()
+    print(f"{sent} reminders sent, {len(queue)} waiting")
+    return EXIT_OK
+
+
+def _changes(args: argparse.Namespace) -> int:
+    change_set = pending_changes()
+    if not change_set:
+        print("Workbook not read", file=sys.stderr)
+        return EXIT_NO_ROTA
+    if change_set.first_run:
+        save_changes(change_set)
+        print("Rota recorded; changes are found from the next run")
+        return EXIT_OK
+    for change in change_set.changes:
+        print(f"{change.date:%d/%m/%y} {change.session}: "
+              f"{change.old or '-'} -> {change.new or '-'}")
+    if not args.send:
+        return EXIT_OK
+
+    if not email_configured():
+        print("Emails not sent.  Invalid email configuration.",
+              file=sys.stderr)
+        return EXIT_NOT_CONFIGURED
+    report = send_changes(change_set)
+    print(f"{len(report.sent)} change emails sent")
+    if report.failed:
+        print("Emails not sent to all directors.", file=sys.stderr)
+        return EXIT_NOT_SENT
+    return EXIT_OK
+
+
+def _batch(args: argparse.Namespace) -> int:
+    report = run_batch(args.jobs, args.workers)
+    for result in report.results:
+        job = result.job
+        print(f"== {job.workbook} {job.month:{MMYYYY}}")
+        if result.error:
+            print(f"Rota not created for {job.month:{MMYYYY}}: "
+                  f"{result.error}", file=sys.stderr)
+            continue
+        print(result.email)
+        if result.diagnostics.issues:
+            print(result.diagnostics.report(), file=sys.stderr)
+    counts = ", ".join(
+        f"{kind} {count}" for kind, count in report.issue_counts().items())
+    print(f"{len(report.succeeded)} rotas created, "
+          f"{len(report.failed)} failed; issues: {counts}")
+    return EXIT_NO_ROTA if report.failed else EXIT_OK
+
+
+def _job(text: str) -> BatchJob:
+    """Return the batch job in "workbook,config,month"."""
+    parts = [part.strip() for part in text.split(",")]
+    if len(parts) != 3 or not parts[0]:
+        raise argparse.ArgumentTypeError(
+            f"invalid job '{text}': expected WORKBOOK,CONFIG,MONTH")
+    (workbook, profile, month) = parts
+    return BatchJob(
+        Path(workbook), Path(profile) if profile else None, _month(month))
+
+
+def _month(text: str) -> datetime.date:
+    """Return the first day of the month named in text."""
+    try:
+        return date_parse(f"1 {text}").date()
+    except (ParserError, OverflowError) as err:
+        raise argparse.ArgumentTypeError(f"invalid month '{text}'") from err
+
+
+def _next_month() -> datetime.date:
+    today = datetime.date.today()
+    return today.replace(day=1) + relativedelta(months=1)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
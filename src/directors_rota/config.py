@@ -1,11 +1,14 @@
 """Config for Phoenix director's rota."""
 
+import functools
 import os
 import sys
+import threading
 from pathlib import Path
 
 from appdirs import user_data_dir
 from dotenv import load_dotenv
+from psi_toml.parser import TOMLDecodeError, TomlParser
 from psiconfig import TomlConfig
 from psiutils.known_paths import get_downloads_dir
 
@@ -15,67 +18,137 @@ from directors_rota.constants import (
     CONFIG_PATH,
     EMAIL_TEMPLATE,
 )
-from directors_rota.text import Text
-
-txt = Text()
-
-if getattr(sys, "frozen", False):
-    exe_dir = Path(sys.executable).parent
-    env_path = exe_dir / ".env"
-    load_dotenv(dotenv_path=env_path)
-else:
-    load_dotenv()
-
-email_key = os.getenv("EMAIL_KEY")
-email_sender = os.getenv("EMAIL_SENDER")
-smtp_server = os.getenv("SMTP_SERVER")
-try:
-    smpt_port = int(os.getenv("SMTP_PORT"))
-except TypeError:
-    smpt_port = 0
-
-DEFAULT_CONFIG = {
-    "workbook_dir": Path(get_downloads_dir()),
-    "workbook_file_name": "directors-rota.xlsx",
-    "email_template": str(
-        Path(user_data_dir(APP_NAME, APP_AUTHOR), EMAIL_TEMPLATE)
-    ),
-    "main_sheet": "Main",
-    "directors_sheet": "Directors",
-    "initials_col": 0,
-    "name_col": 1,
-    "email_col": 2,
-    "username_col": 3,
-    "active_col": 4,
-    "send_reminder_col": 5,
-    "mon_date_col": 0,
-    "wed_date_col": 3,
-    "thurs_date_col": 6,
-    "email_subject": f"Phoenix Bridge Club - BBO {txt.DIRECTORS} rota",
-    "send_emails": True,
-    "email_reminder_dir": "/home/jeff/.local/share/cron_jobs/emails",
-    "geometry": {},
-    "new_geometry": {},
-}
+from directors_rota.text import txt
+
+_config_cache = {}
+_config_lock = threading.Lock()
+
+
+class InvalidConfigError(Exception):
+    """The config file is missing or is not valid TOML."""
+
+
+@functools.cache
+def default_config() -> dict:
+    """Return the default config, built on first use."""
+    return {
+        "workbook_dir": Path(get_downloads_dir()),
+        "workbook_file_name": "directors-rota.xlsx",
+        "email_template": str(
+            Path(user_data_dir(APP_NAME, APP_AUTHOR), EMAIL_TEMPLATE)
+        ),
+        "main_sheet": "Main",
+        "directors_sheet": "Directors",
+        "initials_col": 0,
+        "name_col": 1,
+        "email_col": 2,
+        "username_col": 3,
+        "active_col": 4,
+        "send_reminder_col": 5,
+        "mon_date_col": 0,
+        "wed_date_col": 3,
+        "thurs_date_col": 6,
+        "sessions": {},
+        "workbook_cache": True,
+        "rota_store": True,
+        "watch_workbook": True,
+        "email_subject": f"Phoenix Bridge Club - BBO {txt.DIRECTORS} rota",
+        "send_emails": True,
+        "email_concurrency": 4,
+        "email_rate_limit": 5,
+        "use_outbox": False,
+        "email_reminder_dir": "/home/jeff/.local/share/cron_jobs/emails",
+        "reminder_time": "06:00",
+        "reminder_days_before": 0,
+        "geometry": {},
+        "new_geometry": {},
+    }
 
 
 def read_config() -> TomlConfig:
-    """Return the config file."""
-    toml_config = TomlConfig(path=CONFIG_PATH, defaults=DEFAULT_CONFIG)
-    toml_config.check_defaults(toml_config.config)
-    return toml_config
+    """Return the shared config, re-reading the file only if it changed."""
+    mtime = _config_mtime()
+    with _config_lock:
+        cached = _config_cache.get("config")
+        if cached is None or _config_cache.get("mtime") != mtime:
+            cached = read_profile(CONFIG_PATH)
+            _config_cache["config"] = cached
+            _config_cache["mtime"] = mtime
+        return cached
+
+
+def read_profile(path: Path, required: bool = False) -> TomlConfig:
+    """Return the config in the file at path, filled in from the defaults.
+
+    The defaults are used if there is no file, or it is not valid TOML,
+    unless the file is required: then InvalidConfigError is raised.
+    """
+    if required:
+        _check_profile(Path(path))
+    profile = TomlConfig(path=path, defaults=dict(default_config()))
+    profile.check_defaults(profile.config)
+    # An empty table, such as sessions, is saved as a bare [header] that
+    # psi_toml reads back as {"": ""}
+    for value in profile.config.values():
+        if isinstance(value, dict) and value.get("", None) == "":
+            del value[""]
+    return profile
 
 
 def save_config(changed_config: TomlConfig) -> TomlConfig | None:
     """Save the config file."""
     result = changed_config.save()
+    invalidate_config()
     if result != changed_config.STATUS_OK:
         return None
-    return TomlConfig(CONFIG_PATH)
+    return read_config()
+
+
+def update_config(changes: dict) -> TomlConfig | None:
+    """Save the changed fields to the config file; return the new config.
+
+    The changes are made to a fresh copy of the file, so the shared
+    config is never changed in place: readers see the change only after
+    the file has been saved. None if the file could not be saved.
+    """
+    changed_config = read_profile(CONFIG_PATH)
+    for field, value in changes.items():
+        changed_config.update(field, value, force=True)
+    return save_config(changed_config)
+
+
+def invalidate_config() -> None:
+    """Make the next read_config re-read the file."""
+    with _config_lock:
+        _config_cache.clear()
+
+
+def _check_profile(path: Path) -> None:
+    # TomlConfig falls back to the defaults without saying why
+    if not path.is_file():
+        raise InvalidConfigError(f"Config file {path} not found")
+    try:
+        with open(path, encoding="utf-8") as f_config:
+            TomlParser().load(f_config)
+    except (OSError, UnicodeDecodeError) as err:
+        raise InvalidConfigError(
+            f"Config file {path} not read: {err}") from err
+    except TOMLDecodeError as err:
+        raise InvalidConfigError(
+            f"Config file {path} is not valid TOML: {err.args[0]}") from err
+
+
+def _config_mtime() -> int | None:
+    try:
+        return CONFIG_PATH.stat().st_mtime_ns
+    except OSError:
+        return None
 
 
-def _get_env() -> dict:
-    load_dotenv()
+@functools.cache
+def get_env() -> dict:
+    """Return the email settings from the environment and .env file."""
+    _load_dotenv()
     try:
         smpt_port = int(os.getenv("SMTP_PORT"))
     except TypeError:
@@ -89,5 +162,21 @@ def _get_env() -> dict:
     }
 
 
-config = read_config()
-env = _get_env()
+def _load_dotenv() -> None:
+    if getattr(sys, "frozen", False):
+        exe_dir = Path(sys.executable).parent
+        env_path = exe_dir / ".env"
+        load_dotenv(dotenv_path=env_path)
+    else:
+        load_dotenv()
+
+
+def __getattr__(name: str) -> object:
+    # config, env and DEFAULT_CONFIG are created on first use, not on import
+    if name == "config":
+        return read_config()
+    if name == "env":
+        return get_env()
+    if name == "DEFAULT_CONFIG":
+        return default_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
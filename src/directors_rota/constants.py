@@ -1,12 +1,11 @@
 """Constants for the Director's Rota app."""
+import functools
 from pathlib import Path
 from appdirs import user_config_dir, user_data_dir
 
 from psiutils.known_paths import get_downloads_dir
 
-from directors_rota.text import Text
-
-txt = Text()
+from directors_rota.text import strings
 
 
 # Config
@@ -18,7 +17,7 @@ CONFIG_PATH = Path(user_config_dir(APP_NAME, APP_AUTHOR), 'config.toml')
 DATA_DIR = str(Path(user_data_dir(APP_NAME, AUTHOR)))
 
 # App
-APP_TITLE = f'{txt.DIRECTORS} Rota'
+APP_TITLE = f"{strings['DIRECTORS']} Rota"
 ICON_FILE = Path('images', 'icon.png')
 AUTHOR = 'Jeff Watkins'
 
@@ -26,7 +25,6 @@ AUTHOR = 'Jeff Watkins'
 LARGE_FONT = ('Arial', 16)
 
 # Files
-DOWNLOADS_DIR = get_downloads_dir()
 EMAIL_FILE_PREFIX = 'emails'
 
 TXT_FILE_TYPES = (
@@ -43,3 +41,16 @@ XLS_FILE_TYPES = (
 MMYYYY = '%b %Y'
 
 COL_MAXIMUM = 26
+
+
+@functools.cache
+def downloads_dir() -> str:
+    """Return the downloads directory, looked up on first use."""
+    return get_downloads_dir()
+
+
+def __getattr__(name: str) -> object:
+    # DOWNLOADS_DIR is looked up on first use, not on import
+    if name == 'DOWNLOADS_DIR':
+        return downloads_dir()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
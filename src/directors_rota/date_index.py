@@ -0,0 +1,146 @@
+"""Sorted index of rota dates, and date-range row filters."""
+
+import datetime
+from bisect import bisect_left
+from typing import NamedTuple
+
+
+class DateRange(NamedTuple):
+    """Rows with a date from start (inclusive) to end (exclusive)."""
+    start: datetime.datetime
+    end: datetime.datetime
+    date_columns: tuple[int, ...]
+
+
+class RowScan:
+    """Apply a DateRange to the rows of a sheet, in sheet order.
+
+    A date column is taken to be sorted once it has gone up at least
+    once and while no date in it is earlier than the one before. Once
+    every column that holds dates is sorted and past the end of the
+    range, no later row can match and the scan is done.
+    """
+
+    def __init__(self, where: DateRange) -> None:
+        self.start = as_datetime(where.start)
+        self.end = as_datetime(where.end)
+        self.last_dates = [None] * len(where.date_columns)
+        self.rising = [False] * len(where.date_columns)
+        self.falling = [False] * len(where.date_columns)
+        self.done = False
+
+    def accept(self, values: list[object]) -> bool:
+        """Return True if any of the row's date values is in the range.
+
+        values are the row's cells in the DateRange's date_columns order.
+        """
+        in_range = False
+        for index, value in enumerate(values):
+            rota_date = as_datetime(value)
+            if not rota_date:
+                continue
+            last_date = self.last_dates[index]
+            if last_date and rota_date < last_date:
+                self.falling[index] = True
+            elif last_date and rota_date > last_date:
+                self.rising[index] = True
+            self.last_dates[index] = rota_date
+            if self.start <= rota_date < self.end:
+                in_range = True
+
+        if not in_range:
+            dated = [
+                (last_date, rising and not falling)
+                for last_date, rising, falling in zip(
+                    self.last_dates, self.rising, self.falling, strict=True
+                )
+                if last_date
+            ]
+            self.done = bool(dated) and all(
+                is_sorted and last_date >= self.end
+                for last_date, is_sorted in dated
+            )
+        return in_range
+
+
+def filter_rows(rows: object, where: DateRange) -> object:
+    """Yield the rows that match where, stopping once none later can."""
+    for _, row in filter_numbered_rows(enumerate(rows, 1), where):
+        yield row
+
+
+def filter_numbered_rows(numbered_rows: object, where: DateRange) -> object:
+    """Yield the (row number, row) pairs whose rows match where."""
+    scan = RowScan(where)
+    for row_number, row in numbered_rows:
+        if scan.accept([row[column] for column in where.date_columns]):
+            yield (row_number, row)
+        elif scan.done:
+            return
+
+
+class RotaEntry(NamedTuple):
+    date: datetime.datetime
+    session: str
+    initials: str | None
+    row: int | None = None
+
+
+class DateIndex:
+    """Rota entries sorted on date, answering range queries by bisection."""
+
+    def __init__(self, entries: list[RotaEntry]) -> None:
+        self.entries = sorted(entries, key=lambda entry: entry.date)
+        self.dates = [entry.date for entry in self.entries]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __repr__(self) -> str:
+        return f"DateIndex ({len(self.entries)} entries)"
+
+    @classmethod
+    def from_rows(
+        cls, rows: object, sessions: list[tuple[str, int]]
+    ) -> "DateIndex":
+        """Return the index of (date, session, initials) over the rows.
+
+        Each session is a (day, date column) pair; the director's initials
+        are in the column after the date.
+        """
+        return cls.from_numbered_rows(((None, row) for row in rows), sessions)
+
+    @classmethod
+    def from_numbered_rows(
+        cls, numbered_rows: object, sessions: list[tuple[str, int]]
+    ) -> "DateIndex":
+        """Return the index over (row number, row) pairs, as from_rows.
+
+        Each entry keeps its sheet row number.
+        """
+        entries = []
+        for row_number, row in numbered_rows:
+            for day, date_col in sessions:
+                rota_date = as_datetime(row[date_col])
+                if rota_date:
+                    initials = row[date_col + 1]
+                    entries.append(
+                        RotaEntry(rota_date, day, initials, row_number))
+        return cls(entries)
+
+    def between(
+        self, start_date: datetime.datetime, end_date: datetime.datetime
+    ) -> list[RotaEntry]:
+        """Return the entries with start_date <= date < end_date."""
+        start = bisect_left(self.dates, as_datetime(start_date))
+        end = bisect_left(self.dates, as_datetime(end_date), lo=start)
+        return self.entries[start:end]
+
+
+def as_datetime(value: object) -> datetime.datetime | None:
+    """Return a date cell as a datetime, or None if it is not a date."""
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, datetime.date):
+        return datetime.datetime.combine(value, datetime.time())
+    return None
@@ -0,0 +1,110 @@
+"""Problems found in the rota sheet while the rota is extracted.
+
+The problems are collected in memory, each with the cell it refers to,
+and logged as one summary event rather than a line per row.
+"""
+
+import datetime
+from collections import Counter
+from typing import NamedTuple
+
+from directors_rota import logger
+from directors_rota.text import txt
+
+MISSING_DIRECTOR = "missing_director"
+UNKNOWN_INITIALS = "unknown_initials"
+EMPTY_PERIOD = "empty_period"
+REPORT_LINES = 20
+
+
+class Issue(NamedTuple):
+    kind: str
+    session: str
+    date: datetime.datetime
+    initials: str | None = None
+    cell: str | None = None
+
+    def __str__(self) -> str:
+        place = f"{self.cell} " if self.cell else ""
+        when = f"{self.session} {self.date:%d %b %Y}".strip()
+        if self.kind == MISSING_DIRECTOR:
+            return f"{place}{txt.NO_DIRECTOR} for {when}"
+        if self.kind == UNKNOWN_INITIALS:
+            return (f"{place}{txt.INVALID_DIRECTOR} '{self.initials}' "
+                    f"for {when}")
+        session = f"{self.session} " if self.session else ""
+        return f"No {session}dates in {self.date:%b %Y}"
+
+
+class Diagnostics:
+    """The problems found while extracting the rotas, reported together."""
+
+    def __init__(self, sheet_name: str = "") -> None:
+        self.sheet_name = sheet_name
+        self.issues = []
+        self.rows = 0
+
+    def __repr__(self) -> str:
+        return f"Diagnostics ({len(self.issues)} issues, {self.rows} rows)"
+
+    def missing_director(
+        self, session: str, rota_date: datetime.datetime, cell: str = None
+    ) -> None:
+        self._add(Issue(MISSING_DIRECTOR, session, rota_date, None, cell))
+
+    def unknown_initials(
+        self,
+        session: str,
+        rota_date: datetime.datetime,
+        initials: str,
+        cell: str = None,
+    ) -> None:
+        self._add(
+            Issue(UNKNOWN_INITIALS, session, rota_date, initials, cell))
+
+    def empty_period(
+        self, session: str, start_date: datetime.datetime
+    ) -> None:
+        self._add(Issue(EMPTY_PERIOD, session, start_date))
+
+    def counts(self) -> dict[str, int]:
+        """Return the number of issues of each kind."""
+        counts = Counter(issue.kind for issue in self.issues)
+        return {
+            kind: counts[kind]
+            for kind in (MISSING_DIRECTOR, UNKNOWN_INITIALS, EMPTY_PERIOD)
+        }
+
+    def emit(self) -> None:
+        """Log the issues as a single summary event."""
+        fields = {
+            "rows": self.rows,
+            **self.counts(),
+            "cells": [issue.cell for issue in self.issues if issue.cell],
+        }
+        if self.issues:
+            logger.warning("Rota diagnostics", **fields)
+        else:
+            logger.info("Rota diagnostics", **fields)
+
+    def report(self, limit: int = REPORT_LINES) -> str:
+        """Return the issues as text, one per line, up to limit lines."""
+        lines = [str(issue) for issue in self.issues[:limit]]
+        if len(self.issues) > limit:
+            lines.append(f"... and {len(self.issues) - limit} more")
+        return "\n".join(lines)
+
+    def _add(self, issue: Issue) -> None:
+        if self.sheet_name and issue.cell:
+            issue = issue._replace(cell=f"{self.sheet_name}!{issue.cell}")
+        self.issues.append(issue)
+
+
+def cell_name(column: int, row: int) -> str:
+    """Return the A1 name of the cell at a zero-based column and row number."""
+    letters = ""
+    column += 1
+    while column:
+        (column, remainder) = divmod(column - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return f"{letters}{row}"
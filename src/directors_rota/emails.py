@@ -1,70 +1,320 @@
 """Send and or save emails."""
 
+import datetime
 import smtplib
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from email.mime.text import MIMEText
-from smtplib import SMTPAuthenticationError
+from smtplib import (
+    SMTPAuthenticationError,
+    SMTPException,
+    SMTPServerDisconnected,
+)
+from typing import NamedTuple
 
 from psiutils.constants import Status
-from psiutils.errors import ErrorMsg
 
-from directors_rota.process import Director
-from directors_rota.config import read_config, env
 from directors_rota import logger
+from directors_rota.config import get_env, read_config
+from directors_rota.process import Director, DirectorRegistry
+from directors_rota.progress import Progress
+from directors_rota.reminders import schedule_reminders
+from directors_rota.rota_store import record_sent
+from directors_rota.template import compile_template
+from directors_rota.timing import span
 
 
-def send_emails(text: str, directors: dict[Director]) -> int | ErrorMsg:
+class SendResult(NamedTuple):
+    initials: str
+    email: str
+    status: Status
+    latency: float
+    error: str
+
+
+@dataclass
+class SendReport:
+    """The outcome of sending the rota to each director."""
+    results: list[SendResult] = field(default_factory=list)
+
+    @property
+    def sent(self) -> list[SendResult]:
+        return [result for result in self.results
+                if result.status == Status.SUCCESS]
+
+    @property
+    def failed(self) -> list[SendResult]:
+        return [result for result in self.results
+                if result.status != Status.SUCCESS]
+
+    @property
+    def status(self) -> Status:
+        return Status.ERROR if self.failed else Status.SUCCESS
+
+
+def send_emails(
+        text: str,
+        directors: DirectorRegistry,
+        month: datetime.date | None = None) -> Status:
     """Send emails to the directors."""
-    emails_sent = 0
-    config = read_config()
-    if not (env['email_sender']
-            and env['email_key']
-            and env['smtp_port']
-            and env['smtp_server']):
+    if not email_configured():
         return Status.WARNING
-    for key, director in directors.items():
-        if key and director.active:
-            response = _create_email(config.email_subject, text, director)
-            if isinstance(response, ErrorMsg):
-                return response
-            emails_sent += 1
-            if director.send_reminder:
-                _create_reminder(config.email_reminder_dir, director)
-    return Status.SUCCESS
-
-
-def _create_email(subject: str, text: str, director: Director) -> str:
+    return dispatch_emails(text, directors, month=month).status
+
+
+def email_configured() -> bool:
+    """Return True if the SMTP settings are all present."""
+    env = get_env()
+    return bool(env['email_sender']
+                and env['email_key']
+                and env['smtp_port']
+                and env['smtp_server'])
+
+
+def dispatch_emails(
+        text: str,
+        directors: DirectorRegistry,
+        concurrency: int = 0,
+        rate_limit: float = -1,
+        smtp_class: type = smtplib.SMTP_SSL,
+        progress: Progress | None = None,
+        month: datetime.date | None = None) -> SendReport:
+    """Send the email to each active director concurrently.
+
+    At most concurrency emails are in flight at once, and no more than
+    rate_limit are started per second (0 for no limit); the config values
+    are used if these are not given. A failure for one director does not
+    stop the others: each director's outcome is in the report.
+
+    The text is compiled as a template once, and director placeholders
+    such as <first_name> and <my_dates> are filled in for each director.
+
+    Each email sent is counted in progress. If it is cancelled, the
+    emails not yet started are not sent and are reported as cancelled.
+
+    If the month of the rota is given the outcomes are added to the
+    history of emails sent.
+    """
+    config = read_config()
+    concurrency = concurrency or config.email_concurrency
+    if rate_limit < 0:
+        rate_limit = config.email_rate_limit
+    recipients = list(directors.active.values())
+    progress = progress or Progress()
+    progress.start('Sending emails', len(recipients))
+
+    template = compile_template(text)
+    pool = SessionPool(smtp_class)
+    limiter = RateLimiter(rate_limit)
+
+    def _send(director: Director) -> SendResult:
+        if progress.cancelled.is_set():
+            return SendResult(director.initials, director.email,
+                              Status.WARNING, 0.0, 'Cancelled')
+        body = template.render(**director_values(director))
+        limiter.wait()
+        result = _send_to_director(
+            pool.session(), config.email_subject, body, director)
+        progress.advance()
+        return result
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            report = SendReport(list(executor.map(_send, recipients)))
+    finally:
+        pool.close()
+
+    for result, director in zip(report.results, recipients, strict=True):
+        if (result.status == Status.SUCCESS
+                and director.initials in directors.reminders):
+            create_reminder(config, director)
+    record_sent(month, report.results)
+    logger.info('Emails dispatched',
+                sent=len(report.sent),
+                failed=[result.email for result in report.failed])
+    return report
+
+
+def director_values(director: Director) -> dict[str, str]:
+    """Return the values of the per-director template placeholders."""
+    return {
+        'name': director.name,
+        'first_name': director.first_name,
+        'initials': director.initials,
+        'my_dates': '\n'.join(
+            f'{rota_date:%A %d %b %Y}'
+            for rota_date in sorted(director.dates)),
+    }
+
+
+class RateLimiter:
+    """Space out calls so that no more than rate start per second."""
+    def __init__(self, rate: float) -> None:
+        self.interval = 1 / rate if rate else 0
+        self.next_start = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Block until the caller may start."""
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+        time.sleep(start - now)
+
+
+class SmtpSession:
+    """One authenticated SMTP connection, shared by a run of sends.
+
+    The connection is opened on the first send, re-opened if the server
+    drops it, and closed when the session exits.
+    """
+    def __init__(self, smtp_class: type = smtplib.SMTP_SSL) -> None:
+        self.smtp_class = smtp_class
+        self.server = None
+
+    def __enter__(self) -> 'SmtpSession':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def send(self, sender: str, recipient: str, message: str) -> None:
+        """Send the message, reconnecting once if the server has gone.
+
+        A dropped connection shows as SMTPServerDisconnected or as a socket
+        error (e.g. ConnectionResetError); other SMTP errors are raised.
+        """
+        if not self.server:
+            self._connect()
+        try:
+            with span('smtp_send', recipient=recipient):
+                self.server.sendmail(sender, recipient, message)
+        except OSError as err:
+            if (isinstance(err, SMTPException)
+                    and not isinstance(err, SMTPServerDisconnected)):
+                raise
+            logger.warning(f'SMTP connection dropped ({err!r}). '
+                           'Reconnecting.')
+            self._discard()
+            self._connect()
+            with span('smtp_send', recipient=recipient, retry=True):
+                self.server.sendmail(sender, recipient, message)
+
+    def close(self) -> None:
+        """Close the connection, if open."""
+        if not self.server:
+            return
+        try:
+            self.server.quit()
+        except (SMTPServerDisconnected, OSError):
+            pass
+        self.server = None
+
+    def _discard(self) -> None:
+        """Drop a broken connection without talking to the server."""
+        try:
+            self.server.close()
+        except OSError:
+            pass
+        self.server = None
+
+    def _connect(self) -> None:
+        env = get_env()
+        with span('smtp_connect', server=env['smtp_server']):
+            server = self.smtp_class(env['smtp_server'], env['smtp_port'])
+        try:
+            with span('smtp_login'):
+                server.login(env['email_sender'], env['email_key'])
+        except Exception:
+            server.close()
+            raise
+        self.server = server
+        logger.info(f"SMTP session opened on {env['smtp_server']}")
+
+
+class SessionPool:
+    """An SmtpSession for each worker thread, closed together."""
+    def __init__(self, smtp_class: type = smtplib.SMTP_SSL) -> None:
+        self.smtp_class = smtp_class
+        self.local = threading.local()
+        self.sessions = []
+        self.lock = threading.Lock()
+
+    def session(self) -> SmtpSession:
+        """Return the calling thread's session."""
+        session = getattr(self.local, 'session', None)
+        if not session:
+            session = SmtpSession(self.smtp_class)
+            self.local.session = session
+            with self.lock:
+                self.sessions.append(session)
+        return session
+
+    def close(self) -> None:
+        with self.lock:
+            for session in self.sessions:
+                session.close()
+            self.sessions = []
+
+
+def _send_to_director(
+        session: SmtpSession,
+        subject: str,
+        text: str,
+        director: Director) -> SendResult:
     # pylint: disable=no-member)
+    start = time.perf_counter()
+    error = ''
     try:
-        _send_email(
-            subject,
-            text,
-            director.email)
+        _send_email(session, subject, text, director.email)
     except SMTPAuthenticationError:
-        logger.error('Email authentication error.')
-        return Status.ERROR
+        error = 'Email authentication error.'
     except TypeError:
-        logger.error('Email setup error.')
-        return Status.ERROR
-    return Status.SUCCESS
+        error = 'Email setup error.'
+    except SMTPException as err:
+        error = str(err) or type(err).__name__
+    except OSError as err:
+        error = str(err) or type(err).__name__
+        session.close()
+    latency = time.perf_counter() - start
+
+    status = Status.SUCCESS
+    if error:
+        logger.error(f"Email to {director.email} failed. {error}")
+        status = Status.ERROR
+    return SendResult(
+        director.initials, director.email, status, latency, error)
 
 
-def _send_email(subject: str, body: str, recipient: str) -> None:
+def _send_email(
+        session: SmtpSession,
+        subject: str,
+        body: str,
+        recipient: str) -> None:
+    msg = build_message(subject, body, recipient)
+    session.send(msg['From'], recipient, msg.as_string())
+    logger.info(f"Email sent to {recipient}")
+
+
+def build_message(subject: str, body: str, recipient: str) -> MIMEText:
+    """Return the email to the recipient, from the configured sender."""
+    env = get_env()
     msg = MIMEText(body)
     msg['Subject'] = subject
     msg['From'] = env['email_sender']
     msg['To'] = recipient
-    # recipient = env['email_sender']
-    with smtplib.SMTP_SSL(env['smtp_server'], env['smtp_port']) as smtp_server:
-        smtp_server.login(env['email_sender'], env['email_key'])
-        smtp_server.sendmail(env['email_sender'], recipient, msg.as_string())
-    logger.info(f"Email sent to {recipient}")
+    return msg
 
 
-def _create_reminder(path: str, director: Director) -> None:
-    return {
-        'date': '',
-        'time': '06:00',
-        'recipient': '',
-        'subject': '',
-        'body': '',
-    }
+def create_reminder(config: dict, director: Director) -> None:
+    """Queue the director's reminders; a failure does not stop sending."""
+    try:
+        schedule_reminders(config, director)
+    except (OSError, sqlite3.Error, ValueError) as err:
+        logger.error(f"Reminders not queued for {director.initials}. {err}")
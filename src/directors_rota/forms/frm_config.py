@@ -8,11 +8,9 @@ from psiutils.utilities import geometry, window_resize
 from psiutils.widgets import clickable_widget, separator_frame
 
 from directors_rota import logger
-from directors_rota.config import read_config
+from directors_rota.config import CONFIG_PATH, read_config, update_config
 from directors_rota.constants import APP_TITLE, COL_MAXIMUM, TXT_FILE_TYPES
-from directors_rota.text import Text
-
-txt = Text()
+from directors_rota.text import txt
 
 FRAME_TITLE = "System defaults"
 
@@ -309,9 +307,12 @@ class ConfigFrame:
 
         logger.info("Config saved", changes=changes)
 
-        for field in FIELDS:
-            self.config.config[field] = getattr(self, field).get()
-        return self.config.save()
+        values = {field: getattr(self, field).get() for field in FIELDS}
+        saved_config = update_config(values)
+        if not saved_config:
+            return f"Config file {CONFIG_PATH} could not be saved"
+        self.config = saved_config
+        return self.config.STATUS_OK
 
     def _config_changes(self) -> dict:
         stored = self.config.config
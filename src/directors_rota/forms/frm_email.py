@@ -2,13 +2,16 @@ import tkinter as tk
 from tkinter import messagebox, ttk
 
 import clipboard
-from psiutils.buttons import ButtonFrame
+from psiutils.buttons import ButtonFrame, IconButton
 from psiutils.constants import PAD, Status
 from psiutils.utilities import geometry, window_resize
-from psiutils.widgets import WaitCursor
 
 from directors_rota.config import read_config
-from directors_rota.emails import send_emails
+from directors_rota.emails import dispatch_emails, email_configured
+from directors_rota.outbox import outbox_sender, spool_emails
+from directors_rota.progress import Progress, run_in_background
+
+POLL_MS = 100
 
 
 class EmailFrame:
@@ -16,12 +19,17 @@ class EmailFrame:
         self.root = tk.Toplevel(parent.root)
         self.parent = parent
         self.directors = parent.directors
+        self.month = parent.month
         self.config = read_config()
         self.email_text = None
+        self.progress = None
+        self.task = None
+        self.closing = False
 
         # tk variables
         self.email = tk.StringVar(value=parent.email)
         self.send_emails = tk.BooleanVar(value=self.config.send_emails)
+        self.status = tk.StringVar(value="")
 
         self.show()
 
@@ -61,6 +69,16 @@ class EmailFrame:
         )
         check_button.grid(row=1, column=0, sticky=tk.W)
 
+        self.progress_bar = ttk.Progressbar(frame, mode="determinate")
+        self.progress_bar.grid(row=2, column=0, sticky=tk.EW)
+        self.cancel_button = IconButton(
+            frame, "Cancel", "cancel", self._cancel
+        )
+        self.cancel_button.grid(row=2, column=1, padx=PAD)
+        self.cancel_button.disable()
+        label = ttk.Label(frame, textvariable=self.status)
+        label.grid(row=3, column=0, sticky=tk.W)
+
         buttons = self._button_frame(frame)
         buttons.grid(row=9, column=0, columnspan=9, sticky=tk.EW, pady=PAD)
 
@@ -68,34 +86,99 @@ class EmailFrame:
 
     def _button_frame(self, master: tk.Frame) -> tk.Frame:
         frame = ButtonFrame(master, tk.HORIZONTAL)
+        self.send_button = frame.icon_button("send", self._send_emails, True)
         buttons = [
-            frame.icon_button("send", self._send_emails, True),
+            self.send_button,
             frame.icon_button("exit", self._dismiss),
         ]
         frame.buttons = buttons
         return frame
 
-    def _send_emails(self) -> None:
+    def _send_emails(self, *args) -> None:
+        if self.task:
+            return
         text = self.email_text.get("1.0", "end")
         clipboard.copy(text)
         if not self.send_emails.get():
             return
-        with WaitCursor(self.root):
-            response = send_emails(text, self.directors)
-        if response == Status.WARNING:
+        if not email_configured():
             messagebox.showwarning(
                 "Emails",
                 "Emails not sent.  Invalid email configuration.",
                 parent=self.root,
             )
             return
-        if response != Status.SUCCESS:
+        if self.config.use_outbox:
+            count = spool_emails(text, self.directors, month=self.month)
+            outbox_sender().notify()
+            messagebox.showinfo(
+                "Emails", f"{count} emails queued to send.", parent=self.root)
+            self._dismiss()
+            return
+        self.progress = Progress()
+        self.task = run_in_background(
+            dispatch_emails,
+            text,
+            self.directors,
+            progress=self.progress,
+            month=self.month,
+        )
+        self.send_button.disable()
+        self.cancel_button.enable()
+        self.root.after(POLL_MS, self._poll_send)
+
+    def _poll_send(self) -> None:
+        """Show the emails sent, and the report once they all have been."""
+        self.status.set(self.progress.text())
+        fraction = self.progress.fraction()
+        self.progress_bar.configure(value=(fraction or 0) * 100)
+        if not self.task.done():
+            self.root.after(POLL_MS, self._poll_send)
+            return
+
+        task = self.task
+        self.task = None
+        if self.closing:
+            self.root.destroy()
+            return
+        self.send_button.enable()
+        self.cancel_button.disable()
+        try:
+            report = task.result()
+        except Exception as err:
             messagebox.showerror(
-                "Emails", "Emails not sent.", parent=self.root
+                "Emails", f"Emails not sent. {err}", parent=self.root)
+            return
+        if self.progress.cancelled.is_set():
+            messagebox.showwarning(
+                "Emails",
+                f"Cancelled. {len(report.sent)} emails sent.",
+                parent=self.root,
+            )
+            return
+        if report.status != Status.SUCCESS:
+            failures = "\n".join(
+                f"{result.email}: {result.error}" for result in report.failed
+            )
+            messagebox.showerror(
+                "Emails",
+                f"{len(report.sent)} emails sent.  Emails not sent to:"
+                f"\n{failures}",
+                parent=self.root,
             )
             return
         messagebox.showinfo("Emails", "Emails sent.", parent=self.root)
         self._dismiss()
 
+    def _cancel(self, *args) -> None:
+        if self.progress:
+            self.progress.cancel()
+
     def _dismiss(self, event: object = None):
+        if self.task:
+            # Cancel the emails still to send; the window closes when the
+            # ones in flight have gone
+            self.progress.cancel()
+            self.closing = True
+            return
         self.root.destroy()
@@ -10,17 +10,28 @@ from psiutils.buttons import ButtonFrame, IconButton
 from psiutils.constants import LARGE_FONT, PAD
 from psiutils.utilities import geometry, window_resize
 
-from directors_rota.config import config, read_config
-from directors_rota.constants import DOWNLOADS_DIR, MMYYYY, XLS_FILE_TYPES
+from directors_rota.changes import (
+    change_emails,
+    pending_changes,
+    record_changes,
+    save_changes,
+    send_changes,
+)
+from directors_rota.config import read_config, update_config
+from directors_rota.constants import MMYYYY, XLS_FILE_TYPES, downloads_dir
+from directors_rota.emails import email_configured
 from directors_rota.forms.frm_email import EmailFrame
 from directors_rota.main_menu import MainMenu
-from directors_rota.process import generate_rota
-from directors_rota.text import Text
-
-txt = Text()
+from directors_rota.outbox import finish_outbox
+from directors_rota.process import generate_rota_range, preload_workbook
+from directors_rota.progress import CancelledError, Progress, run_in_background
+from directors_rota.text import txt
+from directors_rota.watcher import WorkbookWatcher
 
 # pylint: disable=no-member)
 FRAME_TITLE = f"{txt.DIRECTORS} Rota"
+MONTHS_MAXIMUM = 12
+POLL_MS = 100
 
 
 class MainFrame:
@@ -29,19 +40,29 @@ class MainFrame:
         self.root = root
         self.directors = []
         self.email = ""
+        self.month = None
         self.config = read_config()
+        self.progress = None
+        self.task = None
+        self.closing = None
+        self.watcher = None
 
         # Tk Vars
-        workbook_path = Path(config.workbook_dir, config.workbook_file_name)
+        workbook_path = Path(
+            self.config.workbook_dir, self.config.workbook_file_name
+        )
         self.workbook_path = tk.StringVar(value=workbook_path)
-        self.email_template = tk.StringVar(value=config.email_template)
+        self.email_template = tk.StringVar(value=self.config.email_template)
         self.rota_month = tk.StringVar(value="")
+        self.month_count = tk.IntVar(value=1)
+        self.status = tk.StringVar(value="")
 
         self._show()
 
         self.period_starts = self._get_period_starts()
         self.selected_month = datetime.datetime(1, 1, 1)
         self._set_file_message()
+        self._watch_workbook()
 
     def _show(self) -> None:
         root = self.root
@@ -50,6 +71,7 @@ class MainFrame:
 
         root.rowconfigure(0, weight=1)
         root.columnconfigure(0, weight=1)
+        root.protocol("WM_DELETE_WINDOW", self._dismiss)
         root.bind("<Control-q>", self._dismiss)
         root.bind("<Control-g>", self._generate_rota)
         root.bind(
@@ -72,6 +94,9 @@ class MainFrame:
         main_frame = self._main_frame(frame)
         main_frame.grid(row=1, column=0, sticky=tk.NSEW, padx=PAD, pady=PAD)
 
+        progress_frame = self._progress_frame(frame)
+        progress_frame.grid(row=2, column=0, sticky=tk.EW, padx=PAD)
+
         self.button_frame = self._button_frame(frame)
         self.button_frame.grid(row=3, column=0, sticky=tk.EW, padx=PAD)
 
@@ -100,6 +125,20 @@ class MainFrame:
         button = IconButton(frame, txt.NEXT, "next", self._next_month)
         button.grid(row=row, column=2, sticky=tk.W, padx=PAD)
 
+        row += 1
+        label = ttk.Label(frame, text="Number of months")
+        label.grid(row=row, column=0, sticky=tk.E)
+
+        spinbox = ttk.Spinbox(
+            frame,
+            width=2,
+            from_=1,
+            to=MONTHS_MAXIMUM,
+            increment=1,
+            textvariable=self.month_count,
+        )
+        spinbox.grid(row=row, column=1, sticky=tk.W, padx=PAD, pady=PAD)
+
         # Workbook
         row += 1
         label = ttk.Label(frame, text="Director's rota workbook")
@@ -116,13 +155,35 @@ class MainFrame:
 
         return frame
 
+    def _progress_frame(self, master: tk.Frame) -> tk.Frame:
+        frame = ttk.Frame(master)
+        frame.columnconfigure(1, weight=1)
+
+        label = ttk.Label(frame, textvariable=self.status)
+        label.grid(row=0, column=0, sticky=tk.W, padx=PAD)
+
+        self.progress_bar = ttk.Progressbar(frame, mode="determinate")
+        self.progress_bar.grid(row=0, column=1, sticky=tk.EW, padx=PAD)
+
+        self.cancel_button = IconButton(
+            frame, "Cancel", "cancel", self._cancel
+        )
+        self.cancel_button.grid(row=0, column=2, padx=PAD)
+        self.cancel_button.disable()
+        return frame
+
     def _button_frame(self, master: tk.Frame) -> tk.Frame:
         frame = ButtonFrame(master, tk.HORIZONTAL)
         delete = IconButton(
             frame, "Delete workbook", "delete", self._delete_workbook
         )
+        changes = IconButton(
+            frame, "Send changes", "send", self._find_changes
+        )
+        changes.dimmable = True
         frame.buttons = [
             frame.icon_button("build", self._generate_rota, True),
+            changes,
             delete,
             frame.icon_button("close", self._dismiss),
         ]
@@ -153,7 +214,9 @@ class MainFrame:
         self.rota_month.set((self.selected_month).strftime(MMYYYY))
 
     def _generate_rota(self, *args) -> None:
-        """Show process screen."""
+        """Create the rota on a worker thread."""
+        if self.task:
+            return
         if not Path(self.workbook_path.get()).is_file():
             messagebox.showerror(
                 "",
@@ -162,20 +225,164 @@ class MainFrame:
             return
 
         selected_month = date_parse(f"1 {self.rota_month.get()}").date()
-        response = generate_rota(selected_month)
+        end_month = selected_month + relativedelta(
+            months=self.month_count.get() - 1
+        )
+        self.progress = Progress()
+        self.task = run_in_background(
+            generate_rota_range, selected_month, end_month, self.progress
+        )
+        self.button_frame.enable(False)
+        self.cancel_button.enable()
+        self.root.after(POLL_MS, self._poll_generate)
+
+    def _poll_generate(self) -> None:
+        """Show the progress, and the rota once the worker has finished."""
+        self._show_progress()
+        if not self.task.done():
+            self.root.after(POLL_MS, self._poll_generate)
+            return
+
+        task = self.task
+        self.task = None
+        self.button_frame.enable()
+        self.cancel_button.disable()
+        try:
+            response = task.result()
+        except CancelledError:
+            self.status.set("Cancelled")
+            return
+        except Exception as err:
+            self.status.set("")
+            messagebox.showerror("", f"Rota not created: {err}")
+            return
+        self.status.set("")
+        self._show_rota(response)
+
+    def _find_changes(self, *args) -> None:
+        """Find the changes to the workbook on a worker thread."""
+        if self.task:
+            return
+        self.progress = Progress()
+        self.task = run_in_background(
+            pending_changes, progress=self.progress
+        )
+        self.button_frame.enable(False)
+        self.cancel_button.enable()
+        self.root.after(POLL_MS, self._poll_changes)
+
+    def _poll_changes(self) -> None:
+        """Offer to email the directors affected by the changes found."""
+        (finished, change_set) = self._task_result(self._poll_changes)
+        if not finished:
+            return
+        if not change_set:
+            messagebox.showerror("", "Workbook not read")
+            return
+        if change_set.first_run:
+            save_changes(change_set)
+            messagebox.showinfo(
+                "Changes", "Rota recorded: changes are found from now on"
+            )
+            return
+        bodies = change_emails(change_set)
+        if not bodies:
+            record_changes(change_set)
+            messagebox.showinfo("Changes", "No changes to send")
+            return
+        lines = [
+            f"{change.date:%d/%m/%y} {change.session}: "
+            f"{change.old or '-'} -> {change.new or '-'}"
+            for change in change_set.changes
+        ]
+        if not messagebox.askyesno(
+            "Changes",
+            "\n".join(lines) + f"\n\nEmail {len(bodies)} directors?",
+        ):
+            return
+        if not email_configured():
+            messagebox.showwarning(
+                "Emails", "Emails not sent.  Invalid email configuration."
+            )
+            return
+        self.progress = Progress()
+        self.progress.start("Sending changes")
+        self.task = run_in_background(send_changes, change_set)
+        self.button_frame.enable(False)
+        self.root.after(POLL_MS, self._poll_send_changes)
+
+    def _poll_send_changes(self) -> None:
+        (finished, report) = self._task_result(self._poll_send_changes)
+        if not finished:
+            return
+        if report.failed:
+            messagebox.showerror(
+                "Emails",
+                "Change emails not sent to: "
+                + ", ".join(result.email for result in report.failed),
+            )
+            return
+        messagebox.showinfo(
+            "Emails", f"{len(report.sent)} change emails sent."
+        )
+
+    def _task_result(self, poll: object) -> tuple[bool, object]:
+        """Return whether the task finished without error, and its result.
+
+        If it is still running, poll is called again later.
+        """
+        self._show_progress()
+        if not self.task.done():
+            self.root.after(POLL_MS, poll)
+            return (False, None)
+        task = self.task
+        self.task = None
+        self.button_frame.enable()
+        self.cancel_button.disable()
+        self.status.set("")
+        try:
+            return (True, task.result())
+        except CancelledError:
+            self.status.set("Cancelled")
+        except Exception as err:
+            messagebox.showerror("", f"{err}")
+        return (False, None)
+
+    def _show_progress(self) -> None:
+        self.status.set(self.progress.text())
+        fraction = self.progress.fraction()
+        if fraction is None:
+            self.progress_bar.configure(mode="indeterminate")
+            self.progress_bar.step(5)
+        else:
+            self.progress_bar.configure(
+                mode="determinate", value=fraction * 100
+            )
+
+    def _cancel(self, *args) -> None:
+        if self.progress:
+            self.progress.cancel()
+
+    def _show_rota(self, response: tuple | None) -> None:
         if not response:
             messagebox.showerror("", "Rota not created")
             return
-        (self.email, self.directors) = response
-        dlg = EmailFrame(self)
-        self.root.wait_window(dlg.root)
-        self.root.destroy()
+        (rota_emails, directors, diagnostics) = response
+        if diagnostics.issues:
+            messagebox.showwarning("Rota diagnostics", diagnostics.report())
+        for month, email in rota_emails:
+            self.month = month
+            self.email = email
+            self.directors = directors.for_month(month)
+            dlg = EmailFrame(self)
+            self.root.wait_window(dlg.root)
+        self._dismiss()
 
     def _get_workbook_path(self) -> None:
         """Set the workbook path"""
         initialdir = str(Path(self.workbook_path.get()).parent)
         if initialdir == ".":
-            initialdir = DOWNLOADS_DIR
+            initialdir = downloads_dir()
         workbook_file_name = filedialog.askopenfilename(
             title="Workbook",
             initialdir=initialdir,
@@ -183,17 +390,40 @@ class MainFrame:
             filetypes=XLS_FILE_TYPES,
         )
 
-        if workbook_file_name:
-            self.workbook_path.set(workbook_file_name)
-            config.workbook_file_name = workbook_file_name
+        if not workbook_file_name:
+            return
+        path = Path(workbook_file_name)
+        config = update_config(
+            {"workbook_dir": str(path.parent), "workbook_file_name": path.name}
+        )
+        if config is None:
+            messagebox.showerror("", "Workbook path not saved")
+            return
+        self.config = config
+        self.workbook_path.set(workbook_file_name)
 
     def _on_workbook_path_change(self, *args) -> None:
         self._set_file_message()
+        self._watch_workbook()
+
+    def _watch_workbook(self) -> None:
+        """Keep the workbook read and indexed in memory while it changes."""
+        if not (self.config.watch_workbook and self.config.workbook_cache):
+            return
+        path = Path(self.config.workbook_dir, self.config.workbook_file_name)
+        if self.watcher and self.watcher.path == path:
+            return
+        if self.watcher:
+            self.watcher.stop(timeout=0)
+        self.watcher = WorkbookWatcher(
+            path, lambda path: preload_workbook()
+        )
+        self.watcher.start()
 
     def _set_file_message(self) -> None:
         # pylint: disable=no-member)
         message = ""
-        email_template = os.path.isfile(config.email_template)
+        email_template = os.path.isfile(self.config.email_template)
         directors_rota = os.path.isfile(self.workbook_path.get())
 
         config_text = "Click on Menu > Defaults to define."
@@ -218,4 +448,34 @@ class MainFrame:
             print(f"File {path} does not exist")
 
     def _dismiss(self, *args) -> None:
+        """Send the emails queued in the outbox, then close the app.
+
+        The outbox is drained on a worker thread; Cancel stops it.
+        """
+        if self.closing:
+            return
+        if self.watcher:
+            self.watcher.stop(timeout=0)
+        self._cancel()
+        self.progress = Progress()
+        self.progress.start("Sending queued emails")
+        self.closing = run_in_background(
+            finish_outbox, stop=self.progress.cancelled
+        )
+        self.button_frame.enable(False)
+        self.cancel_button.enable()
+        self.root.after(POLL_MS, self._poll_dismiss)
+
+    def _poll_dismiss(self) -> None:
+        self._show_progress()
+        if not self.closing.done():
+            self.root.after(POLL_MS, self._poll_dismiss)
+            return
+        waiting = self.closing.result()
+        if waiting:
+            messagebox.showwarning(
+                "Emails",
+                f"{waiting} emails still queued. They will be sent by "
+                f"\"directors-rota send-outbox\".",
+            )
         self.root.destroy()
@@ -1,13 +1,21 @@
 """Create Output a director's rota for Phoenix Bridge Club."""
 
+import argparse
+
 from directors_rota.root import Root
+from directors_rota.timing import (
+    add_profile_argument, profile_path, profiled)
 
 from psiutils.icecream_init import ic_init
-ic_init()
 
 
 def main() -> None:
-    Root()
+    parser = argparse.ArgumentParser(prog="directors-rota-gui")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    ic_init()
+    with profiled(profile_path(args)):
+        Root()
 
 
 if __name__ == '__main__':
@@ -7,18 +7,15 @@ from psiutils.utilities import create_directories
 from psiutils.menus import Menu, MenuItem
 
 from directors_rota.constants import (
-    APP_TITLE, DOWNLOADS_DIR, EMAIL_TEMPLATE, TXT_FILE_TYPES, AUTHOR)
+    APP_TITLE, EMAIL_TEMPLATE, TXT_FILE_TYPES, AUTHOR, downloads_dir)
 from directors_rota._version import __version__
 from directors_rota.config import read_config
-from directors_rota.text import Text
+from directors_rota.text import txt
 
 from directors_rota.forms.frm_config import ConfigFrame
 
-txt = Text()
-
 SPACES = ' '*20
 
-config = read_config()
 
 class MainMenu():
     def __init__(self, parent, root):
@@ -59,12 +56,12 @@ class MainMenu():
         # pylint: disable=no-member)
         template_path = filedialog.askopenfilename(
             title='Copy email template',
-            initialdir=DOWNLOADS_DIR,
+            initialdir=downloads_dir(),
             initialfile=str(EMAIL_TEMPLATE),
             filetypes=TXT_FILE_TYPES
         )
         if template_path:
-            target_path = config.email_template
+            target_path = read_config().email_template
             create_directories(Path(target_path).parent)
             shutil.copyfile(
                 template_path,
@@ -82,7 +79,7 @@ class MainMenu():
     def _show_data_directory(self) -> None:
         # pylint: disable=no-member)
         data_dir = (f'Data directory: '
-                    f'{Path(config.email_template).parent} {SPACES}')
+                    f'{Path(read_config().email_template).parent} {SPACES}')
         messagebox.showinfo(title='Data directory', message=data_dir)
 
     def show_about(self):
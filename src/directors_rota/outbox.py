@@ -0,0 +1,380 @@
+"""Outbox: a Maildir spool of built emails, drained by a background sender.
+
+Spooling writes each message to the Maildir's tmp/ directory and moves
+it into new/ in one rename, so a crash never leaves half a message in the
+outbox. A message is removed only after the SMTP server has accepted it,
+so a crash partway through a send means it is sent again on the next
+drain: delivery is at least once.
+
+Messages the server refuses outright are moved to the outbox's "failed"
+folder; on a connection or login error the rest are left for the next
+drain.
+
+One drain at a time holds the outbox's lock file, so the app's background
+sender and "directors-rota send-outbox" run from cron never send the same
+message twice. The app drains the outbox before it exits, for a while;
+whatever is still queued is sent by the next send-outbox.
+"""
+
+import datetime
+import mailbox
+import smtplib
+import sys
+import threading
+import time
+from pathlib import Path
+from smtplib import (
+    SMTPAuthenticationError,
+    SMTPDataError,
+    SMTPException,
+    SMTPRecipientsRefused,
+    SMTPSenderRefused,
+)
+
+from psiutils.constants import Status
+
+from directors_rota import logger
+from directors_rota.config import read_config
+from directors_rota.constants import DATA_DIR
+from directors_rota.emails import (
+    RateLimiter,
+    SendReport,
+    SendResult,
+    SmtpSession,
+    build_message,
+    create_reminder,
+    director_values,
+)
+from directors_rota.process import DirectorRegistry
+from directors_rota.rota_store import record_sent
+from directors_rota.template import compile_template
+
+if sys.platform == 'win32':
+    import msvcrt
+else:
+    import fcntl
+
+OUTBOX_DIR = Path(DATA_DIR, 'outbox')
+LOCK_FILE_NAME = 'drain.lock'
+INITIALS_HEADER = 'X-Rota-Initials'
+MONTH_HEADER = 'X-Rota-Month'
+POLL_SECONDS = 60
+FINISH_SECONDS = 30
+JOIN_SECONDS = 2
+
+# The server will not take these messages however often they are sent
+REFUSED = (SMTPRecipientsRefused, SMTPSenderRefused, SMTPDataError)
+
+
+class Outbox:
+    """The spool of emails waiting to be sent."""
+    def __init__(self, path: Path = OUTBOX_DIR) -> None:
+        self.path = Path(path)
+        self.maildir = mailbox.Maildir(self.path, create=True)
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.maildir)
+
+    def __repr__(self) -> str:
+        return f'Outbox {self.path} ({len(self)} messages)'
+
+    def add(self, message: object) -> str:
+        """Spool the message and return its key."""
+        with self.lock:
+            return self.maildir.add(message)
+
+    def keys(self) -> list[str]:
+        """Return the keys of the waiting messages, oldest first."""
+        with self.lock:
+            return sorted(self.maildir.keys())
+
+    def get(self, key: str) -> mailbox.MaildirMessage | None:
+        with self.lock:
+            try:
+                return self.maildir[key]
+            except KeyError:
+                return None
+
+    def remove(self, key: str) -> None:
+        with self.lock:
+            self.maildir.discard(key)
+
+    def fail(self, key: str) -> None:
+        """Move the message to the failed folder."""
+        with self.lock:
+            message = self.maildir.get(key)
+            if message is None:
+                return
+            if 'failed' not in self.maildir.list_folders():
+                self.maildir.add_folder('failed')
+            self.maildir.get_folder('failed').add(message)
+            self.maildir.discard(key)
+
+    def failed(self) -> int:
+        """Return the number of messages in the failed folder."""
+        with self.lock:
+            if 'failed' not in self.maildir.list_folders():
+                return 0
+            return len(self.maildir.get_folder('failed'))
+
+    def drain(
+            self,
+            smtp_class: type = smtplib.SMTP_SSL,
+            rate_limit: float = -1,
+            stop: threading.Event | None = None) -> SendReport:
+        """Send the waiting messages over one SMTP session.
+
+        Sending stops early if stop is set or the connection fails; the
+        messages not sent are left in the outbox. Nothing is sent if
+        another drain, in this process or another, holds the outbox's
+        lock. The outcome for each message spooled with its rota month is
+        added to the history of emails sent.
+        """
+        if rate_limit < 0:
+            rate_limit = read_config().email_rate_limit
+        limiter = RateLimiter(rate_limit)
+        report = SendReport()
+        months = {}
+        lock = DrainLock(Path(self.path, LOCK_FILE_NAME))
+        if not lock.acquire():
+            logger.info(f"Outbox {self.path} is being drained elsewhere")
+            return report
+        try:
+            self._drain(smtp_class, limiter, report, months, stop)
+        finally:
+            lock.release()
+        for month, results in months.items():
+            if month:
+                record_sent(
+                    datetime.datetime.strptime(month, '%Y-%m'), results)
+        if report.results:
+            logger.info('Outbox drained',
+                        sent=len(report.sent),
+                        failed=[result.email for result in report.failed],
+                        waiting=len(self))
+        return report
+
+    def _drain(
+            self,
+            smtp_class: type,
+            limiter: RateLimiter,
+            report: SendReport,
+            months: dict,
+            stop: threading.Event | None) -> None:
+        with SmtpSession(smtp_class) as session:
+            for key in self.keys():
+                if stop and stop.is_set():
+                    break
+                message = self.get(key)
+                if message is None:
+                    continue
+                limiter.wait()
+                (result, retry) = self._send(session, key, message)
+                report.results.append(result)
+                months.setdefault(message[MONTH_HEADER], []).append(result)
+                if retry:
+                    break
+
+    def _send(
+            self,
+            session: SmtpSession,
+            key: str,
+            message: mailbox.MaildirMessage) -> tuple[SendResult, bool]:
+        """Send the message; return the result and whether to retry later."""
+        recipient = message['To']
+        start = time.perf_counter()
+        error = ''
+        retry = False
+        try:
+            session.send(message['From'], recipient, message.as_string())
+        except REFUSED as err:
+            error = str(err) or type(err).__name__
+            self.fail(key)
+        except SMTPAuthenticationError:
+            error = 'Email authentication error.'
+            retry = True
+        except (SMTPException, OSError) as err:
+            error = str(err) or type(err).__name__
+            retry = True
+            session.close()
+        else:
+            self.remove(key)
+            logger.info(f"Email sent to {recipient}")
+        latency = time.perf_counter() - start
+
+        status = Status.SUCCESS
+        if error:
+            logger.error(f"Email to {recipient} failed. {error}")
+            status = Status.ERROR
+        result = SendResult(
+            message[INITIALS_HEADER], recipient, status, latency, error)
+        return (result, retry)
+
+
+class DrainLock:
+    """An exclusive lock on a file, between threads and processes."""
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.file = None
+
+    def acquire(self) -> bool:
+        """Take the lock if it is free; return False if it is held."""
+        self.file = open(self.path, 'a+b')
+        try:
+            if sys.platform == 'win32':
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self.file.close()
+            self.file = None
+            return False
+        return True
+
+    def release(self) -> None:
+        if not self.file:
+            return
+        if sys.platform == 'win32':
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        self.file.close()
+        self.file = None
+
+
+class OutboxSender:
+    """A daemon thread that drains the outbox when woken or every poll."""
+    def __init__(
+            self,
+            outbox: Outbox,
+            smtp_class: type = smtplib.SMTP_SSL,
+            poll: float = POLL_SECONDS) -> None:
+        self.outbox = outbox
+        self.smtp_class = smtp_class
+        self.poll = poll
+        self.wake = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = None
+        self.last_report = None
+
+    def start(self) -> None:
+        if self.thread and self.thread.is_alive():
+            return
+        self.stopping.clear()
+        self.thread = threading.Thread(
+            target=self._run, name='outbox-sender', daemon=True)
+        self.thread.start()
+
+    def notify(self) -> None:
+        """Drain the outbox now."""
+        self.wake.set()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop after the message being sent, if any."""
+        self.stopping.set()
+        self.wake.set()
+        if self.thread:
+            self.thread.join(timeout)
+
+    def finish(
+            self,
+            timeout: float = FINISH_SECONDS,
+            stop: threading.Event | None = None) -> int:
+        """Stop, then send what is waiting for up to timeout seconds.
+
+        The sender is a daemon thread, which dies with the program; call
+        this before exiting, off the Tk thread as it can take a while.
+        Sending stops early if stop is set. Return the number of messages
+        still queued.
+        """
+        self.stop(JOIN_SECONDS)
+        if stop is None:
+            stop = threading.Event()
+        timer = threading.Timer(timeout, stop.set)
+        timer.start()
+        try:
+            if len(self.outbox) and not stop.is_set():
+                self.last_report = self.outbox.drain(
+                    self.smtp_class, stop=stop)
+        except Exception as err:
+            logger.error(f"Outbox sender error: {err}")
+        finally:
+            timer.cancel()
+        waiting = len(self.outbox)
+        if waiting:
+            logger.warning(f"{waiting} emails still queued in the outbox")
+        return waiting
+
+    def _run(self) -> None:
+        while not self.stopping.is_set():
+            self.wake.clear()
+            if len(self.outbox):
+                try:
+                    self.last_report = self.outbox.drain(
+                        self.smtp_class, stop=self.stopping)
+                except Exception as err:
+                    logger.error(f"Outbox sender error: {err}")
+            self.wake.wait(self.poll)
+
+
+_sender = None
+_sender_lock = threading.Lock()
+
+
+def outbox_sender() -> OutboxSender:
+    """Return the running background sender for the outbox."""
+    global _sender
+    with _sender_lock:
+        if not _sender:
+            _sender = OutboxSender(Outbox())
+        _sender.start()
+    return _sender
+
+
+def finish_outbox(
+        timeout: float = FINISH_SECONDS,
+        stop: threading.Event | None = None) -> int:
+    """Drain the outbox before exit if the sender was started.
+
+    Return the number of messages still queued.
+    """
+    global _sender
+    with _sender_lock:
+        sender = _sender
+        _sender = None
+    if not sender:
+        return 0
+    return sender.finish(timeout, stop)
+
+
+def spool_emails(
+        text: str,
+        directors: DirectorRegistry,
+        outbox: Outbox | None = None,
+        month: datetime.date | None = None) -> int:
+    """Write the email for each active director to the outbox.
+
+    Return the number of emails spooled. The text is a template, as for
+    dispatch_emails; the month of the rota, if given, is recorded with
+    each message for the history of emails sent.
+    """
+    config = read_config()
+    if outbox is None:
+        outbox = Outbox()
+    template = compile_template(text)
+    for director in directors.active.values():
+        body = template.render(**director_values(director))
+        message = build_message(config.email_subject, body, director.email)
+        message[INITIALS_HEADER] = director.initials
+        if month:
+            message[MONTH_HEADER] = f'{month:%Y-%m}'
+        outbox.add(message)
+        if director.initials in directors.reminders:
+            create_reminder(config, director)
+    logger.info('Emails spooled',
+                count=len(directors.active), outbox=str(outbox.path))
+    return len(directors.active)
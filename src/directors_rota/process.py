@@ -2,24 +2,47 @@
 
 import asyncio
 import datetime
+import sqlite3
+import weakref
+from collections.abc import Mapping
 from dataclasses import dataclass
 from pathlib import Path
 from typing import NamedTuple
 
 from dateutil.relativedelta import relativedelta
-from workbooky import Workbook
 
 from directors_rota import logger
 from directors_rota.config import read_config
-from directors_rota.text import Text
+from directors_rota.date_index import DateIndex, DateRange
+from directors_rota.diagnostics import Diagnostics, cell_name
+from directors_rota.progress import Progress
+from directors_rota.rota_store import RotaStore, Snapshot, config_hash
+from directors_rota.template import load_template
+from directors_rota.text import txt
+from directors_rota.timing import span
+from directors_rota.workbook_cache import (
+    FileIdentity,
+    InvalidWorkbookError,
+    file_identity,
+    load_workbook,
+)
 
 status = {
     "OK": 0,
     "FILE_MISSING": 1,
     "SHEET_MISSING": 2,
+    "INVALID_WORKBOOK": 3,
 }
 
-txt = Text()
+
+SESSION_COLUMNS = {
+    "Monday": "mon_date_col",
+    "Wednesday": "wed_date_col",
+    "Thursday": "thurs_date_col",
+}
+
+# Date indexes of each main sheet, keyed on the sessions
+_date_indexes = weakref.WeakKeyDictionary()
 
 
 class DirectorData(NamedTuple):
@@ -32,15 +55,27 @@ class DirectorData(NamedTuple):
 
 
 class Director:
+    __slots__ = (
+        "initials",
+        "name",
+        "email",
+        "dates",
+        "_dollars",
+        "first_name",
+        "username",
+        "active",
+        "send_reminder",
+    )
+
     def __init__(self, data: DirectorData) -> None:
         self.initials = ""
         self.name = ""
         self.email = ""
         self.dates = []
         self._dollars = 0
-        self.first_name = self._get_first_name()
         self.username = ""
         self.active = False
+        self.send_reminder = False
 
         if data:
             self.initials = data.initials
@@ -49,12 +84,118 @@ class Director:
             self.username = data.username
             self.active = data.active
             self.send_reminder = data.send_reminder
+        self.first_name = self._get_first_name()
 
     def __repr__(self) -> str:
         return f"{self.initials} {self.name}"
 
     def _get_first_name(self) -> str:
-        return self.name.split(" ")[0]
+        return (self.name or "").split(" ")[0]
+
+
+class DuplicateKey(NamedTuple):
+    key: str
+    value: str
+    initials: str
+
+
+class DirectorRegistry(Mapping):
+    """Directors keyed on initials, with indexes on email and username.
+
+    The first director with a given initials, email or username is kept;
+    later ones are recorded in duplicates. The active directors and those
+    to be sent reminders are kept up to date as directors are added.
+    """
+
+    def __init__(self, directors: list[Director] = ()) -> None:
+        self._by_initials = {}
+        self.by_email = {}
+        self.by_username = {}
+        self.active = {}
+        self.reminders = {}
+        self.duplicates = []
+        for director in directors:
+            self.add(director)
+
+    def __getitem__(self, initials: str) -> Director:
+        return self._by_initials[initials]
+
+    def __iter__(self):
+        return iter(self._by_initials)
+
+    def __len__(self) -> int:
+        return len(self._by_initials)
+
+    def __repr__(self) -> str:
+        return f"DirectorRegistry ({len(self)} directors)"
+
+    def add(self, director: Director) -> bool:
+        """Add the director; return False if the initials are taken."""
+        if director.initials in self._by_initials:
+            self.duplicates.append(
+                DuplicateKey("initials", director.initials, director.initials)
+            )
+            return False
+        self._by_initials[director.initials] = director
+        self._index(self.by_email, "email", _email_key(director.email),
+                    director)
+        self._index(self.by_username, "username", director.username,
+                    director)
+        if director.initials and director.active:
+            self.active[director.initials] = director
+            if director.send_reminder:
+                self.reminders[director.initials] = director
+        return True
+
+    def _index(
+        self, index: dict, key: str, value: str, director: Director
+    ) -> None:
+        if not value:
+            return
+        if value in index:
+            self.duplicates.append(
+                DuplicateKey(key, value, director.initials)
+            )
+            return
+        index[value] = director
+
+    def for_month(self, month: datetime.datetime) -> "DirectorRegistry":
+        """Return a copy of the registry with only the month's dates.
+
+        After generate_rota_range each director holds the dates of every
+        month in the range; the email and reminders for one month must
+        use only that month's dates.
+        """
+        (start_date, end_date) = _date_limits(month)
+        registry = DirectorRegistry()
+        for director in self.values():
+            copy = Director(DirectorData(
+                director.initials,
+                director.name,
+                director.email,
+                director.username,
+                director.active,
+                director.send_reminder,
+            ))
+            copy.dates = [
+                rota_date for rota_date in director.dates
+                if start_date <= rota_date <= end_date
+            ]
+            registry.add(copy)
+        registry.duplicates = list(self.duplicates)
+        return registry
+
+    def with_email(self, email: str) -> Director | None:
+        """Return the director with the email address, or None."""
+        return self.by_email.get(_email_key(email))
+
+    def with_username(self, username: str) -> Director | None:
+        """Return the director with the username, or None."""
+        return self.by_username.get(username)
+
+
+def _email_key(email: str | None) -> str | None:
+    return email.strip().lower() if isinstance(email, str) else email
 
 
 @dataclass
@@ -67,70 +208,365 @@ class RotaData(NamedTuple):
     start_date: datetime
     end_date: datetime
     main_sheet: object
-    directors: dict[str, Director]
+    directors: DirectorRegistry
+    diagnostics: Diagnostics | None = None
 
 
-def generate_rota(month: datetime) -> tuple | None:
-    """Return the rota adn directors as a tuple."""
-    # pylint: disable=no-member)
+def generate_rota(month: datetime, config: object = None) -> tuple | None:
+    """Return the rota, directors and diagnostics as a tuple.
+
+    The shared config is used unless another is given.
+    """
+    config = config or read_config()
+    response = _generate_months(
+        config, [month], _date_range(month, config))
+    if not response:
+        return
+    (rota_emails, directors, diagnostics) = response
+    return (rota_emails[0][1], directors.for_month(month), diagnostics)
+
+
+def generate_rota_range(
+    start_month: datetime,
+    end_month: datetime,
+    progress: Progress | None = None,
+) -> tuple | None:
+    """Return a list of (month, rota email), the directors and diagnostics.
+
+    The workbook is opened and the directors read once for all the months
+    from start_month to end_month inclusive; the diagnostics cover all the
+    months, and each director holds the dates of all of them (use
+    directors.for_month for one month's email). Progress is reported to
+    progress, and CancelledError is raised if it is cancelled.
+    """
+    return _generate_months(
+        read_config(), _months(start_month, end_month), progress=progress)
+
+
+def preload_workbook(progress: Progress | None = None) -> bool:
+    """Read and index the workbook so the next rota is made from memory.
+
+    Return False if the workbook could not be read.
+    """
     config = read_config()
+    sources = get_rota_sources(config, progress=progress)
+    if not sources:
+        return False
+    (main_sheet, _) = sources
+    _index_sheet(main_sheet, session_columns(config))
+    return True
+
+
+def _generate_months(
+    config: dict,
+    months: list[datetime.datetime],
+    date_range: DateRange | None = None,
+    progress: Progress | None = None,
+) -> tuple | None:
+    """Return a list of (month, rota email), the directors and diagnostics.
+
+    If the store has every month for the workbook and config as they are
+    now, the rotas are served from it without reading the workbook;
+    otherwise they are generated and stored. With a date_range only those
+    rows are read, else the main sheet is indexed for all the months.
+    """
+    progress = progress or Progress()
+    identity = _workbook_identity(config)
+    store_key = _store_key(config, identity)
+    stored = _stored_rotas(config, months, store_key)
+    if stored:
+        return stored
+
+    progress.start("Reading workbook")
+    sources = get_rota_sources(config, date_range, progress, identity)
+    if not sources:
+        return
+    (main_sheet, directors) = sources
+    if not date_range:
+        _index_sheet(main_sheet, session_columns(config))
+    progress.start("Creating rota", len(months))
+    diagnostics = Diagnostics(config.main_sheet)
+    rota_emails = []
+    snapshots = []
+    for month in months:
+        progress.check()
+        (issues, rows) = (len(diagnostics.issues), diagnostics.rows)
+        (rota_email, day_rotas) = _get_month_rota(
+            month, config, main_sheet, directors, diagnostics)
+        rota_emails.append((month, rota_email))
+        if store_key and rota_email is not None:
+            snapshots.append(Snapshot(
+                month,
+                *store_key,
+                rota_email,
+                [(day_rota.day, day_rota.day_rota) for day_rota in day_rotas],
+                _director_records(directors, month),
+                diagnostics.issues[issues:],
+                diagnostics.rows - rows,
+            ))
+        progress.advance()
+    diagnostics.emit()
+    _save_snapshots(snapshots)
+    return (rota_emails, directors, diagnostics)
+
+
+def _workbook_identity(config: dict) -> FileIdentity | None:
+    """Return the workbook's identity if the cache or store will use it.
+
+    It is taken once per run, as hashing the workbook is not free. None
+    if neither is on or the workbook cannot be read.
+    """
+    if not (config.rota_store or config.workbook_cache):
+        return None
     path = Path(config.workbook_dir, config.workbook_file_name)
-    workbook = _get_workbook(path)
+    try:
+        return file_identity(path)
+    except OSError:
+        return None
+
+
+def _store_key(
+    config: dict, identity: FileIdentity | None
+) -> tuple[str, str] | None:
+    """Return the (workbook hash, config hash) of the snapshots, or None.
+
+    None if the store is off or the workbook cannot be read.
+    """
+    if not config.rota_store or not identity:
+        return None
+    return (identity.digest, config_hash(config))
+
+
+def _stored_rotas(
+    config: dict,
+    months: list[datetime.datetime],
+    store_key: tuple[str, str] | None,
+) -> tuple | None:
+    """Return the months' rotas as generated, if all are in the store."""
+    if not store_key or not months:
+        return None
+    try:
+        store = RotaStore()
+        try:
+            snapshots = [store.get(month, *store_key) for month in months]
+        finally:
+            store.close()
+    except (OSError, sqlite3.Error) as err:
+        logger.warning(f"Rota store not read. {err}")
+        return None
+    if not all(snapshots):
+        return None
+
+    directors = DirectorRegistry()
+    diagnostics = Diagnostics(config.main_sheet)
+    for snapshot in snapshots:
+        for record in snapshot.directors:
+            if record["initials"] not in directors:
+                directors.add(_stored_director(record))
+            directors[record["initials"]].dates.extend(record["dates"])
+        diagnostics.issues.extend(snapshot.issues)
+        diagnostics.rows += snapshot.row_count
+    logger.info("Rota served from store", months=len(months))
+    diagnostics.emit()
+    rota_emails = [
+        (month, snapshot.email)
+        for month, snapshot in zip(months, snapshots, strict=True)
+    ]
+    return (rota_emails, directors, diagnostics)
+
+
+def _save_snapshots(snapshots: list[Snapshot]) -> None:
+    if not snapshots:
+        return
+    try:
+        store = RotaStore()
+        try:
+            for snapshot in snapshots:
+                store.save(snapshot)
+        finally:
+            store.close()
+    except (OSError, sqlite3.Error) as err:
+        logger.warning(f"Rota not stored. {err}")
+
+
+def _director_records(
+    directors: DirectorRegistry, month: datetime.datetime
+) -> list[dict]:
+    """Return the directors, with their dates in the month, as dicts."""
+    return [
+        {
+            "initials": director.initials,
+            "name": director.name,
+            "email": director.email,
+            "username": director.username,
+            "active": director.active,
+            "send_reminder": director.send_reminder,
+            "dates": director.dates,
+        }
+        for director in directors.for_month(month).values()
+    ]
+
+
+def _stored_director(record: dict) -> Director:
+    return Director(DirectorData(
+        record["initials"],
+        record["name"],
+        record["email"],
+        record["username"],
+        record["active"],
+        record["send_reminder"],
+    ))
+
+
+def get_rota_sources(
+    config: dict,
+    date_range: DateRange | None = None,
+    progress: Progress | None = None,
+    identity: FileIdentity | None = None,
+) -> tuple | None:
+    """Return the main sheet and the directors as a tuple.
+
+    If the workbook cache is off and a date_range is given, only the
+    main sheet rows in the range are read. identity, if given, is the
+    workbook's file identity, already taken.
+    """
+    # pylint: disable=no-member)
+    path = Path(config.workbook_dir, config.workbook_file_name)
+    where = None
+    if date_range and not config.workbook_cache:
+        where = {config.main_sheet: date_range}
+    workbook = _get_workbook(
+        path, _sheet_columns(config), config.workbook_cache, where, progress,
+        identity)
     if workbook == status["FILE_MISSING"]:
         logger.error(f"Workbook not found at {path}")
         return
-
-    main_sheet = asyncio.run(_get_sheet(workbook, config.main_sheet))
-    if main_sheet == status["SHEET_MISSING"]:
-        logger.error(f"Sheet '{config.main_sheet}' missing in Workbook")
+    if workbook == status["INVALID_WORKBOOK"]:
+        logger.error(f"Workbook at {path} is not a valid excel file")
         return
 
-    directors_sheet = asyncio.run(_get_sheet(workbook, config.directors_sheet))
-    if directors_sheet == status["SHEET_MISSING"]:
-        logger.error(f"Sheet '{config.directors_sheet}' missing in Workbook")
+    (sheets, errors) = _get_sheets(
+        workbook, [config.main_sheet, config.directors_sheet])
+    for error in errors.values():
+        logger.error(error)
+    if errors:
         return
 
-    directors = get_directors(config, directors_sheet)
-    rota_email = _get_rota(month, config, main_sheet, directors)
-    return (rota_email, directors)
+    directors = get_directors(config, sheets[config.directors_sheet])
+    return (sheets[config.main_sheet], directors)
 
 
-def _get_workbook(path):
-    """Return the workbook from the path."""
-    try:
-        return Workbook(path)
-    except FileNotFoundError:
-        return status["FILE_MISSING"]
-
+def _months(
+    start_month: datetime, end_month: datetime
+) -> list[datetime.datetime]:
+    """Return the first day of each month from start to end inclusive."""
+    month = datetime.datetime(start_month.year, start_month.month, 1)
+    last = datetime.datetime(end_month.year, end_month.month, 1)
+    months = []
+    while month <= last:
+        months.append(month)
+        month += relativedelta(months=1)
+    return months
 
-async def _get_sheet(workbook, sheet_name):
-    """Return a sheet from the workbook."""
 
+def _get_workbook(
+    path, sheet_columns, use_cache=True, where=None, progress=None,
+    identity=None,
+):
+    """Return the workbook from the path, using the cache if unchanged."""
     try:
-        return await workbook.get_worksheet(sheet_name)
-    except KeyError:
-        logger.error(f"Sheet '{sheet_name}' missing in Workbook")
-    except Exception as err:
-        logger.error(f"Unexpected error: sheet '{sheet_name}' {err}")
-    return
-
-
-def get_directors(config, worksheet: object) -> dict[str, Director]:
-    """Return a dict of Director objects keyed on initials."""
-    directors = {}
-    for row in worksheet.iter_rows(values_only=True):
-        if row[0] and row[0] != "Initials":
-            data = DirectorData(
-                row[config.initials_col],
-                row[config.name_col],
-                row[config.email_col],
-                row[config.username_col],
-                row[config.active_col],
-                row[config.send_reminder_col],
-            )
-            director = Director(data)
-            directors[director.initials] = director
+        with span("workbook_open", path=str(path)) as fields:
+            workbook = load_workbook(
+                path, sheet_columns, use_cache, where, progress, identity)
+            fields["rows"] = sum(
+                len(sheet.rows) for sheet in workbook.worksheets.values())
+        return workbook
+    except FileNotFoundError:
+        return status["FILE_MISSING"]
+    except InvalidWorkbookError as err:
+        logger.error(f"Invalid workbook: {err}")
+        return status["INVALID_WORKBOOK"]
+
+
+def _sheet_columns(config: dict) -> dict[str, list[int]]:
+    """Return the columns used in each sheet, keyed on sheet name."""
+    main_columns = set()
+    for _, date_col in session_columns(config):
+        main_columns.update((date_col, date_col + 1))
+    director_columns = [
+        config.initials_col,
+        config.name_col,
+        config.email_col,
+        config.username_col,
+        config.active_col,
+        config.send_reminder_col,
+    ]
+    return {
+        config.main_sheet: sorted(main_columns),
+        config.directors_sheet: sorted(set(director_columns)),
+    }
+
+
+def _get_sheets(
+    workbook: object, sheet_names: list[str]
+) -> tuple[dict[str, object], dict[str, str]]:
+    """Return the named sheets and the error for each that failed to load.
+
+    The sheets are loaded concurrently in one event loop.
+    """
+    return asyncio.run(_load_sheets(workbook, sheet_names))
+
+
+async def _load_sheets(
+    workbook: object, sheet_names: list[str]
+) -> tuple[dict[str, object], dict[str, str]]:
+    sheet_names = list(dict.fromkeys(sheet_names))
+    results = await asyncio.gather(
+        *(_load_sheet(workbook, sheet_name) for sheet_name in sheet_names),
+        return_exceptions=True,
+    )
+    sheets = {}
+    errors = {}
+    for sheet_name, result in zip(sheet_names, results, strict=True):
+        if isinstance(result, KeyError):
+            errors[sheet_name] = f"Sheet '{sheet_name}' missing in Workbook"
+        elif isinstance(result, Exception):
+            errors[sheet_name] = (
+                f"Unexpected error: sheet '{sheet_name}' {result}")
+        else:
+            sheets[sheet_name] = result
+    return (sheets, errors)
+
+
+async def _load_sheet(workbook: object, sheet_name: str) -> object:
+    with span("sheet_load", sheet=sheet_name) as fields:
+        sheet = await workbook.get_worksheet(sheet_name)
+        fields["rows"] = len(getattr(sheet, "rows", ()))
+    return sheet
+
+
+def get_directors(config, worksheet: object) -> DirectorRegistry:
+    """Return the registry of Director objects keyed on initials."""
+    directors = DirectorRegistry()
+    with span("director_parse") as fields:
+        for row in worksheet.iter_rows(values_only=True):
+            if row[0] and row[0] != "Initials":
+                data = DirectorData(
+                    row[config.initials_col],
+                    row[config.name_col],
+                    row[config.email_col],
+                    row[config.username_col],
+                    row[config.active_col],
+                    row[config.send_reminder_col],
+                )
+                directors.add(Director(data))
+        fields["rows"] = len(directors)
 
+    for duplicate in directors.duplicates:
+        logger.warning(
+            f"Duplicate director {duplicate.key} '{duplicate.value}'",
+            initials=duplicate.initials,
+        )
     return directors
 
 
@@ -144,63 +580,204 @@ def _date_limits(
     return (start_date, end_date)
 
 
+def _date_range(month: datetime, config: dict) -> DateRange:
+    """Return the DateRange of the main sheet rows for the month."""
+    (start_date, end_date) = _date_limits(month)
+    date_columns = tuple(
+        sorted({date_col for _, date_col in session_columns(config)}))
+    return DateRange(start_date, end_date, date_columns)
+
+
 def _get_rota(
     month: datetime,
     config: dict,
     main_sheet: object,
-    directors: dict[str, Director],
+    directors: DirectorRegistry,
+    diagnostics: Diagnostics | None = None,
 ) -> list[str]:
     """Print the rota."""
+    return _get_month_rota(
+        month, config, main_sheet, directors, diagnostics)[0]
+
+
+def _get_month_rota(
+    month: datetime,
+    config: dict,
+    main_sheet: object,
+    directors: DirectorRegistry,
+    diagnostics: Diagnostics | None = None,
+) -> tuple[str | None, list[DayRota]]:
+    """Return the month's rota email and the DayRota of each session."""
     (start_date, end_date) = _date_limits(month)
-    rota_data = RotaData(start_date, end_date, main_sheet, directors)
-    day_rotas = []
-    day_rotas.append(
-        DayRota("Monday", _get_rota_dates(config.mon_date_col, rota_data))
-    )
-    day_rotas.append(
-        DayRota("Wednesday", _get_rota_dates(config.wed_date_col, rota_data))
-    )
-    day_rotas.append(
-        DayRota("Thursday", _get_rota_dates(config.thurs_date_col, rota_data))
-    )
+    rota_data = RotaData(
+        start_date, end_date, main_sheet, directors, diagnostics)
+    day_rotas = _get_session_rotas(session_columns(config), rota_data)
     rota = _generate_rota_list(day_rotas)
-    return _create_rota_email(config, start_date, rota)
+    return (_create_rota_email(config, start_date, rota), day_rotas)
+
+
+def session_columns(config: dict) -> list[tuple[str, int]]:
+    """Return (day, date column) for each session in the config."""
+    if config.sessions:
+        return list(config.sessions.items())
+    return [
+        (day, getattr(config, col_key))
+        for day, col_key in SESSION_COLUMNS.items()
+    ]
+
+
+def _get_session_rotas(
+    sessions: list[tuple[str, int]], rota_data: RotaData
+) -> list[DayRota]:
+    """Return a DayRota for each session in the period.
+
+    The sheet's index is used if it has been built; otherwise only the
+    rows in the period are read. Problems found are recorded in the
+    rota_data's diagnostics.
+    """
+    sessions = tuple(sessions)
+    if rota_data.diagnostics is None:
+        rota_data = rota_data._replace(diagnostics=Diagnostics())
+    index = _date_indexes.get(rota_data.main_sheet, {}).get(sessions)
+    with span("rota_extract", month=f"{rota_data.start_date:%b %Y}") as fields:
+        if index is None or isinstance(index, DateIndex):
+            (day_rotas, has_dates) = _indexed_rotas(index, sessions, rota_data)
+        else:
+            (day_rotas, has_dates) = _table_rotas(index, sessions, rota_data)
+        fields["index"] = type(index).__name__ if index else "scan"
+        fields["rows"] = sum(len(day_rota.day_rota) for day_rota in day_rotas)
+
+    rota_data.diagnostics.rows += fields["rows"]
+    for day_rota in day_rotas:
+        if day_rota.day not in has_dates:
+            rota_data.diagnostics.empty_period(
+                day_rota.day, rota_data.start_date)
+    return day_rotas
+
+
+def _indexed_rotas(
+    date_index: DateIndex | None,
+    sessions: tuple[tuple[str, int], ...],
+    rota_data: RotaData,
+) -> tuple[list[DayRota], set[str]]:
+    """Return the DayRotas, and the sessions with dates, from a DateIndex.
+
+    Without a date_index only the rows in the period are read.
+    """
+    (start_date, end_date) = (rota_data.start_date, rota_data.end_date)
+    if not date_index:
+        date_columns = tuple(sorted({date_col for _, date_col in sessions}))
+        rows = rota_data.main_sheet.numbered_rows(
+            where=DateRange(start_date, end_date, date_columns))
+        date_index = DateIndex.from_numbered_rows(rows, sessions)
+
+    date_cols = dict(sessions)
+    day_rotas = {day: DayRota(day, []) for day, _ in sessions}
+    has_dates = set()
+    for entry in date_index.between(start_date, end_date):
+        has_dates.add(entry.session)
+        cell = None
+        if entry.row:
+            cell = cell_name(date_cols[entry.session] + 1, entry.row)
+        line = _rota_entry(
+            entry.date, entry.initials, rota_data, entry.session, cell)
+        if line:
+            day_rotas[entry.session].day_rota.append(line)
+    return (list(day_rotas.values()), has_dates)
+
+
+def _table_rotas(
+    table: object,
+    sessions: tuple[tuple[str, int], ...],
+    rota_data: RotaData,
+) -> tuple[list[DayRota], set[str]]:
+    """Return the DayRotas, and the sessions with dates, from a RotaTable."""
+    diagnostics = rota_data.diagnostics
+    day_rotas = []
+    has_dates = set()
+    for day, date_col in sessions:
+        rows = table.session_rows(
+            day, rota_data.start_date, rota_data.end_date, rota_data.directors
+        )
+        if rows.dates:
+            has_dates.add(day)
+        for row in rows.missing.nonzero()[0].tolist():
+            diagnostics.missing_director(
+                day,
+                rows.dates[row],
+                cell_name(date_col + 1, rows.row_numbers[row]),
+            )
+        for row in rows.unknown.nonzero()[0].tolist():
+            diagnostics.unknown_initials(
+                day,
+                rows.dates[row],
+                rows.initials[row],
+                cell_name(date_col + 1, rows.row_numbers[row]),
+            )
+
+        day_rota = []
+        valid = (~(rows.missing | rows.unknown)).tolist()
+        for rota_date, dir_inits, is_valid in zip(
+            rows.dates, rows.initials, valid, strict=True
+        ):
+            if is_valid:
+                director = rota_data.directors[dir_inits]
+                director.dates.append(rota_date)
+                day_rota.append(f"{rota_date:%d/%m/%y}, {director.name}")
+        day_rotas.append(DayRota(day, day_rota))
+    return (day_rotas, has_dates)
+
+
+def _index_sheet(
+    main_sheet: object, sessions: list[tuple[str, int]]
+) -> object:
+    """Build and keep the index of the sheet, for repeated lookups.
+
+    The index is a columnar RotaTable if numpy is installed, otherwise a
+    DateIndex.
+    """
+    # Imported here: numpy is slow to import and is optional
+    from directors_rota import rota_table
+
+    sessions = tuple(sessions)
+    indexes = _date_indexes.setdefault(main_sheet, {})
+    if sessions not in indexes:
+        rows = main_sheet.iter_rows(values_only=True)
+        if rota_table.available():
+            indexes[sessions] = rota_table.RotaTable.from_rows(rows, sessions)
+        else:
+            indexes[sessions] = DateIndex.from_numbered_rows(
+                enumerate(rows, 1), sessions)
+    return indexes[sessions]
 
 
 def _get_rota_dates(date_col: int, rota_data: RotaData) -> list[str]:
     """Return a list of dates and directors names."""
-    rota = []
-    dir_col = date_col + 1
-    no_dates = True
-    for row in rota_data.main_sheet.iter_rows(values_only=True):
-        rota_date = row[date_col]
-        if (
-            rota_date
-            and isinstance(rota_date, datetime.date)
-            and rota_data.start_date <= rota_date < rota_data.end_date
-        ):
-            no_dates = False
-            dir_inits = row[dir_col]
-            if not dir_inits:
-                logger.warning(f"{txt.NO_DIRECTOR} for {rota_date:%d %b %Y}")
-                continue
-            if dir_inits not in rota_data.directors:
-                logger.warning(
-                    f"{txt.INVALID_DIRECTOR} '{dir_inits}' "
-                    f"for {rota_date:%d %b %Y}"
-                )
-                continue
-            director = rota_data.directors[dir_inits]
-            rota.append(f"{rota_date:%d/%m/%y}, {director.name}")
-            logger.info(
-                f"Rota data added for {rota_date:%d %b %Y}, {director.name}"
-            )
-    if no_dates:
-        logger.warning(
-            f"No dates in this period "
-            f"{rota_data.start_date:%d/%m/%y} to {rota_data.end_date:%d/%m/%y}"
-        )
-    return rota
+    return _get_session_rotas([("", date_col)], rota_data)[0].day_rota
+
+
+def _rota_entry(
+    rota_date: datetime.date,
+    dir_inits: str,
+    rota_data: RotaData,
+    session: str = "",
+    cell: str | None = None,
+) -> str | None:
+    """Return the rota line for a date, or None if the director is invalid.
+
+    An invalid director is recorded in the rota_data's diagnostics, with
+    the cell holding the initials.
+    """
+    if not dir_inits:
+        rota_data.diagnostics.missing_director(session, rota_date, cell)
+        return None
+    if dir_inits not in rota_data.directors:
+        rota_data.diagnostics.unknown_initials(
+            session, rota_date, dir_inits, cell)
+        return None
+    director = rota_data.directors[dir_inits]
+    director.dates.append(rota_date)
+    return f"{rota_date:%d/%m/%y}, {director.name}"
 
 
 def _generate_rota_list(day_rotas) -> list[str]:
@@ -218,13 +795,12 @@ def _create_rota_email(
 ) -> str | None:
     """Return the rota email text."""
     template_path = config.email_template
-    try:
-        with open(template_path, encoding="utf-8") as f_email:
-            email_text = f_email.read()
-    except FileNotFoundError:
+    template = load_template(template_path)
+    if not template:
         logger.error(f"{txt.NO_TEMPLATE} {template_path}")
         return None
 
-    email_text = email_text.replace("<month>", f"{start_date:%b %Y}")
-    email_text = email_text.replace("<rota>", "\n".join(rota))
-    return email_text
+    # Director placeholders (e.g. <first_name>) are filled in when sending
+    with span("template_render", rows=len(rota)):
+        return template.render(
+            month=f"{start_date:%b %Y}", rota="\n".join(rota))
@@ -0,0 +1,75 @@
+"""Progress and cancellation for work run off the Tk thread."""
+
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+WORKERS = 2
+
+
+class CancelledError(Exception):
+    """The user cancelled the task."""
+
+
+class Progress:
+    """Progress of a task, set by the worker and read by the GUI."""
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.cancelled = threading.Event()
+        self.stage = ''
+        self.done = 0
+        self.total = 0
+        self.rows = 0
+
+    def __repr__(self) -> str:
+        return f'Progress ({self.text()})'
+
+    def start(self, stage: str, total: int = 0) -> None:
+        """Begin a stage of total steps (0 if not known)."""
+        with self.lock:
+            self.stage = stage
+            self.done = 0
+            self.total = total
+
+    def advance(self, steps: int = 1) -> None:
+        with self.lock:
+            self.done += steps
+
+    def add_rows(self, rows: int) -> None:
+        """Count rows parsed; raise CancelledError if the task is cancelled."""
+        with self.lock:
+            self.rows += rows
+        self.check()
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+
+    def check(self) -> None:
+        """Raise CancelledError if the task has been cancelled."""
+        if self.cancelled.is_set():
+            raise CancelledError()
+
+    def fraction(self) -> float | None:
+        """Return the fraction of the stage done, or None if not known."""
+        with self.lock:
+            return self.done / self.total if self.total else None
+
+    def text(self) -> str:
+        """Return the progress as shown in the GUI."""
+        with self.lock:
+            if self.total:
+                return f'{self.stage} {self.done} of {self.total}'
+            if self.rows:
+                return f'{self.stage} {self.rows} rows'
+            return self.stage
+
+
+@functools.cache
+def _executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(
+        max_workers=WORKERS, thread_name_prefix='rota-worker')
+
+
+def run_in_background(function: object, *args, **kwargs) -> Future:
+    """Run the function on a worker thread and return its Future."""
+    return _executor().submit(function, *args, **kwargs)
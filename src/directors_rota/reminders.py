@@ -0,0 +1,252 @@
+"""Reminder emails to directors, queued on disk in due order.
+
+The queue is a SQLite table in email_reminder_dir with an index on the
+due time, so adding, cancelling and finding the next due reminder each
+take O(log n) however many are queued. A director has at most one
+reminder per rota date: generating the rota again replaces it, and when
+a duty moves to another director (see changes.update_reminders) the old
+director's reminder is cancelled and the new director's queued.
+
+run_reminders sends the reminders that are due. As a daemon it sleeps
+until the next one is due, waking at least every MAX_SLEEP seconds to
+pick up reminders added by another process.
+"""
+
+import datetime
+import sqlite3
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+from directors_rota import logger
+
+REMINDER_DB = "reminders.sqlite"
+MAX_SLEEP = 15 * 60
+RETRY_MINUTES = 30
+TIMESTAMP = "%Y-%m-%d %H:%M:%S"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reminders (
+    id INTEGER PRIMARY KEY,
+    due TEXT NOT NULL,
+    initials TEXT NOT NULL,
+    rota_date TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    UNIQUE (initials, rota_date)
+);
+CREATE INDEX IF NOT EXISTS reminders_due ON reminders (due);
+"""
+
+
+class Reminder(NamedTuple):
+    id: int
+    due: datetime.datetime
+    initials: str
+    rota_date: datetime.date
+    recipient: str
+    subject: str
+    body: str
+
+
+class ReminderQueue:
+    """Reminders on disk, ordered by due time."""
+    def __init__(self, directory: str | Path) -> None:
+        self.path = Path(directory, REMINDER_DB)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.executescript(SCHEMA)
+
+    def __len__(self) -> int:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT COUNT(*) FROM reminders").fetchone()
+        return row[0]
+
+    def __repr__(self) -> str:
+        return f"ReminderQueue {self.path} ({len(self)} reminders)"
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def add(
+        self,
+        due: datetime.datetime,
+        initials: str,
+        rota_date: datetime.date,
+        recipient: str,
+        subject: str,
+        body: str,
+    ) -> int:
+        """Queue the reminder, replacing any for the director and date."""
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                "INSERT OR REPLACE INTO reminders "
+                "(due, initials, rota_date, recipient, subject, body) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (f"{due:{TIMESTAMP}}", initials, _iso_date(rota_date),
+                 recipient, subject, body),
+            )
+        return cursor.lastrowid
+
+    def cancel(self, initials: str, rota_date: datetime.date) -> bool:
+        """Remove the director's reminder for the date, if queued."""
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                "DELETE FROM reminders WHERE initials = ? AND rota_date = ?",
+                (initials, _iso_date(rota_date)),
+            )
+        return cursor.rowcount > 0
+
+    def remove(self, reminder_id: int) -> None:
+        with self.lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM reminders WHERE id = ?", (reminder_id,))
+
+    def postpone(self, reminder_id: int, due: datetime.datetime) -> None:
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE reminders SET due = ? WHERE id = ?",
+                (f"{due:{TIMESTAMP}}", reminder_id),
+            )
+
+    def next_due(self) -> Reminder | None:
+        """Return the reminder due soonest, or None if none is queued."""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT * FROM reminders ORDER BY due LIMIT 1").fetchone()
+        return _reminder(row) if row else None
+
+    def due(self, now: datetime.datetime) -> list[Reminder]:
+        """Return the reminders due at or before now, in due order."""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT * FROM reminders WHERE due <= ? ORDER BY due",
+                (f"{now:{TIMESTAMP}}",),
+            ).fetchall()
+        return [_reminder(row) for row in rows]
+
+
+def schedule_reminders(
+    config: object,
+    director: object,
+    queue: ReminderQueue | None = None,
+    dates: list[datetime.datetime] | None = None,
+) -> int:
+    """Queue a reminder for each of the director's rota dates to come.
+
+    Only the given dates are used, if any, instead of the director's.
+    Return the number queued. Each is due reminder_days_before the date,
+    at reminder_time.
+    """
+    own_queue = queue is None
+    if own_queue:
+        queue = ReminderQueue(config.email_reminder_dir)
+    (hour, minute) = (int(part) for part in config.reminder_time.split(":"))
+    now = datetime.datetime.now()
+    count = 0
+    try:
+        for rota_date in sorted(director.dates if dates is None else dates):
+            due = datetime.datetime.combine(
+                rota_date.date() - datetime.timedelta(
+                    days=config.reminder_days_before),
+                datetime.time(hour, minute),
+            )
+            if rota_date < now:
+                continue
+            queue.add(
+                due,
+                director.initials,
+                rota_date,
+                director.email,
+                f"{config.email_subject} reminder",
+                _reminder_body(director, rota_date),
+            )
+            count += 1
+    finally:
+        if own_queue:
+            queue.close()
+    logger.info("Reminders queued", initials=director.initials, count=count)
+    return count
+
+
+def run_reminders(
+    queue: ReminderQueue,
+    session: object,
+    daemon: bool = False,
+    stop: threading.Event | None = None,
+) -> int:
+    """Send the reminders that are due; return the number sent.
+
+    As a daemon, carry on sending each reminder when it falls due until
+    stop is set. A reminder that cannot be sent is tried again
+    RETRY_MINUTES later.
+    """
+    # Imported here: emails imports this module
+    from directors_rota.emails import build_message
+
+    stop = stop or threading.Event()
+    sent = 0
+    while not stop.is_set():
+        now = datetime.datetime.now()
+        for reminder in queue.due(now):
+            message = build_message(
+                reminder.subject, reminder.body, reminder.recipient)
+            try:
+                session.send(
+                    message["From"], reminder.recipient, message.as_string())
+            except Exception as err:
+                logger.error(
+                    f"Reminder to {reminder.recipient} failed. {err}")
+                queue.postpone(
+                    reminder.id,
+                    now + datetime.timedelta(minutes=RETRY_MINUTES))
+                session.close()
+                continue
+            queue.remove(reminder.id)
+            sent += 1
+            logger.info(f"Reminder sent to {reminder.recipient}",
+                        rota_date=f"{reminder.rota_date}")
+        if not daemon:
+            break
+        stop.wait(_sleep_seconds(queue.next_due()))
+    return sent
+
+
+def _sleep_seconds(reminder: Reminder | None) -> float:
+    """Return how long to sleep until the reminder is due."""
+    if not reminder:
+        return MAX_SLEEP
+    wait = (reminder.due - datetime.datetime.now()).total_seconds()
+    return min(max(wait, 0), MAX_SLEEP)
+
+
+def _reminder_body(director: object, rota_date: datetime.datetime) -> str:
+    return (
+        f"Dear {director.first_name}\n\n"
+        f"This is a reminder that you are the director on "
+        f"{rota_date:%A %d %b %Y}.\n"
+    )
+
+
+def _reminder(row: tuple) -> Reminder:
+    (reminder_id, due, initials, rota_date, recipient, subject, body) = row
+    return Reminder(
+        reminder_id,
+        datetime.datetime.strptime(due, TIMESTAMP),
+        initials,
+        datetime.date.fromisoformat(rota_date),
+        recipient,
+        subject,
+        body,
+    )
+
+
+def _iso_date(value: datetime.date) -> str:
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    return value.isoformat()
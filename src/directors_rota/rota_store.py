@@ -0,0 +1,287 @@
+"""Snapshots of the generated rotas, and a history of emails sent, in SQLite.
+
+A month's snapshot holds its rendered email, the rows of each session,
+the directors and the diagnostics. It is keyed on the workbook's content
+hash and a hash of the config and email template, so it is served again
+only while neither has changed; a changed workbook or config gives a new
+snapshot and the old ones are kept.
+
+Each email sent is recorded in the history with the month of its rota,
+indexed for lookup by month or by address.
+
+The hash and assignments of each row of a workbook's main sheet are kept
+too, for finding the changes between one version and the next.
+"""
+
+import datetime
+import hashlib
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+from directors_rota import logger
+from directors_rota.constants import DATA_DIR
+from directors_rota.diagnostics import Issue
+
+STORE_PATH = Path(DATA_DIR, "rotas.sqlite")
+TIMESTAMP = "%Y-%m-%d %H:%M:%S"
+
+# Config keys that do not change the rota
+UNHASHED_KEYS = ("geometry", "new_geometry")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    month TEXT NOT NULL,
+    workbook_hash TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    created TEXT NOT NULL,
+    email TEXT,
+    rows TEXT NOT NULL,
+    directors TEXT NOT NULL,
+    issues TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    PRIMARY KEY (month, workbook_hash, config_hash)
+);
+CREATE TABLE IF NOT EXISTS sent (
+    id INTEGER PRIMARY KEY,
+    month TEXT NOT NULL,
+    sent_at TEXT NOT NULL,
+    initials TEXT,
+    email TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sent_month ON sent (month, sent_at);
+CREATE INDEX IF NOT EXISTS sent_email ON sent (email, sent_at);
+CREATE TABLE IF NOT EXISTS row_hashes (
+    workbook TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    assignments TEXT NOT NULL,
+    PRIMARY KEY (workbook, row)
+);
+"""
+
+
+class Snapshot(NamedTuple):
+    month: datetime.date
+    workbook_hash: str
+    config_hash: str
+    email: str | None
+    rows: list[tuple[str, list[str]]]
+    directors: list[dict]
+    issues: list[Issue]
+    row_count: int
+    created: datetime.datetime | None = None
+
+
+class SentEmail(NamedTuple):
+    month: datetime.date
+    sent_at: datetime.datetime
+    initials: str | None
+    email: str
+    status: str
+    error: str
+
+
+class RotaStore:
+    """Generated rotas and sent emails on disk."""
+    def __init__(self, path: str | Path | None = None) -> None:
+        self.path = Path(path or STORE_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.executescript(SCHEMA)
+
+    def __repr__(self) -> str:
+        return f"RotaStore {self.path}"
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def get(
+        self, month: datetime.date, workbook_hash: str, config_hash: str
+    ) -> Snapshot | None:
+        """Return the month's snapshot for the hashes, or None."""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT month, workbook_hash, config_hash, email, rows, "
+                "directors, issues, row_count, created FROM snapshots "
+                "WHERE month = ? AND workbook_hash = ? AND config_hash = ?",
+                (_month_key(month), workbook_hash, config_hash),
+            ).fetchone()
+        return _snapshot(row) if row else None
+
+    def save(self, snapshot: Snapshot) -> None:
+        """Store the snapshot, replacing any for its month and hashes."""
+        created = snapshot.created or datetime.datetime.now()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO snapshots (month, workbook_hash, "
+                "config_hash, created, email, rows, directors, issues, "
+                "row_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    _month_key(snapshot.month),
+                    snapshot.workbook_hash,
+                    snapshot.config_hash,
+                    f"{created:{TIMESTAMP}}",
+                    snapshot.email,
+                    json.dumps(snapshot.rows),
+                    json.dumps(snapshot.directors, default=_iso),
+                    json.dumps(
+                        [_issue_record(issue) for issue in snapshot.issues]),
+                    snapshot.row_count,
+                ),
+            )
+
+    def record_sent(
+        self, month: datetime.date, results: list[object]
+    ) -> None:
+        """Add each SendResult to the history of emails sent."""
+        sent_at = f"{datetime.datetime.now():{TIMESTAMP}}"
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT INTO sent (month, sent_at, initials, email, status, "
+                "error) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (_month_key(month), sent_at, result.initials,
+                     result.email, result.status.name, result.error or "")
+                    for result in results
+                ],
+            )
+
+    def sent(
+        self, month: datetime.date | None = None, email: str | None = None
+    ) -> list[SentEmail]:
+        """Return the emails sent for the month and or to the address."""
+        clauses = []
+        values = []
+        if month:
+            clauses.append("month = ?")
+            values.append(_month_key(month))
+        if email:
+            clauses.append("email = ?")
+            values.append(email)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT month, sent_at, initials, email, status, error "
+                f"FROM sent {where}ORDER BY sent_at, id",
+                values,
+            ).fetchall()
+        return [_sent_email(row) for row in rows]
+
+    def row_hashes(self, workbook: str) -> dict[int, tuple[str, list]]:
+        """Return the hash and assignments of each row of the workbook."""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT row, hash, assignments FROM row_hashes "
+                "WHERE workbook = ?",
+                (workbook,),
+            ).fetchall()
+        return {
+            row: (digest, json.loads(assignments))
+            for row, digest, assignments in rows
+        }
+
+    def save_row_hashes(
+        self, workbook: str, rows: dict[int, tuple[str, list]]
+    ) -> None:
+        """Replace the workbook's row hashes and assignments with rows."""
+        with self.lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM row_hashes WHERE workbook = ?", (workbook,))
+            self.connection.executemany(
+                "INSERT INTO row_hashes (workbook, row, hash, assignments) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (workbook, row, digest, json.dumps(assignments))
+                    for row, (digest, assignments) in rows.items()
+                ],
+            )
+
+
+def config_hash(config: object) -> str:
+    """Return a hash of the config values and email template text."""
+    values = {
+        key: value for key, value in config.config.items()
+        if key not in UNHASHED_KEYS
+    }
+    digest = hashlib.sha256(
+        json.dumps(values, sort_keys=True, default=str).encode("utf-8"))
+    try:
+        digest.update(Path(config.email_template).read_bytes())
+    except OSError:
+        pass
+    return digest.hexdigest()
+
+
+def record_sent(month: datetime.date | None, results: list[object]) -> None:
+    """Add the results to the history; a failure is logged, not raised."""
+    if not month or not results:
+        return
+    try:
+        store = RotaStore()
+        try:
+            store.record_sent(month, results)
+        finally:
+            store.close()
+    except (OSError, sqlite3.Error) as err:
+        logger.error(f"Sent emails not recorded. {err}")
+
+
+def _month_key(month: datetime.date) -> str:
+    return f"{month:%Y-%m}"
+
+
+def _iso(value: object) -> str:
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serialisable")
+
+
+def _issue_record(issue: Issue) -> list:
+    return [issue.kind, issue.session, issue.date.isoformat(),
+            issue.initials, issue.cell]
+
+
+def _snapshot(row: tuple) -> Snapshot:
+    (month, workbook_hash, config_hash_, email, rows, directors, issues,
+     row_count, created) = row
+    directors = json.loads(directors)
+    for director in directors:
+        director["dates"] = [
+            datetime.datetime.fromisoformat(rota_date)
+            for rota_date in director["dates"]
+        ]
+    return Snapshot(
+        datetime.datetime.strptime(month, "%Y-%m"),
+        workbook_hash,
+        config_hash_,
+        email,
+        [(day, lines) for day, lines in json.loads(rows)],
+        directors,
+        [
+            Issue(kind, session, datetime.datetime.fromisoformat(date),
+                  initials, cell)
+            for kind, session, date, initials, cell in json.loads(issues)
+        ],
+        row_count,
+        datetime.datetime.strptime(created, TIMESTAMP),
+    )
+
+
+def _sent_email(row: tuple) -> SentEmail:
+    (month, sent_at, initials, email, status, error) = row
+    return SentEmail(
+        datetime.datetime.strptime(month, "%Y-%m").date(),
+        datetime.datetime.strptime(sent_at, TIMESTAMP),
+        initials,
+        email,
+        status,
+        error,
+    )
@@ -0,0 +1,124 @@
+"""Columnar table of the Main sheet, for vectorised month selection.
+
+Each session's dates are held as a datetime64 array and its director
+initials as integer codes, so a month is picked out of the whole sheet
+with array masks instead of a loop over the rows.
+
+numpy is optional: check available() before building a RotaTable.
+"""
+
+import datetime
+from typing import NamedTuple
+
+from directors_rota.date_index import as_datetime
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NO_INITIALS = -1
+
+
+def available() -> bool:
+    """Return True if numpy is installed."""
+    return np is not None
+
+
+class SessionRows(NamedTuple):
+    dates: list[datetime.datetime]
+    initials: list[str | None]
+    missing: object
+    unknown: object
+    row_numbers: list[int]
+
+
+class RotaTable:
+    """A datetime64 column per session with its initials as codes."""
+
+    def __init__(
+        self,
+        dates: dict[str, object],
+        codes: dict[str, object],
+        initials: list[str],
+    ) -> None:
+        self.dates = dates
+        self.codes = codes
+        self.initials = initials
+        self._codes = {inits: code for code, inits in enumerate(initials)}
+
+    def __len__(self) -> int:
+        return sum(
+            int(np.count_nonzero(~np.isnat(dates)))
+            for dates in self.dates.values()
+        )
+
+    def __repr__(self) -> str:
+        return f"RotaTable ({', '.join(self.dates)})"
+
+    @classmethod
+    def from_rows(
+        cls, rows: object, sessions: list[tuple[str, int]]
+    ) -> "RotaTable":
+        """Return the table of the rows.
+
+        Each session is a (day, date column) pair; the director's initials
+        are in the column after the date.
+        """
+        rows = list(rows)
+        codes_of = {}
+        dates = {}
+        codes = {}
+        for day, date_col in sessions:
+            dates[day] = np.array(
+                [as_datetime(row[date_col]) for row in rows],
+                dtype="datetime64[us]",
+            )
+            codes[day] = np.array(
+                [
+                    codes_of.setdefault(row[date_col + 1], len(codes_of))
+                    if row[date_col + 1] else NO_INITIALS
+                    for row in rows
+                ],
+                dtype=np.int32,
+            )
+        return cls(dates, codes, list(codes_of))
+
+    def session_rows(
+        self,
+        day: str,
+        start_date: datetime.datetime,
+        end_date: datetime.datetime,
+        directors: dict[str, object],
+    ) -> SessionRows:
+        """Return the session's rows with start_date <= date < end_date.
+
+        The rows are in date order. missing marks rows without initials and
+        unknown those with initials that are not in directors. The rows are
+        taken to start at row 1 of the sheet.
+        """
+        dates = self.dates[day]
+        start = np.datetime64(as_datetime(start_date), "us")
+        end = np.datetime64(as_datetime(end_date), "us")
+        rows = np.flatnonzero((dates >= start) & (dates < end))
+        rows = rows[np.argsort(dates[rows], kind="stable")]
+
+        codes = self.codes[day][rows]
+        known = np.array(
+            [
+                self._codes[inits]
+                for inits in directors
+                if inits in self._codes
+            ],
+            dtype=np.int32,
+        )
+        missing = codes == NO_INITIALS
+        unknown = ~missing & ~np.isin(codes, known)
+        return SessionRows(
+            dates[rows].tolist(),
+            [None if code == NO_INITIALS else self.initials[code]
+             for code in codes.tolist()],
+            missing,
+            unknown,
+            (rows + 1).tolist(),
+        )
@@ -0,0 +1,235 @@
+"""Streaming reader that decodes only the columns the rota uses.
+
+The workbook is opened in openpyxl's read-only mode and each sheet's XML
+is streamed row by row. Cells outside the requested columns are skipped
+before their values are converted, so parse time and memory scale with
+the columns used, not with the width of the sheet.
+
+A DateRange can be pushed down to the reader: only the date cells of a
+row are converted until the row is known to match, and reading stops
+once date-sorted columns have passed the end of the range.
+
+The sheets of a workbook are decoded in parallel worker threads, each
+streaming its own member of the zip archive.
+
+The column parser is built on openpyxl's private worksheet parser, so
+openpyxl is pinned to the 3.1 series. If those internals are missing,
+each sheet is read with the public iter_rows instead, which converts
+every cell up to the highest column used.
+"""
+
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from openpyxl import load_workbook
+from openpyxl.utils import column_index_from_string
+
+try:
+    from openpyxl.worksheet._reader import WorkSheetParser
+except ImportError:
+    WorkSheetParser = None
+
+from directors_rota.date_index import DateRange, RowScan
+from directors_rota.progress import Progress
+
+DIGITS = "0123456789"
+PROGRESS_ROWS = 500
+
+
+class ColumnParser(WorkSheetParser or object):
+    """Worksheet parser that converts only the cells in the given columns.
+
+    columns are zero-based, as in the config.
+    """
+
+    def __init__(
+        self,
+        *args,
+        columns: list[int],
+        where: DateRange | None = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.columns = frozenset(column + 1 for column in columns)
+        self.where = where
+        self.scan = RowScan(where) if where else None
+
+    def parse_row(self, row: object) -> tuple[int, list[dict]]:
+        row_number = row.get("r")
+        if row_number:
+            self.row_counter = int(float(row_number))
+        else:
+            self.row_counter += 1
+        self.col_counter = 0
+
+        elements = {}
+        for element in row:
+            coordinate = element.get("r")
+            if coordinate:
+                column = column_index_from_string(coordinate.rstrip(DIGITS))
+            else:
+                column = self.col_counter + 1
+            self.col_counter = column
+            if column in self.columns:
+                elements[column] = element
+
+        if not self.scan:
+            return self.row_counter, self._parse_cells(elements)
+
+        # Convert the date cells first; skip the row if none is in range
+        date_cells = self._parse_cells({
+            column + 1: elements[column + 1]
+            for column in self.where.date_columns
+            if column + 1 in elements
+        })
+        dates = {cell["column"] - 1: cell["value"] for cell in date_cells}
+        if not self.scan.accept(
+            [dates.get(column) for column in self.where.date_columns]
+        ):
+            return self.row_counter, None
+        other_cells = self._parse_cells({
+            column: element
+            for column, element in elements.items()
+            if column - 1 not in dates
+        })
+        return self.row_counter, date_cells + other_cells
+
+    def _parse_cells(self, elements: dict[int, object]) -> list[dict]:
+        cells = []
+        for column, element in elements.items():
+            self.col_counter = column - 1
+            cells.append(self.parse_cell(element))
+        return cells
+
+
+def read_sheets(
+    path: Path,
+    sheet_columns: dict[str, list[int]],
+    where: dict[str, DateRange] | None = None,
+    progress: Progress | None = None,
+) -> dict[str, list[tuple]]:
+    """Return the rows of each named sheet present in the workbook.
+
+    Each row is a tuple wide enough to hold the sheet's highest requested
+    column; other columns are None. Row n of the sheet is rows[n - 1].
+    If the sheet has a DateRange in where, the rows that do not match
+    are left empty, and the rows after the last that can match are left
+    out.
+
+    The rows read are counted in progress, and reading stops with
+    CancelledError if it is cancelled.
+    """
+    where = where or {}
+    workbook = load_workbook(path, read_only=True, data_only=True)
+
+    def _read(sheet_name: str) -> list[tuple]:
+        return list(
+            _iter_columns(
+                workbook,
+                sheet_name,
+                sheet_columns[sheet_name],
+                where.get(sheet_name),
+                progress,
+            )
+        )
+
+    sheet_names = [
+        sheet_name for sheet_name in sheet_columns
+        if sheet_name in workbook.sheetnames
+    ]
+    try:
+        if len(sheet_names) < 2:
+            return {
+                sheet_name: _read(sheet_name) for sheet_name in sheet_names
+            }
+        with ThreadPoolExecutor(
+            max_workers=len(sheet_names), thread_name_prefix="sheet-reader"
+        ) as executor:
+            return dict(zip(
+                sheet_names, executor.map(_read, sheet_names), strict=True
+            ))
+    finally:
+        workbook.close()
+
+
+def _iter_columns(
+    workbook: object,
+    sheet_name: str,
+    columns: list[int],
+    where: DateRange | None = None,
+    progress: Progress | None = None,
+) -> Iterator[tuple]:
+    worksheet = workbook[sheet_name]
+    if not _can_parse(workbook, worksheet):
+        yield from _iter_values(worksheet, columns, where, progress)
+        return
+    width = max(columns) + 1
+    empty_row = (None,) * width
+    with worksheet._get_source() as source:
+        parser = ColumnParser(
+            source,
+            worksheet._shared_strings,
+            data_only=True,
+            epoch=workbook.epoch,
+            date_formats=workbook._date_formats,
+            timedelta_formats=workbook._timedelta_formats,
+            columns=columns,
+            where=where,
+        )
+        next_row = 1
+        for row_number, cells in parser.parse():
+            if progress and row_number % PROGRESS_ROWS == 0:
+                progress.add_rows(PROGRESS_ROWS)
+            if cells is None and parser.scan.done:
+                break
+            for _ in range(next_row, row_number):
+                yield empty_row
+            next_row = row_number + 1
+            if cells is None:
+                yield empty_row
+                continue
+            values = [None] * width
+            for cell in cells:
+                values[cell["column"] - 1] = cell["value"]
+            yield tuple(values)
+
+
+def _iter_values(
+    worksheet: object,
+    columns: list[int],
+    where: DateRange | None = None,
+    progress: Progress | None = None,
+) -> Iterator[tuple]:
+    """Read the rows with openpyxl's public API, as _iter_columns does."""
+    width = max(columns) + 1
+    wanted = frozenset(columns)
+    empty_row = (None,) * width
+    scan = RowScan(where) if where else None
+    rows = worksheet.iter_rows(max_col=width, values_only=True)
+    for row_number, row in enumerate(rows, start=1):
+        if progress and row_number % PROGRESS_ROWS == 0:
+            progress.add_rows(PROGRESS_ROWS)
+        values = [None] * width
+        for column, value in enumerate(row):
+            if column in wanted:
+                values[column] = value
+        if scan and not scan.accept(
+            [values[column] for column in where.date_columns]
+        ):
+            if scan.done:
+                break
+            yield empty_row
+            continue
+        yield tuple(values)
+
+
+def _can_parse(workbook: object, worksheet: object) -> bool:
+    """Return whether the openpyxl internals ColumnParser uses are there."""
+    return (
+        WorkSheetParser is not None
+        and hasattr(worksheet, "_get_source")
+        and hasattr(worksheet, "_shared_strings")
+        and hasattr(workbook, "_date_formats")
+        and hasattr(workbook, "_timedelta_formats")
+    )
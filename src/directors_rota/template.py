@@ -0,0 +1,69 @@
+"""Compiled email templates with <placeholder> substitution."""
+
+import functools
+import os
+import re
+from pathlib import Path
+
+PLACEHOLDER = re.compile(r"<([a-z_]+)>")
+
+_templates = {}
+
+
+class Template:
+    """Template text parsed once into literal and placeholder segments."""
+
+    def __init__(self, text: str) -> None:
+        parts = PLACEHOLDER.split(text)
+        self.literals = parts[0::2]
+        self.names = parts[1::2]
+
+    def __repr__(self) -> str:
+        return f"Template ({', '.join(self.names)})"
+
+    @property
+    def placeholders(self) -> set[str]:
+        return set(self.names)
+
+    def render(self, **values: object) -> str:
+        """Return the text with each placeholder replaced by its value.
+
+        Placeholders without a value are left in the text as <name>.
+        """
+        output = [self.literals[0]]
+        for name, literal in zip(self.names, self.literals[1:], strict=True):
+            value = values.get(name)
+            output.append(f"<{name}>" if value is None else str(value))
+            output.append(literal)
+        return "".join(output)
+
+
+@functools.lru_cache(maxsize=16)
+def compile_template(text: str) -> Template:
+    """Return the Template for the text."""
+    return Template(text)
+
+
+def load_template(path: str | Path) -> Template | None:
+    """Return the Template in the file, or None if the file is missing.
+
+    The file is read again only when its mtime changes.
+    """
+    key = str(path)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        _templates.pop(key, None)
+        return None
+
+    cached = _templates.get(key)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        with open(path, encoding="utf-8") as f_template:
+            template = Template(f_template.read())
+    except FileNotFoundError:
+        return None
+    _templates[key] = (mtime, template)
+    return template
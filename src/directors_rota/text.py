@@ -2,19 +2,22 @@
 Text module that merges psiutils.text.strings with project-level strings.
 
 Usage:
-    from text_module import Text
+    from directors_rota.text import txt
 
-    txt = Text()
     print(txt.SELECT)   # Access as attribute
     print(txt.DELETE_PROMPT)
+
+`txt` is shared by all modules; the Text behind it is created on first use.
 """
 
+import functools
 from dataclasses import dataclass, field
 from psiutils.text import Text as PsiText
 
 strings = {
     'DIRECTORS': "Director\'s",
     'NO_DIRECTOR': 'No director allocated',
+    'INVALID_DIRECTOR': 'Invalid director',
     'NO_DATES': 'Missing date on Rota worksheet',
     'NO_TEMPLATE': 'Missing email template',
 }
@@ -48,3 +51,19 @@ class Text:
 
         # for item in sorted(list(self.__dict__)):
         #     print(item)
+
+
+@functools.cache
+def get_text() -> Text:
+    """Return the shared Text, creating it on first use."""
+    return Text()
+
+
+class _LazyText:
+    """Stand-in for the shared Text that creates it on first access."""
+
+    def __getattr__(self, name: str) -> str:
+        return getattr(get_text(), name)
+
+
+txt = _LazyText()
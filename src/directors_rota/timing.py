@@ -0,0 +1,91 @@
+"""Timing spans logged as structured events, and whole-run profiling."""
+
+import argparse
+import cProfile
+import io
+import pstats
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from directors_rota import logger
+from directors_rota.constants import DATA_DIR
+
+PROFILE_LINES = 40
+PROFILE_PATH = Path(DATA_DIR, "profile.txt")
+
+
+@contextmanager
+def span(name: str, **fields: object):
+    """Log how long the block took, with the fields, as a Timing event.
+
+    The block can add fields, e.g. a row count, to the dict it is given.
+    """
+    start = time.perf_counter()
+    try:
+        yield fields
+    except BaseException as err:
+        fields["error"] = type(err).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        logger.info(
+            "Timing", span=name, duration_ms=round(duration * 1000, 3),
+            **fields)
+
+
+@contextmanager
+def profiled(path: Path | None):
+    """Profile the block and write a cProfile report to path.
+
+    The report is the top functions by cumulative time; the raw stats are
+    saved alongside with a .prof suffix. Nothing is done if path is None.
+    """
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _write_profile(profiler, Path(path))
+
+
+def add_profile_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the --profile and --profile-path PATH options to the parser."""
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"write a cProfile report of the run to {PROFILE_PATH}",
+    )
+    parser.add_argument(
+        "--profile-path",
+        type=Path,
+        metavar="PATH",
+        help="write the cProfile report to PATH (implies --profile)",
+    )
+
+
+def profile_path(args: argparse.Namespace) -> Path | None:
+    """Return where to write the profile report, or None if not wanted."""
+    if args.profile_path:
+        return args.profile_path
+    if args.profile:
+        return PROFILE_PATH
+    return None
+
+
+def _write_profile(profiler: cProfile.Profile, path: Path) -> None:
+    report = io.StringIO()
+    stats = pstats.Stats(profiler, stream=report)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_LINES)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(report.getvalue(), encoding="utf-8")
+        stats.dump_stats(path.with_suffix(".prof"))
+    except OSError as err:
+        logger.warning(f"Profile not saved: {err}")
+        return
+    logger.info(f"Profile written to {path}")
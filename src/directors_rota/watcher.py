@@ -0,0 +1,217 @@
+"""Watch the workbook file and act on it once it has finished changing.
+
+On Linux the workbook's directory is watched with inotify; elsewhere, or
+if inotify cannot be used, the file's mtime and size are polled.
+Spreadsheet apps write a file in several steps when saving it, so the
+change is acted on only once the file has been quiet for the debounce
+time.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+
+from directors_rota import logger
+
+DEBOUNCE_SECONDS = 1.0
+POLL_SECONDS = 2.0
+# How often the inotify thread checks whether it has been stopped
+WAKE_SECONDS = 0.5
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class WorkbookWatcher:
+    """A daemon thread that calls on_change(path) after the file changes.
+
+    on_change is also called when the watcher starts, if the file exists.
+    """
+    def __init__(
+            self,
+            path: Path,
+            on_change: object,
+            debounce: float = DEBOUNCE_SECONDS,
+            poll: float = POLL_SECONDS,
+            use_inotify: bool = True,
+            clock: object = time.monotonic) -> None:
+        self.path = Path(path)
+        self.on_change = on_change
+        self.debouncer = Debouncer(debounce, clock)
+        self.poll = poll
+        self.stopping = threading.Event()
+        self.thread = None
+        self.libc = _inotify_libc() if use_inotify else None
+        self.backend = 'inotify' if self.libc else 'poll'
+        self._fd = None
+        self._last_stat = None
+        self._done_stat = None
+
+    def __repr__(self) -> str:
+        return f'WorkbookWatcher {self.path} ({self.backend})'
+
+    def start(self) -> None:
+        if self.thread and self.thread.is_alive():
+            return
+        self.stopping.clear()
+        if self.libc:
+            self._open_inotify()
+        self.thread = threading.Thread(
+            target=self._run, name='workbook-watcher', daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop watching; wait up to timeout for the thread to end."""
+        self.stopping.set()
+        if self.thread:
+            self.thread.join(timeout)
+
+    def _run(self) -> None:
+        try:
+            self._last_stat = _stat(self.path)
+            self._changed()
+            while not self.stopping.is_set():
+                if self._wait(self.debouncer.timeout(self.poll)):
+                    self.debouncer.changed()
+                elif self.debouncer.settled():
+                    self._changed()
+        finally:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def _wait(self, timeout: float) -> bool:
+        """Wait up to timeout; return True if the file changed meanwhile."""
+        if self._fd is None:
+            self.stopping.wait(min(timeout, self.poll))
+            stat = _stat(self.path)
+            changed = stat != self._last_stat
+            self._last_stat = stat
+            return changed
+
+        (ready, _, _) = select.select(
+            [self._fd], [], [], min(timeout, WAKE_SECONDS))
+        if not ready:
+            return False
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        if self.path.name not in _event_names(data):
+            return False
+        self._last_stat = _stat(self.path)
+        return True
+
+    def _changed(self) -> None:
+        """Call on_change if the settled file differs from the last call."""
+        stat = _stat(self.path)
+        if stat is None or stat == self._done_stat:
+            return
+        self._done_stat = stat
+        logger.info(f"Workbook changed {self.path}", backend=self.backend)
+        try:
+            self.on_change(self.path)
+        except Exception as err:
+            logger.error(f"Workbook not read after change: {err}")
+
+    def _open_inotify(self) -> None:
+        fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            self._fall_back(ctypes.get_errno())
+            return
+        watch = self.libc.inotify_add_watch(
+            fd, os.fsencode(self.path.parent), WATCH_MASK)
+        if watch < 0:
+            os.close(fd)
+            self._fall_back(ctypes.get_errno())
+            return
+        self._fd = fd
+
+    def _fall_back(self, errno: int) -> None:
+        logger.warning(
+            f"inotify not available ({os.strerror(errno)}): polling "
+            f"{self.path}")
+        self.libc = None
+        self.backend = 'poll'
+
+
+class Debouncer:
+    """Report a burst of changes once, when it has been quiet long enough.
+
+    clock returns the time in seconds; tests pass a fake one.
+    """
+    def __init__(
+            self, debounce: float, clock: object = time.monotonic) -> None:
+        self.debounce = debounce
+        self.clock = clock
+        self.changed_at = None
+
+    def changed(self) -> None:
+        """Record a change, restarting the quiet time."""
+        self.changed_at = self.clock()
+
+    def timeout(self, longest: float) -> float:
+        """Return how long to wait for the next change, at most longest."""
+        if self.changed_at is None:
+            return longest
+        remaining = self.changed_at + self.debounce - self.clock()
+        return max(0.0, min(longest, remaining))
+
+    def settled(self) -> bool:
+        """Return True once per burst, when it has been quiet long enough."""
+        if (self.changed_at is None
+                or self.clock() - self.changed_at < self.debounce):
+            return False
+        self.changed_at = None
+        return True
+
+
+def _inotify_libc() -> object | None:
+    """Return the C library if it provides inotify, else None."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(
+            ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, 'inotify_init1'):
+        return None
+    return libc
+
+
+def _event_names(data: bytes) -> set[str]:
+    """Return the file names in a buffer of inotify events."""
+    names = set()
+    offset = 0
+    while offset + EVENT_HEADER.size <= len(data):
+        (_, _, _, length) = EVENT_HEADER.unpack_from(data, offset)
+        offset += EVENT_HEADER.size
+        name = data[offset:offset + length].rstrip(b'\0')
+        names.add(os.fsdecode(name))
+        offset += length
+    return names
+
+
+def _stat(path: Path) -> tuple[int, int] | None:
+    """Return the file's mtime and size, or None if it does not exist."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
@@ -0,0 +1,244 @@
+"""On-disk cache of the parsed rows of the rota workbook.
+
+The workbook last loaded from each path is also kept in memory, so while
+the file is unchanged it is returned without reading the cache file.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from pathlib import Path
+from typing import NamedTuple
+from zipfile import BadZipFile
+
+from directors_rota import logger
+from directors_rota.constants import DATA_DIR
+from directors_rota.date_index import (
+    DateRange,
+    filter_numbered_rows,
+    filter_rows,
+)
+from directors_rota.progress import Progress
+
+CACHE_DIR = Path(DATA_DIR, "cache")
+CACHE_VERSION = 2
+
+# The last workbook loaded from each path, with its identity and columns
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+class InvalidWorkbookError(Exception):
+    """The file is not a readable xlsx workbook."""
+
+
+class FileIdentity(NamedTuple):
+    path: str
+    mtime_ns: int
+    size: int
+    digest: str
+
+
+class CachedSheet:
+    """The rows of a worksheet, read like an openpyxl worksheet."""
+
+    def __init__(self, title: str, rows: list[tuple]) -> None:
+        self.title = title
+        self.rows = rows
+
+    def __repr__(self) -> str:
+        return f"{self.title} ({len(self.rows)} rows)"
+
+    def iter_rows(self, values_only: bool = True, where: DateRange = None):
+        """Return an iterator over the row values.
+
+        If where is given only the rows with a date in its range are
+        returned, and iteration stops early on date-sorted columns.
+        """
+        if where:
+            return filter_rows(self.rows, where)
+        return iter(self.rows)
+
+    def numbered_rows(self, where: DateRange = None):
+        """Return an iterator over (row number, row values), as iter_rows.
+
+        Rows are numbered from 1, as in the sheet.
+        """
+        rows = enumerate(self.rows, 1)
+        if where:
+            return filter_numbered_rows(rows, where)
+        return rows
+
+
+class CachedWorkbook:
+    """The parsed sheets of a workbook, read like a workbooky Workbook."""
+
+    def __init__(self, path: Path, sheets: dict[str, list[tuple]]) -> None:
+        self.path = str(path)
+        self.worksheets = {
+            title: CachedSheet(title, rows) for title, rows in sheets.items()
+        }
+
+    async def get_worksheet(self, sheet_name: str) -> CachedSheet:
+        """Return the worksheet; raise KeyError if it is missing."""
+        return self.worksheets[sheet_name]
+
+
+def load_workbook(
+    path: Path,
+    sheet_columns: dict[str, list[int]],
+    use_cache: bool = True,
+    where: dict[str, DateRange] | None = None,
+    progress: Progress | None = None,
+    identity: FileIdentity | None = None,
+) -> CachedWorkbook:
+    """Return the workbook's sheets, from the cache if the file is unchanged.
+
+    sheet_columns maps each sheet name to the (zero-based) columns used;
+    only those columns are read. Raise FileNotFoundError if the workbook
+    does not exist and InvalidWorkbookError if it cannot be read.
+
+    With use_cache False the file is always read and nothing is saved;
+    where then limits the named sheets to the rows in each DateRange.
+
+    Rows parsed are counted in progress; parsing stops with
+    CancelledError if it is cancelled. identity is the file's identity if
+    the caller has already taken it, so the file is not hashed again.
+    """
+    if not use_cache:
+        if not Path(path).is_file():
+            raise FileNotFoundError(path)
+        sheets = _parse_workbook(path, sheet_columns, where, progress)
+        return CachedWorkbook(path, sheets)
+
+    if identity is None:
+        identity = file_identity(path)
+    workbook = _loaded_workbook(identity, sheet_columns)
+    if workbook:
+        if progress:
+            progress.add_rows(sum(
+                len(sheet.rows) for sheet in workbook.worksheets.values()))
+        return workbook
+
+    sheets = _read_cache(identity, sheet_columns)
+    if sheets is None:
+        sheets = _parse_workbook(path, sheet_columns, None, progress)
+        _write_cache(identity, sheet_columns, sheets)
+    elif progress:
+        progress.add_rows(sum(len(rows) for rows in sheets.values()))
+    workbook = CachedWorkbook(path, sheets)
+    with _loaded_lock:
+        _loaded[identity.path] = (identity, dict(sheet_columns), workbook)
+    return workbook
+
+
+def file_identity(path: Path) -> FileIdentity:
+    """Return the path, mtime, size and content hash of a file."""
+    path = Path(path).resolve()
+    stat = path.stat()
+    with open(path, "rb") as f_workbook:
+        digest = hashlib.file_digest(f_workbook, "sha256").hexdigest()
+    return FileIdentity(str(path), stat.st_mtime_ns, stat.st_size, digest)
+
+
+def _loaded_workbook(
+    identity: FileIdentity, sheet_columns: dict[str, list[int]]
+) -> CachedWorkbook | None:
+    """Return the workbook in memory if the file and columns match."""
+    with _loaded_lock:
+        loaded = _loaded.get(identity.path)
+    if not loaded:
+        return None
+    (loaded_identity, loaded_columns, workbook) = loaded
+    if loaded_identity != identity or not _columns_cached(
+        sheet_columns, loaded_columns
+    ):
+        return None
+    return workbook
+
+
+def _cache_path(identity: FileIdentity) -> Path:
+    name = hashlib.sha1(identity.path.encode("utf-8")).hexdigest()
+    return Path(CACHE_DIR, f"{name}.pickle")
+
+
+def _read_cache(
+    identity: FileIdentity, sheet_columns: dict[str, list[int]]
+) -> dict[str, list[tuple]] | None:
+    """Return the cached sheets, or None on a miss."""
+    try:
+        with open(_cache_path(identity), "rb") as f_cache:
+            cached = pickle.load(f_cache)
+    except FileNotFoundError:
+        return None
+    except Exception as err:
+        logger.warning(f"Workbook cache unreadable: {err}")
+        return None
+
+    if (
+        cached.get("version") != CACHE_VERSION
+        or cached.get("identity") != tuple(identity)
+        or not _columns_cached(sheet_columns, cached["sheet_columns"])
+    ):
+        return None
+    logger.info(f"Workbook loaded from cache {identity.path}")
+    return cached["sheets"]
+
+
+def _columns_cached(
+    sheet_columns: dict[str, list[int]], cached_columns: dict[str, list[int]]
+) -> bool:
+    """Return True if every requested column was read into the cache."""
+    return all(
+        sheet_name in cached_columns
+        and set(columns) <= set(cached_columns[sheet_name])
+        for sheet_name, columns in sheet_columns.items()
+    )
+
+
+def _write_cache(
+    identity: FileIdentity,
+    sheet_columns: dict[str, list[int]],
+    sheets: dict[str, list[tuple]],
+) -> None:
+    cache_path = _cache_path(identity)
+    cached = {
+        "version": CACHE_VERSION,
+        "identity": tuple(identity),
+        "sheet_columns": dict(sheet_columns),
+        "sheets": sheets,
+    }
+    temp_path = None
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # A temp file of its own, so concurrent writers never share one
+        with tempfile.NamedTemporaryFile(
+            dir=cache_path.parent, suffix=".tmp", delete=False
+        ) as f_cache:
+            temp_path = f_cache.name
+            pickle.dump(cached, f_cache, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except OSError as err:
+        logger.warning(f"Workbook cache not saved: {err}")
+        if temp_path:
+            Path(temp_path).unlink(missing_ok=True)
+
+
+def _parse_workbook(
+    path: Path,
+    sheet_columns: dict[str, list[int]],
+    where: dict[str, DateRange] | None = None,
+    progress: Progress | None = None,
+) -> dict[str, list[tuple]]:
+    """Return the rows of each named sheet present in the workbook."""
+    # Imported here: openpyxl is only needed on a cache miss
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    from directors_rota.sheet_reader import read_sheets
+
+    try:
+        return read_sheets(path, sheet_columns, where, progress)
+    except (BadZipFile, InvalidFileException, KeyError) as err:
+        raise InvalidWorkbookError(f"{path} {err}") from err
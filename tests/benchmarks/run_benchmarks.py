@@ -0,0 +1,228 @@
+"""Time the rota pipeline on synthetic workbooks and save the results.
+
+Each size is YEARS:DIRECTORS. Emails are sent to a local SMTP stand-in,
+so nothing leaves the machine.
+
+    python tests/benchmarks/run_benchmarks.py --size 1:10 --size 20:1000
+
+The results are written as JSON, by default to
+tests/benchmarks/results/<version>.json, for comparison across releases.
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import smtplib
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parents[1]))
+
+from synthetic_workbook import FIRST_MONDAY, write_workbook  # noqa: E402
+
+from directors_rota import config as config_module  # noqa: E402
+from directors_rota import rota_store, workbook_cache  # noqa: E402
+from directors_rota._version import __version__  # noqa: E402
+from directors_rota.config import (  # noqa: E402
+    get_env,
+    invalidate_config,
+    read_profile,
+    update_config,
+)
+from directors_rota.emails import dispatch_emails  # noqa: E402
+from directors_rota.process import (  # noqa: E402
+    RotaData,
+    _create_rota_email,
+    _date_limits,
+    _generate_rota_list,
+    _get_rota,
+    _get_session_rotas,
+    _get_sheets,
+    _get_workbook,
+    _sheet_columns,
+    get_directors,
+    session_columns,
+)
+
+from local_smtp import LocalSMTPServer  # noqa: E402
+
+DEFAULT_SIZES = ['1:10', '5:100', '20:1000']
+RESULTS_DIR = Path(Path(__file__).parent, 'results')
+TEMPLATE = 'Rota for <month>\n<rota>\n\nDear <first_name>\n<my_dates>\n'
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--size', action='append', type=_size,
+        help=f"YEARS:DIRECTORS (default: {' '.join(DEFAULT_SIZES)})")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument(
+        '--output', type=Path,
+        default=Path(RESULTS_DIR, f'{__version__}.json'))
+    args = parser.parse_args()
+    sizes = args.size or [_size(size) for size in DEFAULT_SIZES]
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with benchmark_config(Path(temp_dir)):
+            for years, directors in sizes:
+                results.extend(
+                    run_size(Path(temp_dir), years, directors, args.repeat))
+
+    report = {
+        'version': __version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'repeat': args.repeat,
+        'results': results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2), encoding='utf-8')
+    for result in results:
+        print(f"{result['years']:>3}y {result['directors']:>5}d "
+              f"{result['name']:<24} {result['best'] * 1000:10.2f} ms")
+    print(f'Results written to {args.output}')
+
+
+@contextlib.contextmanager
+def benchmark_config(temp_dir: Path):
+    """Point the config, reminder queue and rota store at temp_dir.
+
+    The benchmark sends to synthetic directors, some of whom want
+    reminders: none of that may reach the user's reminder queue or
+    history of emails sent. The user's config file is copied, not changed.
+    """
+    config = read_profile(config_module.CONFIG_PATH)
+    config.update(
+        'email_reminder_dir', str(Path(temp_dir, 'reminders')), force=True)
+    config.update('rota_store', False, force=True)
+    config.path = Path(temp_dir, 'config.toml')
+    config.save()
+
+    saved = (config_module.CONFIG_PATH, rota_store.STORE_PATH,
+             workbook_cache.CACHE_DIR)
+    config_module.CONFIG_PATH = config.path
+    rota_store.STORE_PATH = Path(temp_dir, 'rotas.sqlite')
+    invalidate_config()
+    try:
+        yield
+    finally:
+        (config_module.CONFIG_PATH, rota_store.STORE_PATH,
+         workbook_cache.CACHE_DIR) = saved
+        invalidate_config()
+
+
+def run_size(
+        temp_dir: Path, years: int, directors: int, repeat: int) -> list[dict]:
+    """Return the timings for a workbook of the given size."""
+    workbook_path = write_workbook(
+        Path(temp_dir, f'rota-{years}y-{directors}d.xlsx'), years, directors)
+    template_path = Path(temp_dir, 'template.txt')
+    template_path.write_text(TEMPLATE, encoding='utf-8')
+    workbook_cache.CACHE_DIR = Path(temp_dir, f'cache-{years}-{directors}')
+
+    config = update_config({
+        'workbook_dir': str(temp_dir),
+        'workbook_file_name': workbook_path.name,
+        'email_template': str(template_path),
+    })
+    sheet_columns = _sheet_columns(config)
+    month = FIRST_MONDAY + datetime.timedelta(days=years * 365 // 2)
+    (start_date, end_date) = _date_limits(month)
+
+    timings = {}
+
+    def _time(name, function, setup=None):
+        times = []
+        for _ in range(repeat):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            value = function()
+            times.append(time.perf_counter() - start)
+        timings[name] = times
+        return value
+
+    def _clear_cache():
+        workbook_cache.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        for path in workbook_cache.CACHE_DIR.glob('*'):
+            path.unlink()
+        workbook_cache._loaded.clear()
+
+    _time('_get_workbook (parse)',
+          lambda: _get_workbook(workbook_path, sheet_columns),
+          setup=_clear_cache)
+    workbook = _time('_get_workbook (cached)',
+                     lambda: _get_workbook(workbook_path, sheet_columns))
+    (sheets, _) = _time(
+        '_get_sheets',
+        lambda: _get_sheets(
+            workbook, [config.main_sheet, config.directors_sheet]))
+    main_sheet = sheets[config.main_sheet]
+    directors_sheet = sheets[config.directors_sheet]
+    registry = _time(
+        'get_directors', lambda: get_directors(config, directors_sheet))
+
+    def _reset_dates():
+        for director in registry.values():
+            director.dates = []
+
+    _time('_get_rota',
+          lambda: _get_rota(month, config, main_sheet, registry),
+          setup=_reset_dates)
+
+    _reset_dates()
+    rota_data = RotaData(start_date, end_date, main_sheet, registry)
+    rota = _generate_rota_list(
+        _get_session_rotas(session_columns(config), rota_data))
+    text = _time('_create_rota_email',
+                 lambda: _create_rota_email(config, start_date, rota))
+
+    # send_emails always uses SMTP_SSL: time dispatch_emails, which it
+    # wraps, with plain SMTP to the stand-in
+    environ = dict(os.environ)
+    with LocalSMTPServer() as server:
+        os.environ.update(server.env())
+        get_env.cache_clear()
+        try:
+            _time('send_emails',
+                  lambda: dispatch_emails(
+                      text, registry, rate_limit=0, smtp_class=smtplib.SMTP))
+        finally:
+            os.environ.clear()
+            os.environ.update(environ)
+            get_env.cache_clear()
+
+    return [
+        {
+            'years': years,
+            'directors': directors,
+            'rows': len(main_sheet.rows),
+            'name': name,
+            'best': min(times),
+            'mean': statistics.fmean(times),
+            'times': times,
+        }
+        for name, times in timings.items()
+    ]
+
+
+def _size(text: str) -> tuple[int, int]:
+    try:
+        (years, directors) = (int(part) for part in text.split(':'))
+    except ValueError as err:
+        raise argparse.ArgumentTypeError(
+            f"invalid size '{text}', expected YEARS:DIRECTORS") from err
+    return (years, directors)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Write synthetic directors-rota.xlsx workbooks for the benchmarks.
+
+The layout follows tests/test_data/directors-rota.xlsx: the Main sheet
+has a row a week with Monday, Wednesday and Thursday dates, each followed
+by the director's initials; the Directors sheet has initials, name,
+email, username, active and send reminder columns.
+
+    python tests/benchmarks/synthetic_workbook.py --years 20 \\
+        --directors 1000 directors-rota-20y.xlsx
+"""
+
+import argparse
+import datetime
+import itertools
+import string
+from pathlib import Path
+
+from openpyxl import Workbook
+
+FIRST_MONDAY = datetime.datetime(2020, 1, 6)
+SESSION_OFFSETS = (0, 2, 3)
+MISSING_EVERY = 50
+
+
+def write_workbook(path: Path, years: int, directors: int) -> Path:
+    """Write a workbook with years of weekly sessions and the directors."""
+    initials = list(itertools.islice(_initials(), directors))
+    workbook = Workbook(write_only=True)
+
+    main_sheet = workbook.create_sheet('Main')
+    main_sheet.append([
+        'Mondays', 'Director', 'stand in',
+        'Wednesdays', 'Director', 'stand in',
+        'Thursdays', 'Director',
+    ])
+    for week in range(years * 52):
+        monday = FIRST_MONDAY + datetime.timedelta(weeks=week)
+        row = []
+        for session, offset in enumerate(SESSION_OFFSETS):
+            number = week * len(SESSION_OFFSETS) + session
+            director = (
+                None if number % MISSING_EVERY == MISSING_EVERY - 1
+                else initials[number % directors])
+            row.extend([monday + datetime.timedelta(days=offset), director])
+            if session < len(SESSION_OFFSETS) - 1:
+                row.append(None)
+        main_sheet.append(row)
+
+    directors_sheet = workbook.create_sheet('Directors')
+    directors_sheet.append(
+        ['Initials', 'Names', 'Email', 'username', 'Active', 'Reminder'])
+    for number, director in enumerate(initials):
+        directors_sheet.append([
+            director,
+            f'Director {director} Number{number}',
+            f'director{number}@example.com',
+            f'director{number}',
+            True,
+            number % 3 == 0,
+        ])
+
+    workbook.save(path)
+    return path
+
+
+def _initials():
+    for size in itertools.count(2):
+        for letters in itertools.product(string.ascii_uppercase, repeat=size):
+            yield ''.join(letters)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', type=Path)
+    parser.add_argument('--years', type=int, default=1)
+    parser.add_argument('--directors', type=int, default=10)
+    args = parser.parse_args()
+    write_workbook(args.path, args.years, args.directors)
+
+
+if __name__ == '__main__':
+    main()
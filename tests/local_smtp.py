@@ -0,0 +1,136 @@
+"""A minimal SMTP server on localhost, standing in for the mail server.
+
+It accepts any login and keeps the messages it receives:
+
+    with LocalSMTPServer() as server:
+        monkeypatch.setenv('SMTP_PORT', str(server.port))
+        ...
+        assert server.messages[0].recipients == ['a@example.com']
+"""
+
+import base64
+import socketserver
+import threading
+from typing import NamedTuple
+
+
+class Message(NamedTuple):
+    sender: str
+    recipients: list[str]
+    data: str
+
+
+class LocalSMTPServer:
+    """An SMTP server on a free port, run on a thread as a context manager."""
+    def __init__(self, host: str = '127.0.0.1', port: int = 0) -> None:
+        self.messages = []
+        self.logins = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.server = _Server((host, port), _Handler)
+        self.server.owner = self
+        self.thread = None
+
+    def __enter__(self) -> 'LocalSMTPServer':
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    @property
+    def host(self) -> str:
+        return self.server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def env(self) -> dict[str, str]:
+        """Return the environment variables to send through this server."""
+        return {
+            'SMTP_SERVER': self.host,
+            'SMTP_PORT': str(self.port),
+            'EMAIL_SENDER': 'rota@example.com',
+            'EMAIL_KEY': 'secret',
+        }
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        owner = self.server.owner
+        with owner.lock:
+            owner.connections += 1
+        self._reply('220 localhost ESMTP')
+        sender = ''
+        recipients = []
+        while line := self.rfile.readline():
+            command = line.decode('utf-8').rstrip('\r\n')
+            verb = command[:4].upper()
+            if verb == 'EHLO':
+                self._reply('250-localhost', '250 AUTH PLAIN LOGIN')
+            elif verb == 'HELO':
+                self._reply('250 localhost')
+            elif verb == 'AUTH':
+                user = self._authenticate(command.split()[1:])
+                with owner.lock:
+                    owner.logins.append(user)
+                self._reply('235 Authentication successful')
+            elif verb == 'MAIL':
+                sender = _address(command)
+                recipients = []
+                self._reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(_address(command))
+                self._reply('250 OK')
+            elif verb == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                message = Message(sender, recipients, self._read_data())
+                with owner.lock:
+                    owner.messages.append(message)
+                self._reply('250 OK')
+            elif verb in ('RSET', 'NOOP'):
+                self._reply('250 OK')
+            elif verb == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('502 Command not implemented')
+
+    def _authenticate(self, args: list[str]) -> str:
+        mechanism = args[0].upper() if args else ''
+        if mechanism == 'PLAIN':
+            response = args[1] if len(args) > 1 else self._challenge('')
+            return base64.b64decode(response).split(b'\0')[1].decode()
+        user = self._challenge('VXNlcm5hbWU6')
+        self._challenge('UGFzc3dvcmQ6')
+        return base64.b64decode(user).decode()
+
+    def _challenge(self, prompt: str) -> str:
+        self._reply(f'334 {prompt}')
+        return self.rfile.readline().decode('utf-8').strip()
+
+    def _read_data(self) -> str:
+        lines = []
+        while line := self.rfile.readline():
+            line = line.decode('utf-8').rstrip('\r\n')
+            if line == '.':
+                break
+            lines.append(line[1:] if line.startswith('..') else line)
+        return '\n'.join(lines)
+
+    def _reply(self, *lines: str) -> None:
+        self.wfile.write(''.join(f'{line}\r\n' for line in lines).encode())
+
+
+def _address(command: str) -> str:
+    return command.split(':', 1)[1].split()[0].strip('<>')
@@ -0,0 +1,80 @@
+import datetime
+import os
+from pathlib import Path
+
+from directors_rota.batch import BatchJob, run_batch, run_job
+
+TEST_DATA = Path('tests', 'test_data').resolve()
+
+
+def _profile(tmp_path):
+    template = Path(tmp_path, 'template.txt')
+    template.write_text('Rota for <month>\n<rota>\n', encoding='utf-8')
+    path = Path(tmp_path, 'profile.toml')
+    path.write_text(
+        f'email_template = "{template}"\n'
+        'rota_store = false\n'
+        'workbook_cache = false\n',
+        encoding='utf-8')
+    return path
+
+
+def test_failed_job_does_not_stop_the_others(tmp_path):
+    profile = _profile(tmp_path)
+    not_a_workbook = Path(tmp_path, 'broken.xlsx')
+    not_a_workbook.write_text('not a workbook', encoding='utf-8')
+    month = datetime.date(2023, 5, 1)
+    jobs = [
+        BatchJob(Path(TEST_DATA, 'directors-rota.xlsx'), profile, month),
+        BatchJob(Path(tmp_path, 'missing.xlsx'), profile, month),
+        BatchJob(not_a_workbook, profile, month),
+    ]
+
+    report = run_batch(jobs, workers=2)
+
+    assert [result.job for result in report.results] == jobs
+    (good, missing, broken) = report.results
+    assert not good.error
+    assert '01/05/23, Lynne Marlow' in good.email
+    assert missing.error and broken.error
+    assert report.succeeded == [good]
+    assert report.issue_counts() == good.diagnostics.counts()
+
+
+def test_invalid_profile_fails_job(tmp_path):
+    workbook = Path(TEST_DATA, 'directors-rota.xlsx')
+    month = datetime.date(2023, 5, 1)
+    invalid = Path(tmp_path, 'invalid.toml')
+    invalid.write_text('main_sheet = = "Main"\n', encoding='utf-8')
+
+    missing = run_job(
+        BatchJob(workbook, Path(tmp_path, 'missing.toml'), month))
+    not_toml = run_job(BatchJob(workbook, invalid, month))
+
+    assert 'missing.toml not found' in missing.error
+    assert 'not valid TOML' in not_toml.error
+    assert missing.email is None and not_toml.email is None
+
+
+def _crash_or_run(job):
+    """Kill the worker for the missing workbook, as a segfault would."""
+    if job.workbook.name == 'crash.xlsx':
+        os._exit(1)
+    return run_job(job)
+
+
+def test_dead_worker_does_not_stop_the_others(tmp_path):
+    profile = _profile(tmp_path)
+    month = datetime.date(2023, 5, 1)
+    workbook = Path(TEST_DATA, 'directors-rota.xlsx')
+    jobs = [
+        BatchJob(workbook, profile, month),
+        BatchJob(Path(tmp_path, 'crash.xlsx'), profile, month),
+        BatchJob(workbook, profile, month),
+    ]
+
+    report = run_batch(jobs, workers=2, run=_crash_or_run)
+
+    assert [result.error for result in report.results] == [
+        '', 'Worker process died', '']
+    assert '01/05/23, Lynne Marlow' in report.results[2].email
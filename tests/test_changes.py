@@ -0,0 +1,173 @@
+import datetime
+import smtplib
+from pathlib import Path
+
+import pytest
+
+from directors_rota import changes, rota_store
+from directors_rota.changes import (
+    Change,
+    ChangeSet,
+    change_emails,
+    find_changes,
+    record_changes,
+    send_changes,
+    update_reminders,
+)
+from directors_rota.config import get_env
+from directors_rota.process import Director, DirectorData, DirectorRegistry
+from directors_rota.reminders import ReminderQueue
+from directors_rota.rota_store import RotaStore
+
+from local_smtp import LocalSMTPServer
+
+SESSIONS = [('Monday', 0), ('Wednesday', 3)]
+ROWS = [
+    ('Mondays', 'Director', None, 'Wednesdays', 'Director'),
+    (datetime.datetime(2030, 2, 4), 'AB', None,
+     datetime.datetime(2030, 2, 6), 'CD'),
+    (datetime.datetime(2030, 2, 11), 'CD', None,
+     datetime.datetime(2030, 2, 13), 'EF'),
+    (datetime.datetime(2030, 2, 18), 'EF', None,
+     datetime.datetime(2030, 2, 20), 'AB'),
+]
+
+
+def director(initials, send_reminder=False, active=True):
+    return Director(DirectorData(
+        initials, f'{initials} Director', f'{initials.lower()}@example.com',
+        initials.lower(), active, send_reminder))
+
+
+DIRECTORS = DirectorRegistry([director('AB'), director('CD'), director('EF')])
+
+
+@pytest.fixture
+def server(monkeypatch):
+    with LocalSMTPServer() as server:
+        for name, value in server.env().items():
+            monkeypatch.setenv(name, value)
+        get_env.cache_clear()
+        yield server
+    get_env.cache_clear()
+
+
+def _swap(rows):
+    """Swap the Monday directors on 11/02 and 18/02."""
+    edited = list(rows)
+    edited[2] = edited[2][:1] + ('EF',) + edited[2][2:]
+    edited[3] = edited[3][:1] + ('CD',) + edited[3][2:]
+    return edited
+
+
+def test_find_changes_reads_only_changed_rows(monkeypatch):
+    (first, previous) = find_changes(ROWS, SESSIONS, {})
+    assert len(first) == 6
+
+    read = []
+    row_assignments = changes._row_assignments
+
+    def _row_assignments(row, sessions):
+        read.append(row)
+        return row_assignments(row, sessions)
+
+    monkeypatch.setattr(changes, '_row_assignments', _row_assignments)
+    (found, rows) = find_changes(_swap(ROWS), SESSIONS, previous)
+
+    assert found == [
+        Change(datetime.datetime(2030, 2, 11), 'Monday', 'CD', 'EF'),
+        Change(datetime.datetime(2030, 2, 18), 'Monday', 'EF', 'CD'),
+    ]
+    assert len(read) == 2
+    assert rows[1] == previous[1]
+
+    (removed, _) = find_changes(ROWS[:3], SESSIONS, previous)
+    assert [(change.old, change.new) for change in removed] == [
+        ('EF', None), ('AB', None)]
+
+
+def test_change_emails_only_to_affected_directors():
+    (_, previous) = find_changes(ROWS, SESSIONS, {})
+    (found, rows) = find_changes(_swap(ROWS), SESSIONS, previous)
+    change_set = ChangeSet('book', found, rows, DIRECTORS, False)
+
+    bodies = change_emails(change_set, today=datetime.date(2030, 1, 1))
+
+    assert sorted(bodies) == ['CD', 'EF']
+    assert 'Monday 11 Feb 2030 (Monday): you are no longer' in bodies['CD']
+    assert 'Monday 18 Feb 2030 (Monday): you are now' in bodies['CD']
+    assert change_emails(change_set, today=datetime.date(2030, 3, 1)) == {}
+
+
+def test_change_emails_not_sent_to_inactive_directors():
+    (_, previous) = find_changes(ROWS, SESSIONS, {})
+    (found, rows) = find_changes(_swap(ROWS), SESSIONS, previous)
+    directors = DirectorRegistry([
+        director('AB'), director('CD'), director('EF', active=False)])
+    change_set = ChangeSet('book', found, rows, directors, False)
+
+    bodies = change_emails(change_set, today=datetime.date(2030, 1, 1))
+    assert sorted(bodies) == ['CD']
+
+
+def test_send_changes_records_rows(tmp_path, server, monkeypatch):
+    monkeypatch.setattr(
+        rota_store, 'STORE_PATH', Path(tmp_path, 'rotas.sqlite'))
+    store = RotaStore()
+    (_, previous) = find_changes(ROWS, SESSIONS, {})
+    (found, rows) = find_changes(_swap(ROWS), SESSIONS, previous)
+    change_set = ChangeSet('book', found, rows, DIRECTORS, False)
+
+    report = send_changes(
+        change_set, smtplib.SMTP, store, ReminderQueue(tmp_path),
+        today=datetime.date(2030, 1, 1))
+
+    assert sorted(result.initials for result in report.sent) == ['CD', 'EF']
+    assert sorted(message.recipients[0] for message in server.messages) == [
+        'cd@example.com', 'ef@example.com']
+    assert store.row_hashes('book')[3][0] == rows[3].hash
+    assert len(store.sent(month=datetime.date(2030, 2, 1))) == 2
+    store.close()
+
+
+def test_reminders_move_to_new_director(tmp_path):
+    queue = ReminderQueue(tmp_path)
+    for initials, day in (('CD', 11), ('EF', 18), ('AB', 20)):
+        queue.add(datetime.datetime(2030, 2, day - 1, 6), initials,
+                  datetime.date(2030, 2, day), 'x@example.com', 'Rota', '')
+    directors = DirectorRegistry([
+        director('AB'), director('CD', True), director('EF')])
+    (_, previous) = find_changes(ROWS, SESSIONS, {})
+    (found, rows) = find_changes(_swap(ROWS), SESSIONS, previous)
+
+    queued = update_reminders(
+        ChangeSet('book', found, rows, directors, False), queue)
+
+    # CD now directs on 18/02 and is sent reminders; EF is not
+    assert queued == 1
+    far_future = datetime.datetime(2031, 1, 1)
+    assert [(reminder.initials, reminder.rota_date)
+            for reminder in queue.due(far_future)] == [
+        ('CD', datetime.date(2030, 2, 18)),
+        ('AB', datetime.date(2030, 2, 20)),
+    ]
+    queue.close()
+
+
+def test_record_changes_moves_reminders(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        rota_store, 'STORE_PATH', Path(tmp_path, 'rotas.sqlite'))
+    store = RotaStore()
+    queue = ReminderQueue(tmp_path)
+    queue.add(datetime.datetime(2030, 2, 10, 6), 'CD',
+              datetime.date(2030, 2, 11), 'x@example.com', 'Rota', '')
+    (_, previous) = find_changes(ROWS, SESSIONS, {})
+    (found, rows) = find_changes(_swap(ROWS), SESSIONS, previous)
+
+    record_changes(
+        ChangeSet('book', found, rows, DIRECTORS, False), store, queue)
+
+    assert queue.due(datetime.datetime(2031, 1, 1)) == []
+    assert store.row_hashes('book')[3][0] == rows[3].hash
+    queue.close()
+    store.close()
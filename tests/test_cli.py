@@ -0,0 +1,65 @@
+import datetime
+import subprocess
+import sys
+
+import pytest
+
+from directors_rota.cli import _generate, _month, _parser
+from directors_rota.timing import PROFILE_PATH, profile_path
+
+NO_GUI_CHECK = """
+import sys
+import directors_rota.cli
+gui = [name for name in sys.modules
+       if name.startswith('directors_rota.forms')
+       or name in ('directors_rota.root', 'directors_rota.main_menu',
+                   'tkinter')]
+print(gui)
+sys.exit(1 if gui else 0)
+"""
+
+
+def test_cli_does_not_import_gui():
+    result = subprocess.run(
+        [sys.executable, '-c', NO_GUI_CHECK], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout
+
+
+def test_month():
+    assert _month('Nov 2026') == datetime.date(2026, 11, 1)
+
+
+def test_generate_args():
+    args = _parser().parse_args(
+        ['generate', '--month', 'Nov 2026', '--send', '--dry-run'])
+    assert args.month == datetime.date(2026, 11, 1)
+    assert args.send and args.dry_run
+
+
+def test_profile_args():
+    args = _parser().parse_args(['--profile-path', 'run.txt', 'generate'])
+    assert str(profile_path(args)) == 'run.txt'
+    assert profile_path(_parser().parse_args(['generate'])) is None
+
+
+def test_bare_profile_flag():
+    args = _parser().parse_args(['--profile', 'generate'])
+    assert args.command is _generate
+    assert profile_path(args) == PROFILE_PATH
+
+
+def test_invalid_month():
+    with pytest.raises(SystemExit):
+        _parser().parse_args(['generate', '--month', 'Smarch'])
+
+
+def test_batch_args():
+    args = _parser().parse_args(
+        ['batch', '--job', 'a.xlsx,a.toml,Nov 2026', '--job', 'b.xlsx,,May 23',
+         '--workers', '2'])
+    assert [(str(job.workbook), job.profile and str(job.profile))
+            for job in args.jobs] == [('a.xlsx', 'a.toml'), ('b.xlsx', None)]
+    assert args.jobs[1].month == datetime.date(2023, 5, 1)
+    assert args.workers == 2
+    with pytest.raises(SystemExit):
+        _parser().parse_args(['batch', '--job', 'a.xlsx'])
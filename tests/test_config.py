@@ -0,0 +1,64 @@
+import os
+from pathlib import Path
+
+from directors_rota import config as config_module
+from directors_rota.config import invalidate_config, read_config, update_config
+
+
+def test_read_config_is_memoized(tmp_path, monkeypatch):
+    path = Path(tmp_path, 'config.toml')
+    path.write_text('main_sheet = "Main"\n', encoding='utf-8')
+    monkeypatch.setattr(config_module, 'CONFIG_PATH', path)
+    invalidate_config()
+
+    config = read_config()
+    assert read_config() is config
+
+    path.write_text('main_sheet = "Rota"\n', encoding='utf-8')
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    changed = read_config()
+    assert changed is not config
+    assert changed.main_sheet == 'Rota'
+    assert changed.directors_sheet == 'Directors'
+    invalidate_config()
+
+
+def test_invalidate_config(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        config_module, 'CONFIG_PATH', Path(tmp_path, 'config.toml'))
+    invalidate_config()
+    config = read_config()
+    invalidate_config()
+    assert read_config() is not config
+    invalidate_config()
+
+
+def test_update_config_leaves_shared_config(tmp_path, monkeypatch):
+    path = Path(tmp_path, 'config.toml')
+    path.write_text('main_sheet = "Main"\n', encoding='utf-8')
+    monkeypatch.setattr(config_module, 'CONFIG_PATH', path)
+    invalidate_config()
+    config = read_config()
+
+    updated = update_config({'workbook_file_name': 'other.xlsx'})
+
+    assert config.workbook_file_name != 'other.xlsx'
+    assert updated.workbook_file_name == 'other.xlsx'
+    assert updated.config['workbook_file_name'] == 'other.xlsx'
+    assert read_config() is updated
+    assert updated.main_sheet == 'Main'
+    invalidate_config()
+
+
+def test_empty_table_survives_save(tmp_path, monkeypatch):
+    path = Path(tmp_path, 'config.toml')
+    monkeypatch.setattr(config_module, 'CONFIG_PATH', path)
+    invalidate_config()
+
+    saved = update_config({'main_sheet': 'Rota'})
+
+    assert '[sessions]' in path.read_text(encoding='utf-8')
+    assert saved.sessions == {}
+    assert saved.config['geometry'] == {}
+    invalidate_config()
@@ -0,0 +1,78 @@
+import datetime
+
+from directors_rota.date_index import (
+    DateIndex,
+    DateRange,
+    RotaEntry,
+    as_datetime,
+    filter_rows,
+)
+
+ROWS = [
+    ('Mondays', 'Director', 'Wednesdays', 'Director'),
+    (datetime.datetime(2026, 1, 26), 'AB',
+     datetime.datetime(2026, 1, 28), 'CD'),
+    (datetime.datetime(2026, 2, 2), 'CD', datetime.datetime(2026, 2, 4), None),
+    (datetime.datetime(2026, 2, 23), 'AB', datetime.date(2026, 2, 25), 'EF'),
+    (datetime.datetime(2026, 3, 2), 'EF', None, None),
+]
+SESSIONS = [('Monday', 0), ('Wednesday', 2)]
+
+
+def test_between_month():
+    date_index = DateIndex.from_rows(ROWS, SESSIONS)
+    entries = date_index.between(
+        datetime.datetime(2026, 2, 1), datetime.datetime(2026, 3, 1))
+    assert entries == [
+        RotaEntry(datetime.datetime(2026, 2, 2), 'Monday', 'CD'),
+        RotaEntry(datetime.datetime(2026, 2, 4), 'Wednesday', None),
+        RotaEntry(datetime.datetime(2026, 2, 23), 'Monday', 'AB'),
+        RotaEntry(datetime.datetime(2026, 2, 25), 'Wednesday', 'EF'),
+    ]
+
+
+def test_between_arbitrary_range():
+    date_index = DateIndex.from_rows(ROWS, SESSIONS)
+    assert len(date_index) == 7
+    entries = date_index.between(
+        datetime.date(2026, 1, 28), datetime.date(2026, 2, 3))
+    assert [entry.initials for entry in entries] == ['CD', 'CD']
+    assert date_index.between(
+        datetime.date(2027, 1, 1), datetime.date(2027, 2, 1)) == []
+
+
+FEBRUARY = DateRange(
+    datetime.datetime(2026, 2, 1), datetime.datetime(2026, 3, 1), (0, 2))
+
+
+class CountedRows:
+    def __init__(self, rows):
+        self.rows = rows
+        self.read = 0
+
+    def __iter__(self):
+        for row in self.rows:
+            self.read += 1
+            yield row
+
+
+def test_filter_rows_stops_after_sorted_range():
+    rows = CountedRows(ROWS + [(datetime.datetime(2026, 3, 9), 'AB',
+                                datetime.datetime(2026, 3, 11), 'CD')])
+    filtered = list(filter_rows(rows, FEBRUARY))
+    assert filtered == ROWS[2:4]
+    assert rows.read == 6
+
+
+def test_filter_rows_reads_on_when_unsorted():
+    late_row = (datetime.datetime(2026, 2, 9), 'EF', None, None)
+    rows = CountedRows([ROWS[4], ROWS[1], ROWS[2], late_row])
+    assert list(filter_rows(rows, FEBRUARY)) == [ROWS[2], late_row]
+    assert rows.read == 4
+
+
+def test_as_datetime():
+    assert as_datetime(datetime.date(2026, 2, 25)) == datetime.datetime(
+        2026, 2, 25)
+    assert as_datetime(datetime.datetime(2026, 2, 25, 19)).hour == 19
+    assert as_datetime('Mondays') is None
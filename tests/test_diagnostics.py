@@ -0,0 +1,100 @@
+import datetime
+
+import pytest
+
+from directors_rota import process
+from directors_rota.date_index import DateIndex
+from directors_rota.diagnostics import (
+    EMPTY_PERIOD,
+    MISSING_DIRECTOR,
+    UNKNOWN_INITIALS,
+    Diagnostics,
+    cell_name,
+)
+from directors_rota.process import (
+    Director,
+    DirectorData,
+    DirectorRegistry,
+    RotaData,
+    _get_session_rotas,
+    _index_sheet,
+)
+from directors_rota.workbook_cache import CachedSheet
+
+SESSIONS = (('Monday', 0), ('Wednesday', 3))
+ROWS = [
+    ('Mondays', 'Director', None, 'Wednesdays', 'Director'),
+    (datetime.datetime(2026, 1, 26), 'AB', None, None, None),
+    (datetime.datetime(2026, 2, 2), None, None, None, None),
+    (datetime.datetime(2026, 2, 9), 'ZZ', None, None, None),
+    (datetime.datetime(2026, 2, 16), 'AB', None, None, None),
+    (datetime.datetime(2026, 3, 2), 'AB', None, None, None),
+]
+
+
+def _rota_data(main_sheet):
+    directors = DirectorRegistry([Director(DirectorData(
+        'AB', 'Anne Brown', 'ab@example.com', 'ab', True, False))])
+    return RotaData(
+        datetime.datetime(2026, 2, 1),
+        datetime.datetime(2026, 3, 1),
+        main_sheet,
+        directors,
+        Diagnostics('Main'),
+    )
+
+
+def test_cell_name():
+    assert cell_name(0, 1) == 'A1'
+    assert cell_name(25, 10) == 'Z10'
+    assert cell_name(26, 3) == 'AA3'
+    assert cell_name(701, 2) == 'ZZ2'
+
+
+def _index_date_index(main_sheet):
+    process._date_indexes[main_sheet] = {
+        SESSIONS: DateIndex.from_numbered_rows(enumerate(ROWS, 1), SESSIONS)}
+
+
+def _index_table(main_sheet):
+    pytest.importorskip('numpy')
+    _index_sheet(main_sheet, SESSIONS)
+
+
+@pytest.mark.parametrize('build_index', [
+    None, _index_date_index, _index_table])
+def test_issues_have_cells(build_index):
+    main_sheet = CachedSheet('Main', ROWS)
+    if build_index:
+        build_index(main_sheet)
+    rota_data = _rota_data(main_sheet)
+
+    day_rotas = _get_session_rotas(SESSIONS, rota_data)
+
+    assert day_rotas[0].day_rota == ['16/02/26, Anne Brown']
+    diagnostics = rota_data.diagnostics
+    assert [(issue.kind, issue.cell) for issue in diagnostics.issues] == [
+        (MISSING_DIRECTOR, 'Main!B3'),
+        (UNKNOWN_INITIALS, 'Main!B4'),
+        (EMPTY_PERIOD, None),
+    ]
+    assert diagnostics.issues[1].initials == 'ZZ'
+    assert diagnostics.issues[2].session == 'Wednesday'
+    assert diagnostics.rows == 1
+    assert diagnostics.counts() == {
+        MISSING_DIRECTOR: 1, UNKNOWN_INITIALS: 1, EMPTY_PERIOD: 1}
+
+
+def test_report():
+    diagnostics = Diagnostics('Main')
+    for day in range(1, 4):
+        diagnostics.missing_director(
+            'Monday', datetime.datetime(2026, 2, day), f'B{day}')
+    diagnostics.empty_period('Wednesday', datetime.datetime(2026, 2, 1))
+
+    assert diagnostics.report(limit=2).splitlines() == [
+        'Main!B1 No director allocated for Monday 01 Feb 2026',
+        'Main!B2 No director allocated for Monday 02 Feb 2026',
+        '... and 2 more',
+    ]
+    assert str(diagnostics.issues[-1]) == 'No Wednesday dates in Feb 2026'
@@ -0,0 +1,185 @@
+import smtplib
+from smtplib import SMTPRecipientsRefused, SMTPServerDisconnected
+
+import pytest
+from psiutils.constants import Status
+
+from directors_rota.config import get_env
+from directors_rota.emails import SmtpSession, dispatch_emails
+from directors_rota.process import Director, DirectorData, DirectorRegistry
+from directors_rota.progress import Progress
+
+from local_smtp import LocalSMTPServer
+
+
+class FakeSMTP:
+    connections = []
+
+    def __init__(self, host, port):
+        self.sent = []
+        self.logins = 0
+        self.closed = False
+        FakeSMTP.connections.append(self)
+
+    def login(self, user, password):
+        self.logins += 1
+
+    def sendmail(self, sender, recipient, message):
+        if self.closed:
+            raise SMTPServerDisconnected()
+        self.sent.append(recipient)
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+def test_session_shares_one_connection():
+    FakeSMTP.connections = []
+    with SmtpSession(FakeSMTP) as session:
+        for recipient in ('a@example.com', 'b@example.com', 'c@example.com'):
+            session.send('rota@example.com', recipient, 'text')
+
+    assert len(FakeSMTP.connections) == 1
+    server = FakeSMTP.connections[0]
+    assert server.logins == 1
+    assert len(server.sent) == 3
+    assert server.closed
+
+
+def test_session_reconnects_when_dropped():
+    FakeSMTP.connections = []
+    with SmtpSession(FakeSMTP) as session:
+        session.send('rota@example.com', 'a@example.com', 'text')
+        FakeSMTP.connections[0].closed = True
+        session.send('rota@example.com', 'b@example.com', 'text')
+
+    assert len(FakeSMTP.connections) == 2
+    assert FakeSMTP.connections[1].sent == ['b@example.com']
+
+
+class ResetSMTP(FakeSMTP):
+    def sendmail(self, sender, recipient, message):
+        if self.closed:
+            raise ConnectionResetError(104, 'Connection reset by peer')
+        super().sendmail(sender, recipient, message)
+
+
+def test_session_reconnects_after_socket_error():
+    FakeSMTP.connections = []
+    with SmtpSession(ResetSMTP) as session:
+        session.send('rota@example.com', 'a@example.com', 'text')
+        FakeSMTP.connections[0].closed = True
+        session.send('rota@example.com', 'b@example.com', 'text')
+
+    assert len(FakeSMTP.connections) == 2
+    assert FakeSMTP.connections[1].sent == ['b@example.com']
+
+
+def test_session_does_not_reconnect_when_refused():
+    FakeSMTP.connections = []
+    with SmtpSession(RefusingSMTP) as session:
+        with pytest.raises(SMTPRecipientsRefused):
+            session.send('rota@example.com', 'bad@example.com', 'text')
+
+    assert len(FakeSMTP.connections) == 1
+
+
+def recipient(initials, email, active=True):
+    return Director(DirectorData(
+        initials, f'{initials} Director', email, initials.lower(), active,
+        False))
+
+
+class RefusingSMTP(FakeSMTP):
+    def sendmail(self, sender, recipient, message):
+        if recipient == 'bad@example.com':
+            raise SMTPRecipientsRefused({recipient: (550, b'No such user')})
+        super().sendmail(sender, recipient, message)
+
+
+def test_dispatch_reports_each_director():
+    FakeSMTP.connections = []
+    directors = DirectorRegistry([
+        recipient('AA', 'a@example.com'),
+        recipient('BB', 'bad@example.com'),
+        recipient('CC', 'c@example.com'),
+        recipient('DD', 'd@example.com', active=False),
+    ])
+
+    report = dispatch_emails(
+        'text', directors, concurrency=2, rate_limit=0,
+        smtp_class=RefusingSMTP)
+
+    assert [result.initials for result in report.results] == [
+        'AA', 'BB', 'CC']
+    assert [result.initials for result in report.sent] == ['AA', 'CC']
+    assert report.failed[0].email == 'bad@example.com'
+    assert report.status == Status.ERROR
+    assert len(FakeSMTP.connections) <= 2
+    assert all(server.closed for server in FakeSMTP.connections)
+
+
+def test_dispatch_personalises_each_email():
+    class RecordingSMTP(FakeSMTP):
+        def sendmail(self, sender, recipient, message):
+            messages[recipient] = message
+
+    messages = {}
+    directors = DirectorRegistry([
+        recipient('AA', 'a@example.com'),
+        recipient('BB', 'b@example.com'),
+    ])
+    dispatch_emails(
+        'Dear <first_name>', directors, concurrency=1, rate_limit=0,
+        smtp_class=RecordingSMTP)
+
+    assert 'Dear AA' in messages['a@example.com']
+    assert 'Dear BB' in messages['b@example.com']
+
+
+def test_dispatch_through_local_server(monkeypatch):
+    directors = DirectorRegistry([
+        recipient('AA', 'a@example.com'),
+        recipient('BB', 'b@example.com'),
+    ])
+    with LocalSMTPServer() as server:
+        for name, value in server.env().items():
+            monkeypatch.setenv(name, value)
+        get_env.cache_clear()
+        try:
+            report = dispatch_emails(
+                'Dear <first_name>', directors, concurrency=1, rate_limit=0,
+                smtp_class=smtplib.SMTP)
+        finally:
+            get_env.cache_clear()
+
+    assert report.status == Status.SUCCESS
+    assert server.logins == ['rota@example.com']
+    assert sorted(message.recipients[0] for message in server.messages) == [
+        'a@example.com', 'b@example.com']
+    assert 'Dear AA' in server.messages[0].data
+
+
+def test_dispatch_progress_and_cancel():
+    class CancellingSMTP(FakeSMTP):
+        def sendmail(self, sender, recipient, message):
+            super().sendmail(sender, recipient, message)
+            progress.cancel()
+
+    progress = Progress()
+    directors = DirectorRegistry([
+        recipient('AA', 'a@example.com'),
+        recipient('BB', 'b@example.com'),
+        recipient('CC', 'c@example.com'),
+    ])
+    report = dispatch_emails(
+        'text', directors, concurrency=1, rate_limit=0,
+        smtp_class=CancellingSMTP, progress=progress)
+
+    assert [result.initials for result in report.sent] == ['AA']
+    assert [result.error for result in report.failed] == [
+        'Cancelled', 'Cancelled']
+    assert progress.text() == 'Sending emails 1 of 3'
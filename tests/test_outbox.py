@@ -0,0 +1,178 @@
+import datetime
+import smtplib
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from psiutils.constants import Status
+
+from directors_rota import rota_store
+from directors_rota.config import get_env
+from directors_rota.outbox import (
+    LOCK_FILE_NAME,
+    DrainLock,
+    Outbox,
+    OutboxSender,
+    spool_emails,
+)
+from directors_rota.process import Director, DirectorData, DirectorRegistry
+
+from local_smtp import LocalSMTPServer
+
+
+def director(initials, email):
+    return Director(DirectorData(
+        initials, f'{initials} Director', email, initials.lower(), True,
+        False))
+
+
+DIRECTORS = DirectorRegistry([
+    director('AA', 'a@example.com'),
+    director('BB', 'bad@example.com'),
+    director('CC', 'c@example.com'),
+])
+
+
+@pytest.fixture
+def server(monkeypatch):
+    with LocalSMTPServer() as server:
+        for name, value in server.env().items():
+            monkeypatch.setenv(name, value)
+        get_env.cache_clear()
+        yield server
+    get_env.cache_clear()
+
+
+class DroppingSMTP(smtplib.SMTP):
+    """Loses the connection whenever the second message is sent.
+
+    The session reconnects once on a lost connection, so the connection
+    is lost on the retry too.
+    """
+    def sendmail(self, sender, recipient, message):
+        if recipient == 'bad@example.com':
+            raise ConnectionResetError('Connection lost')
+        return super().sendmail(sender, recipient, message)
+
+
+class RefusingSMTP(smtplib.SMTP):
+    def sendmail(self, sender, recipient, message):
+        if recipient == 'bad@example.com':
+            raise smtplib.SMTPRecipientsRefused(
+                {recipient: (550, b'No such user')})
+        return super().sendmail(sender, recipient, message)
+
+
+def test_spool_then_drain(tmp_path, server):
+    outbox = Outbox(Path(tmp_path, 'outbox'))
+    assert spool_emails('Dear <first_name>', DIRECTORS, outbox) == 3
+    assert len(outbox) == 3
+    assert server.messages == []
+
+    report = outbox.drain(smtplib.SMTP, rate_limit=0)
+
+    assert report.status == Status.SUCCESS
+    assert [result.initials for result in report.sent] == ['AA', 'BB', 'CC']
+    assert len(outbox) == 0
+    assert 'Dear AA' in server.messages[0].data
+
+
+def test_spool_survives_crash(tmp_path, server):
+    path = Path(tmp_path, 'outbox')
+    spool_emails('text', DIRECTORS, Outbox(path))
+    # A message half written when the process died is never sent
+    Path(path, 'tmp', 'partial').write_text('To: a@exa', encoding='utf-8')
+
+    outbox = Outbox(path)
+    report = outbox.drain(DroppingSMTP, rate_limit=0)
+
+    assert len(report.sent) == 1
+    assert len(report.failed) == 1
+    assert len(outbox) == 2
+
+    report = Outbox(path).drain(smtplib.SMTP, rate_limit=0)
+    assert len(report.sent) == 2
+    assert len(Outbox(path)) == 0
+    assert sorted(message.recipients[0] for message in server.messages) == [
+        'a@example.com', 'bad@example.com', 'c@example.com']
+
+
+def test_refused_message_moves_to_failed(tmp_path, server):
+    outbox = Outbox(Path(tmp_path, 'outbox'))
+    spool_emails('text', DIRECTORS, outbox)
+
+    report = outbox.drain(RefusingSMTP, rate_limit=0)
+
+    assert [result.email for result in report.failed] == ['bad@example.com']
+    assert len(report.sent) == 2
+    assert len(outbox) == 0
+    assert outbox.failed() == 1
+
+
+def test_drain_records_sent_history(tmp_path, server, monkeypatch):
+    path = Path(tmp_path, 'rotas.sqlite')
+    monkeypatch.setattr(rota_store, 'STORE_PATH', path)
+    outbox = Outbox(Path(tmp_path, 'outbox'))
+    spool_emails('text', DIRECTORS, outbox, datetime.date(2026, 2, 1))
+
+    outbox.drain(RefusingSMTP, rate_limit=0)
+
+    sent = rota_store.RotaStore(path).sent(month=datetime.date(2026, 2, 1))
+    assert [(result.initials, result.status) for result in sent] == [
+        ('AA', 'SUCCESS'), ('BB', 'ERROR'), ('CC', 'SUCCESS')]
+
+
+def test_background_sender(tmp_path, server):
+    outbox = Outbox(Path(tmp_path, 'outbox'))
+    sender = OutboxSender(outbox, smtplib.SMTP, poll=0.05)
+    sender.start()
+    try:
+        spool_emails('text', DIRECTORS, outbox)
+        sender.notify()
+        deadline = time.monotonic() + 5
+        while len(server.messages) < 3 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        sender.stop(timeout=5)
+
+    assert len(server.messages) == 3
+    assert len(outbox) == 0
+
+
+def test_one_drain_at_a_time(tmp_path, server):
+    path = Path(tmp_path, 'outbox')
+    spool_emails('text', DIRECTORS, Outbox(path))
+    lock = DrainLock(Path(path, LOCK_FILE_NAME))
+    assert lock.acquire()
+    try:
+        # As if "directors-rota send-outbox" ran while the app was sending
+        report = Outbox(path).drain(smtplib.SMTP, rate_limit=0)
+    finally:
+        lock.release()
+
+    assert report.results == []
+    assert server.messages == []
+    assert len(Outbox(path).drain(smtplib.SMTP, rate_limit=0).sent) == 3
+
+
+def test_sender_finishes_before_exit(tmp_path, server):
+    outbox = Outbox(Path(tmp_path, 'outbox'))
+    sender = OutboxSender(outbox, smtplib.SMTP, poll=60)
+    sender.start()
+    spool_emails('text', DIRECTORS, outbox)
+
+    assert sender.finish(timeout=5) == 0
+    assert len(server.messages) == 3
+    assert not sender.thread.is_alive()
+
+
+def test_finish_can_be_stopped(tmp_path, server):
+    outbox = Outbox(Path(tmp_path, 'outbox'))
+    sender = OutboxSender(outbox, smtplib.SMTP, poll=60)
+    spool_emails('text', DIRECTORS, outbox)
+    stop = threading.Event()
+    stop.set()
+
+    assert sender.finish(timeout=5, stop=stop) == 3
+    assert server.messages == []
@@ -0,0 +1,38 @@
+from pathlib import Path
+
+import pytest
+
+from directors_rota.progress import CancelledError, Progress, run_in_background
+from directors_rota.sheet_reader import read_sheets
+
+VALID_WORKBOOK_PATH = Path('tests', 'test_data', 'directors-rota.xlsx')
+
+
+def test_progress_text():
+    progress = Progress()
+    progress.start('Reading workbook')
+    assert progress.text() == 'Reading workbook'
+    assert progress.fraction() is None
+    progress.add_rows(500)
+    assert progress.text() == 'Reading workbook 500 rows'
+
+    progress.start('Sending emails', 4)
+    progress.advance()
+    assert progress.text() == 'Sending emails 1 of 4'
+    assert progress.fraction() == 0.25
+
+
+def test_read_sheets_counts_rows():
+    progress = Progress()
+    read_sheets(VALID_WORKBOOK_PATH, {'Main': [0, 1]}, progress=progress)
+    assert progress.rows == 1000
+
+
+def test_cancelled_read_stops():
+    progress = Progress()
+    progress.cancel()
+    task = run_in_background(
+        read_sheets, VALID_WORKBOOK_PATH, {'Main': [0, 1]},
+        progress=progress)
+    with pytest.raises(CancelledError):
+        task.result(timeout=30)
@@ -0,0 +1,121 @@
+import datetime
+import threading
+from types import SimpleNamespace
+
+from directors_rota import reminders
+from directors_rota.process import Director, DirectorData
+from directors_rota.reminders import (
+    ReminderQueue,
+    run_reminders,
+    schedule_reminders,
+)
+
+NOW = datetime.datetime.now().replace(microsecond=0)
+
+
+class FakeSession:
+    def __init__(self, fail=()):
+        self.sent = []
+        self.fail = fail
+
+    def send(self, sender, recipient, message):
+        if recipient in self.fail:
+            raise OSError('Connection refused')
+        self.sent.append(recipient)
+
+    def close(self):
+        pass
+
+
+def _add(queue, initials, days, recipient='a@example.com'):
+    due = NOW + datetime.timedelta(days=days)
+    return queue.add(due, initials, due.date(), recipient, 'Subject', 'Body')
+
+
+def test_queue_orders_by_due(tmp_path):
+    queue = ReminderQueue(tmp_path)
+    _add(queue, 'BB', 3)
+    _add(queue, 'AA', -1)
+    _add(queue, 'CC', 7)
+
+    assert queue.next_due().initials == 'AA'
+    assert [reminder.initials for reminder in queue.due(NOW)] == ['AA']
+    assert queue.cancel('AA', (NOW - datetime.timedelta(days=1)).date())
+    assert not queue.cancel('AA', NOW.date())
+    assert queue.next_due().initials == 'BB'
+    assert len(queue) == 2
+
+
+def test_queue_replaces_reminder_for_same_date(tmp_path):
+    queue = ReminderQueue(tmp_path)
+    _add(queue, 'AA', 3, 'old@example.com')
+    _add(queue, 'AA', 3, 'new@example.com')
+    assert len(queue) == 1
+    assert queue.next_due().recipient == 'new@example.com'
+
+
+def test_queue_is_on_disk(tmp_path):
+    queue = ReminderQueue(tmp_path)
+    _add(queue, 'AA', 3)
+    queue.close()
+    assert len(ReminderQueue(tmp_path)) == 1
+
+
+def test_schedule_reminders(tmp_path):
+    config = SimpleNamespace(
+        email_reminder_dir=str(tmp_path),
+        reminder_time='06:00',
+        reminder_days_before=1,
+        email_subject='Rota',
+    )
+    director = Director(DirectorData(
+        'AB', 'Ann Brown', 'ann@example.com', 'ann', True, True))
+    next_week = datetime.datetime.combine(
+        NOW.date() + datetime.timedelta(days=7), datetime.time())
+    director.dates = [next_week, next_week - datetime.timedelta(days=30)]
+
+    assert schedule_reminders(config, director) == 1
+
+    reminder = ReminderQueue(tmp_path).next_due()
+    assert reminder.due == next_week - datetime.timedelta(days=1, hours=-6)
+    assert reminder.recipient == 'ann@example.com'
+    assert reminder.body.startswith('Dear Ann')
+
+
+def test_run_reminders_sends_due(tmp_path):
+    queue = ReminderQueue(tmp_path)
+    _add(queue, 'AA', -1, 'a@example.com')
+    _add(queue, 'BB', -1, 'b@example.com')
+    _add(queue, 'CC', 1, 'c@example.com')
+    session = FakeSession(fail=('b@example.com',))
+
+    assert run_reminders(queue, session) == 1
+
+    assert session.sent == ['a@example.com']
+    assert [reminder.initials for reminder in queue.due(NOW)] == []
+    assert queue.next_due().initials == 'BB'
+    assert queue.next_due().due > NOW
+
+
+def test_daemon_sleeps_until_due(tmp_path, monkeypatch):
+    queue = ReminderQueue(tmp_path)
+    due = datetime.datetime.now() + datetime.timedelta(seconds=1)
+    queue.add(due, 'AA', due.date(), 'a@example.com', 'Subject', 'Body')
+    session = FakeSession()
+    stop = threading.Event()
+    waits = []
+    real_wait = stop.wait
+
+    def _wait(timeout):
+        waits.append(timeout)
+        if session.sent:
+            stop.set()
+        return real_wait(timeout)
+
+    monkeypatch.setattr(stop, 'wait', _wait)
+    monkeypatch.setattr(reminders, 'MAX_SLEEP', 5)
+
+    run_reminders(queue, session, daemon=True, stop=stop)
+
+    assert session.sent == ['a@example.com']
+    assert 0 < waits[0] <= 1.5
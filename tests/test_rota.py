@@ -1,9 +1,24 @@
+import datetime
 from workbooky import Workbook
-from directors_rota.process import get_directors
+from directors_rota.process import (
+    Director,
+    DirectorData,
+    DirectorRegistry,
+    RotaData,
+    _date_limits,
+    _get_sheets,
+    _get_rota_dates,
+    _get_session_rotas,
+    _index_sheet,
+    _months,
+    get_directors,
+)
 from pathlib import Path
 
 
+from directors_rota import workbook_cache
 from directors_rota.config import read_config
+from directors_rota.workbook_cache import load_workbook
 config = read_config()
 
 VALID_WORKBOOK_PATH = Path('tests', 'test_data', 'directors-rota.xlsx')
@@ -33,3 +48,109 @@ def test_get_directors():
     directors_sheet = workbook.worksheets['Directors']
     directors = get_directors(config, directors_sheet)
     assert len(directors) == 9
+    assert directors['LM'].first_name == 'Lynne'
+    assert directors.duplicates == []
+
+
+def test_director_registry_indexes():
+    directors = DirectorRegistry([
+        Director(DirectorData('AB', 'Ann Brown', 'Ann@example.com', 'ann',
+                              True, True)),
+        Director(DirectorData('CD', 'Carl Dean', 'carl@example.com', 'carl',
+                              True, False)),
+        Director(DirectorData('AB', 'Alan Bell', 'alan@example.com', 'alan',
+                              True, False)),
+        Director(DirectorData('EF', 'Eve Ford', 'carl@example.com', 'eve',
+                              None, False)),
+    ])
+
+    assert len(directors) == 3
+    assert directors['AB'].name == 'Ann Brown'
+    assert directors.with_email('ann@EXAMPLE.com') is directors['AB']
+    assert directors.with_username('eve') is directors['EF']
+    assert list(directors.active) == ['AB', 'CD']
+    assert list(directors.reminders) == ['AB']
+    assert [(duplicate.key, duplicate.initials)
+            for duplicate in directors.duplicates] == [
+        ('initials', 'AB'), ('email', 'EF')]
+
+
+def test_director_registry_for_month():
+    ann = Director(DirectorData('AB', 'Ann Brown', 'ann@example.com', 'ann',
+                                True, True))
+    ann.dates = [datetime.datetime(2026, 2, 9), datetime.datetime(2026, 3, 2),
+                 datetime.datetime(2026, 2, 28, 19)]
+    directors = DirectorRegistry([ann])
+
+    february = directors.for_month(datetime.datetime(2026, 2, 1))
+
+    assert february['AB'].dates == [
+        datetime.datetime(2026, 2, 9), datetime.datetime(2026, 2, 28, 19)]
+    assert list(february.reminders) == ['AB']
+    assert len(ann.dates) == 3
+
+
+SHEET_COLUMNS = {
+    'Main': [0, 1, 3, 4, 6, 7],
+    'Directors': [0, 1, 2, 3, 4, 5],
+}
+
+
+def _rota_data(workbook, month):
+    directors = get_directors(config, workbook.worksheets['Directors'])
+    (start_date, end_date) = _date_limits(month)
+    return RotaData(
+        start_date, end_date, workbook.worksheets['Main'], directors)
+
+
+def test_get_session_rotas(tmp_path, monkeypatch):
+    monkeypatch.setattr(workbook_cache, 'CACHE_DIR', tmp_path)
+    workbook = load_workbook(VALID_WORKBOOK_PATH, SHEET_COLUMNS)
+    rota_data = _rota_data(workbook, datetime.date(2023, 5, 1))
+    sessions = [('Monday', 0), ('Wednesday', 3)]
+
+    day_rotas = _get_session_rotas(sessions, rota_data)
+
+    assert [day_rota.day for day_rota in day_rotas] == ['Monday', 'Wednesday']
+    assert day_rotas[0].day_rota[0] == '01/05/23, Lynne Marlow'
+    assert len(day_rotas[1].day_rota) == 5
+    for (_, date_col), day_rota in zip(sessions, day_rotas, strict=True):
+        assert day_rota.day_rota == _get_rota_dates(date_col, rota_data)
+
+
+def test_indexed_and_scanned_rotas_agree(tmp_path, monkeypatch):
+    monkeypatch.setattr(workbook_cache, 'CACHE_DIR', tmp_path)
+    sessions = [('Monday', 0), ('Wednesday', 3)]
+    scanned = _get_session_rotas(sessions, _rota_data(
+        load_workbook(VALID_WORKBOOK_PATH, SHEET_COLUMNS),
+        datetime.date(2023, 5, 1)))
+
+    workbook = load_workbook(VALID_WORKBOOK_PATH, SHEET_COLUMNS)
+    _index_sheet(workbook.worksheets['Main'], sessions)
+    indexed = _get_session_rotas(
+        sessions, _rota_data(workbook, datetime.date(2023, 5, 1)))
+
+    assert indexed == scanned
+
+
+def test_get_sheets_reports_each_error(tmp_path, monkeypatch):
+    monkeypatch.setattr(workbook_cache, 'CACHE_DIR', tmp_path)
+    workbook = load_workbook(VALID_WORKBOOK_PATH, SHEET_COLUMNS)
+
+    (sheets, errors) = _get_sheets(workbook, ['Main', 'Absent', 'Missing'])
+
+    assert list(sheets) == ['Main']
+    assert errors == {
+        'Absent': "Sheet 'Absent' missing in Workbook",
+        'Missing': "Sheet 'Missing' missing in Workbook",
+    }
+
+
+def test_months():
+    months = _months(datetime.date(2026, 11, 15), datetime.date(2027, 1, 1))
+    assert months == [
+        datetime.datetime(2026, 11, 1),
+        datetime.datetime(2026, 12, 1),
+        datetime.datetime(2027, 1, 1),
+    ]
+    assert _months(datetime.date(2026, 2, 1), datetime.date(2026, 1, 1)) == []
@@ -0,0 +1,111 @@
+import datetime
+from pathlib import Path
+
+import pytest
+from psiutils.constants import Status
+
+from directors_rota import config as config_module
+from directors_rota import process, rota_store, workbook_cache
+from directors_rota.config import invalidate_config
+from directors_rota.diagnostics import MISSING_DIRECTOR, Issue
+from directors_rota.emails import SendResult
+from directors_rota.process import generate_rota, generate_rota_range
+from directors_rota.rota_store import RotaStore, Snapshot
+from directors_rota.workbook_cache import file_identity
+
+TEST_DATA = Path('tests', 'test_data').resolve()
+
+
+@pytest.fixture
+def store_config(tmp_path, monkeypatch):
+    template = Path(tmp_path, 'template.txt')
+    template.write_text('Rota for <month>\n<rota>\n', encoding='utf-8')
+    path = Path(tmp_path, 'config.toml')
+    path.write_text(
+        f'workbook_dir = "{TEST_DATA}"\n'
+        f'workbook_file_name = "directors-rota.xlsx"\n'
+        f'email_template = "{template}"\n',
+        encoding='utf-8')
+    monkeypatch.setattr(config_module, 'CONFIG_PATH', path)
+    monkeypatch.setattr(workbook_cache, 'CACHE_DIR', Path(tmp_path, 'cache'))
+    monkeypatch.setattr(
+        rota_store, 'STORE_PATH', Path(tmp_path, 'rotas.sqlite'))
+    invalidate_config()
+    yield template
+    invalidate_config()
+
+
+def _no_workbook(*args, **kwargs):
+    raise AssertionError('The workbook was read')
+
+
+def test_snapshot_round_trip(tmp_path):
+    store = RotaStore(Path(tmp_path, 'rotas.sqlite'))
+    issue = Issue(
+        MISSING_DIRECTOR, 'Monday', datetime.datetime(2026, 2, 2),
+        None, 'Main!B3')
+    snapshot = Snapshot(
+        datetime.datetime(2026, 2, 1), 'book', 'config', 'Rota',
+        [('Monday', ['09/02/26, Anne Brown'])],
+        [{'initials': 'AB', 'dates': [datetime.datetime(2026, 2, 9)]}],
+        [issue], 1)
+    store.save(snapshot)
+
+    stored = store.get(datetime.date(2026, 2, 1), 'book', 'config')
+    assert stored._replace(created=None) == snapshot
+    assert store.get(datetime.date(2026, 2, 1), 'book', 'other') is None
+    store.close()
+
+
+def test_unchanged_month_served_from_store(store_config, monkeypatch):
+    month = datetime.datetime(2023, 5, 1)
+    (email, directors, diagnostics) = generate_rota(month)
+    assert '01/05/23, Lynne Marlow' in email
+
+    monkeypatch.setattr(process, 'get_rota_sources', _no_workbook)
+    (stored_email, stored_directors, stored_diagnostics) = generate_rota(
+        month)
+    assert stored_email == email
+    assert stored_diagnostics.issues == diagnostics.issues
+    assert sorted(stored_directors.active) == sorted(directors.active)
+    for initials, director in directors.items():
+        assert stored_directors[initials].dates == director.dates
+
+    (rota_emails, _, _) = generate_rota_range(month, month)
+    assert rota_emails == [(month, email)]
+
+    # A changed template is a changed config: the rota is generated again
+    store_config.write_text('Changed <rota>\n', encoding='utf-8')
+    with pytest.raises(AssertionError):
+        generate_rota(month)
+
+
+def test_workbook_hashed_once(store_config, monkeypatch):
+    identities = []
+
+    def _file_identity(path):
+        identities.append(path)
+        return file_identity(path)
+
+    monkeypatch.setattr(process, 'file_identity', _file_identity)
+    monkeypatch.setattr(workbook_cache, 'file_identity', _file_identity)
+    generate_rota(datetime.datetime(2023, 5, 1))
+    assert len(identities) == 1
+
+
+def test_sent_history(tmp_path):
+    store = RotaStore(Path(tmp_path, 'rotas.sqlite'))
+    store.record_sent(datetime.date(2026, 2, 1), [
+        SendResult('AB', 'ab@example.com', Status.SUCCESS, 0.1, ''),
+        SendResult('CD', 'cd@example.com', Status.ERROR, 0.1, 'Refused'),
+    ])
+    store.record_sent(datetime.date(2026, 3, 1), [
+        SendResult('AB', 'ab@example.com', Status.SUCCESS, 0.1, ''),
+    ])
+
+    february = store.sent(month=datetime.date(2026, 2, 1))
+    assert [(sent.email, sent.status) for sent in february] == [
+        ('ab@example.com', 'SUCCESS'), ('cd@example.com', 'ERROR')]
+    assert [sent.month for sent in store.sent(email='ab@example.com')] == [
+        datetime.date(2026, 2, 1), datetime.date(2026, 3, 1)]
+    store.close()
@@ -0,0 +1,86 @@
+import datetime
+from pathlib import Path
+
+import pytest
+
+from directors_rota import workbook_cache
+from directors_rota.config import read_config
+from directors_rota.process import (
+    RotaData,
+    _date_limits,
+    _get_rota_dates,
+    _get_session_rotas,
+    _index_sheet,
+    get_directors,
+)
+from directors_rota.workbook_cache import CachedSheet, load_workbook
+
+np = pytest.importorskip('numpy')
+
+from directors_rota.rota_table import RotaTable  # noqa: E402
+
+config = read_config()
+
+VALID_WORKBOOK_PATH = Path('tests', 'test_data', 'directors-rota.xlsx')
+SHEET_COLUMNS = {
+    'Main': [0, 1, 3, 4, 6, 7],
+    'Directors': [0, 1, 2, 3, 4, 5],
+}
+SESSIONS = [('Monday', 0), ('Wednesday', 3)]
+
+
+def _rota_data(workbook, main_sheet, month):
+    directors = get_directors(config, workbook.worksheets['Directors'])
+    (start_date, end_date) = _date_limits(month)
+    return RotaData(start_date, end_date, main_sheet, directors)
+
+
+@pytest.mark.parametrize('month', [
+    datetime.date(2023, 5, 1),
+    datetime.date(2023, 12, 1),
+    datetime.date(2030, 1, 1),
+])
+def test_table_matches_rota_dates(tmp_path, monkeypatch, month):
+    monkeypatch.setattr(workbook_cache, 'CACHE_DIR', tmp_path)
+    workbook = load_workbook(VALID_WORKBOOK_PATH, SHEET_COLUMNS)
+    main_sheet = workbook.worksheets['Main']
+    scanned = _rota_data(workbook, main_sheet, month)
+    expected = [_get_rota_dates(date_col, scanned)
+                for _, date_col in SESSIONS]
+
+    indexed_sheet = CachedSheet('Main', main_sheet.rows)
+    assert isinstance(_index_sheet(indexed_sheet, SESSIONS), RotaTable)
+    indexed = _rota_data(workbook, indexed_sheet, month)
+    day_rotas = _get_session_rotas(SESSIONS, indexed)
+
+    assert [day_rota.day_rota for day_rota in day_rotas] == expected
+    for initials, director in indexed.directors.items():
+        assert director.dates == scanned.directors[initials].dates
+
+
+def test_session_rows_masks():
+    rows = [
+        ('Mondays', 'Director'),
+        (datetime.datetime(2026, 2, 23), 'AB'),
+        (datetime.datetime(2026, 2, 2), None),
+        (datetime.date(2026, 2, 9), 'ZZ'),
+        (datetime.datetime(2026, 3, 2), 'AB'),
+    ]
+    table = RotaTable.from_rows(rows, [('Monday', 0)])
+
+    session_rows = table.session_rows(
+        'Monday',
+        datetime.datetime(2026, 2, 1),
+        datetime.datetime(2026, 3, 1),
+        {'AB': None},
+    )
+
+    assert session_rows.dates == [
+        datetime.datetime(2026, 2, 2),
+        datetime.datetime(2026, 2, 9),
+        datetime.datetime(2026, 2, 23),
+    ]
+    assert session_rows.initials == [None, 'ZZ', 'AB']
+    assert session_rows.missing.tolist() == [True, False, False]
+    assert session_rows.unknown.tolist() == [False, True, False]
+    assert session_rows.row_numbers == [3, 4, 2]
@@ -0,0 +1,76 @@
+import datetime
+from pathlib import Path
+
+from workbooky import Workbook
+
+from directors_rota import sheet_reader
+from directors_rota.date_index import DateRange
+from directors_rota.sheet_reader import read_sheets
+
+VALID_WORKBOOK_PATH = Path('tests', 'test_data', 'directors-rota.xlsx')
+
+
+def test_read_sheets_matches_full_load():
+    columns = [0, 1, 3, 4]
+    sheets = read_sheets(VALID_WORKBOOK_PATH, {'Main': columns})
+
+    workbook = Workbook(VALID_WORKBOOK_PATH)
+    full_rows = list(workbook.worksheets['Main'].iter_rows(values_only=True))
+    rows = sheets['Main']
+    assert len(rows) == len(full_rows)
+    for row, full_row in zip(rows, full_rows, strict=True):
+        assert len(row) == 5
+        assert [row[column] for column in columns] == [
+            full_row[column] for column in columns]
+        assert row[2] is None
+
+
+def test_sheets_read_in_parallel_match_single_reads():
+    sheet_columns = {'Main': [0, 1, 3, 4], 'Directors': [0, 1, 2]}
+    sheets = read_sheets(VALID_WORKBOOK_PATH, sheet_columns)
+    for sheet_name, columns in sheet_columns.items():
+        single = read_sheets(VALID_WORKBOOK_PATH, {sheet_name: columns})
+        assert sheets[sheet_name] == single[sheet_name]
+
+
+def test_read_sheets_skips_missing_sheet():
+    sheets = read_sheets(VALID_WORKBOOK_PATH, {'Absent': [0]})
+    assert sheets == {}
+
+
+def test_read_sheets_pushes_down_date_range():
+    columns = [0, 1, 3, 4]
+    where = DateRange(
+        datetime.datetime(2023, 5, 1), datetime.datetime(2023, 6, 1), (0, 3))
+    rows = read_sheets(
+        VALID_WORKBOOK_PATH, {'Main': columns}, {'Main': where})['Main']
+
+    all_rows = read_sheets(VALID_WORKBOOK_PATH, {'Main': columns})['Main']
+    expected = [
+        row for row in all_rows
+        if any(isinstance(row[column], datetime.datetime)
+               and where.start <= row[column] < where.end
+               for column in where.date_columns)
+    ]
+    assert [row for row in rows if any(row)] == expected
+    assert len(expected) == 5
+    # Rows keep their sheet row numbers; reading stops after the range
+    empty_row = (None,) * len(rows[0])
+    assert all(
+        row in (all_row, empty_row)
+        for row, all_row in zip(rows, all_rows, strict=False))
+    assert len(rows) < len(all_rows)
+
+
+def test_read_sheets_without_openpyxl_internals(monkeypatch):
+    columns = [0, 1, 3, 4]
+    where = {'Main': DateRange(
+        datetime.datetime(2023, 5, 1), datetime.datetime(2023, 6, 1), (0, 3))}
+    parsed = read_sheets(VALID_WORKBOOK_PATH, {'Main': columns})
+    parsed_where = read_sheets(VALID_WORKBOOK_PATH, {'Main': columns}, where)
+
+    # As if a later openpyxl had moved its private worksheet parser
+    monkeypatch.setattr(sheet_reader, 'WorkSheetParser', None)
+    assert read_sheets(VALID_WORKBOOK_PATH, {'Main': columns}) == parsed
+    assert read_sheets(
+        VALID_WORKBOOK_PATH, {'Main': columns}, where) == parsed_where
@@ -0,0 +1,51 @@
+import subprocess
+import sys
+
+# The CLI imports in about 0.25-0.3 s; the margin allows for a slow runner
+IMPORT_BUDGET_US = 500_000
+
+LAZY_CHECK = """
+import sys
+import directors_rota.cli
+from directors_rota import config, constants, text
+created = [
+    name for name, function in (
+        ('default_config', config.default_config),
+        ('get_env', config.get_env),
+        ('downloads_dir', constants.downloads_dir),
+        ('get_text', text.get_text),
+    )
+    if function.cache_info().currsize
+]
+heavy = [name for name in ('tkinter', 'openpyxl') if name in sys.modules]
+print(created, heavy)
+sys.exit(1 if created or heavy else 0)
+"""
+
+
+def _import_times(module: str) -> dict[str, int]:
+    """Return the cumulative import time in us of each module imported."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '[us]' in line:
+            continue
+        (_, cumulative, name) = line.split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_import_time():
+    times = _import_times('directors_rota.cli')
+    assert times['directors_rota.cli'] < IMPORT_BUDGET_US
+    assert 'openpyxl' not in times
+    assert 'tkinter' not in times
+    assert 'directors_rota.forms.frm_main' not in times
+
+
+def test_nothing_created_on_import():
+    result = subprocess.run(
+        [sys.executable, '-c', LAZY_CHECK], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,35 @@
+import os
+from pathlib import Path
+
+from directors_rota.template import Template, compile_template, load_template
+
+
+def test_render():
+    template = Template('Dear <first_name>,\n<rota>\nYour dates:\n<my_dates>')
+    assert template.placeholders == {'first_name', 'rota', 'my_dates'}
+    text = template.render(first_name='Jeff', rota='01/05/26, Jeff Watkins')
+    assert text == (
+        'Dear Jeff,\n01/05/26, Jeff Watkins\nYour dates:\n<my_dates>')
+
+
+def test_render_ignores_non_placeholders():
+    template = Template('Reply to <rota@example.com> for <month>')
+    assert template.render(month='Nov 2026') == (
+        'Reply to <rota@example.com> for Nov 2026')
+
+
+def test_compile_template_is_cached():
+    assert compile_template('<month>') is compile_template('<month>')
+
+
+def test_load_template_rereads_on_change(tmp_path):
+    path = Path(tmp_path, 'template.txt')
+    path.write_text('Rota for <month>', encoding='utf-8')
+    template = load_template(path)
+    assert load_template(path) is template
+
+    path.write_text('Directors for <month>', encoding='utf-8')
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert load_template(path).render(month='May') == 'Directors for May'
+    assert load_template(Path(tmp_path, 'missing.txt')) is None
@@ -0,0 +1,54 @@
+from pathlib import Path
+
+import pytest
+
+from directors_rota import timing
+from directors_rota.timing import profiled, span
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.events = []
+
+    def info(self, event, **fields):
+        self.events.append((event, fields))
+
+    def warning(self, event, **fields):
+        self.events.append((event, fields))
+
+
+def test_span_logs_duration_and_fields(monkeypatch):
+    recorder = RecordingLogger()
+    monkeypatch.setattr(timing, 'logger', recorder)
+
+    with span('sheet_load', sheet='Main') as fields:
+        fields['rows'] = 53
+
+    [(event, fields)] = recorder.events
+    assert event == 'Timing'
+    assert fields['span'] == 'sheet_load'
+    assert fields['sheet'] == 'Main'
+    assert fields['rows'] == 53
+    assert fields['duration_ms'] >= 0
+
+
+def test_span_logs_error(monkeypatch):
+    recorder = RecordingLogger()
+    monkeypatch.setattr(timing, 'logger', recorder)
+
+    with pytest.raises(KeyError):
+        with span('sheet_load'):
+            raise KeyError('Main')
+
+    assert recorder.events[0][1]['error'] == 'KeyError'
+
+
+def test_profiled_writes_report(tmp_path, monkeypatch):
+    monkeypatch.setattr(timing, 'logger', RecordingLogger())
+    path = Path(tmp_path, 'profile.txt')
+
+    with profiled(path):
+        sorted(range(1000), reverse=True)
+
+    assert 'cumulative' in path.read_text(encoding='utf-8')
+    assert path.with_suffix('.prof').exists()
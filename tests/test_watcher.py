@@ -0,0 +1,92 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from directors_rota.watcher import (
+    EVENT_HEADER,
+    IN_CLOSE_WRITE,
+    Debouncer,
+    WorkbookWatcher,
+    _event_names,
+    _inotify_libc,
+    _stat,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def _wait_for(condition, seconds=5):
+    """Wait for the watcher thread to reach a state; no timing is tested."""
+    deadline = time.monotonic() + seconds
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_debouncer_reports_each_burst_once():
+    clock = FakeClock()
+    debouncer = Debouncer(1.0, clock)
+    assert not debouncer.settled()
+    assert debouncer.timeout(2.0) == 2.0
+
+    debouncer.changed()
+    clock.advance(0.6)
+    debouncer.changed()
+    clock.advance(0.6)
+    assert not debouncer.settled()
+    assert debouncer.timeout(2.0) == pytest.approx(0.4)
+
+    clock.advance(0.4)
+    assert debouncer.settled()
+    assert not debouncer.settled()
+
+
+def test_event_names():
+    data = b''
+    for name in (b'directors-rota.xlsx', b'other.txt'):
+        padded = name + b'\0' * (16 - len(name) % 16)
+        data += EVENT_HEADER.pack(1, IN_CLOSE_WRITE, 0, len(padded)) + padded
+    assert _event_names(data) == {'directors-rota.xlsx', 'other.txt'}
+
+
+@pytest.mark.parametrize('use_inotify', [False, True])
+def test_change_is_debounced(tmp_path, use_inotify):
+    if use_inotify and not _inotify_libc():
+        pytest.skip('inotify not available')
+    path = Path(tmp_path, 'directors-rota.xlsx')
+    path.write_bytes(b'first')
+    calls = []
+    clock = FakeClock()
+    watcher = WorkbookWatcher(
+        path, calls.append, debounce=1.0, poll=0.01,
+        use_inotify=use_inotify, clock=clock)
+    watcher.start()
+    try:
+        assert _wait_for(lambda: len(calls) == 1)
+
+        # A save written in several steps is acted on once, and only when
+        # the clock has moved on past the debounce time
+        for part in range(5):
+            with open(path, 'ab') as f_workbook:
+                f_workbook.write(b'part %d' % part)
+        saved = _stat(path)
+        assert _wait_for(lambda: watcher._last_stat == saved)
+        assert len(calls) == 1
+        assert _wait_for(lambda: clock.advance(0.5) or len(calls) == 2)
+        clock.advance(5.0)
+        assert _wait_for(lambda: watcher.debouncer.changed_at is None)
+    finally:
+        watcher.stop(timeout=5)
+
+    assert calls == [path, path]
+    assert watcher.backend == ('inotify' if use_inotify else 'poll')
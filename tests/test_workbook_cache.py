@@ -0,0 +1,88 @@
+import asyncio
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from directors_rota import workbook_cache
+from directors_rota.workbook_cache import file_identity, load_workbook
+
+VALID_WORKBOOK_PATH = Path('tests', 'test_data', 'directors-rota.xlsx')
+SHEET_COLUMNS = {
+    'Main': [0, 1, 3, 4, 6, 7],
+    'Directors': [0, 1, 2, 3, 4, 5],
+}
+
+
+def _not_parsed(*args):
+    raise AssertionError('Workbook parsed on a cache hit')
+
+
+def test_cache_hit_skips_parse(tmp_path, monkeypatch):
+    monkeypatch.setattr(workbook_cache, 'CACHE_DIR', tmp_path)
+    monkeypatch.setattr(workbook_cache, '_loaded', {})
+    parsed = load_workbook(VALID_WORKBOOK_PATH, SHEET_COLUMNS)
+
+    # Served from the cache file, not the workbook kept in memory
+    workbook_cache._loaded.clear()
+    monkeypatch.setattr(workbook_cache, '_parse_workbook', _not_parsed)
+    cached = load_workbook(VALID_WORKBOOK_PATH, SHEET_COLUMNS)
+
+    for sheet_name in SHEET_COLUMNS:
+        assert (cached.worksheets[sheet_name].rows
+                == parsed.worksheets[sheet_name].rows)
+
+
+def test_cache_miss_on_change(tmp_path, monkeypatch):
+    monkeypatch.setattr(workbook_cache, 'CACHE_DIR', Path(tmp_path, 'cache'))
+    path = Path(tmp_path, 'directors-rota.xlsx')
+    shutil.copyfile(VALID_WORKBOOK_PATH, path)
+    load_workbook(path, SHEET_COLUMNS)
+
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    parses = []
+
+    def _parse(*args):
+        parses.append(args)
+        return {}
+
+    monkeypatch.setattr(workbook_cache, '_parse_workbook', _parse)
+    load_workbook(path, SHEET_COLUMNS)
+    assert len(parses) == 1
+
+
+def test_unchanged_workbook_kept_in_memory(tmp_path, monkeypatch):
+    monkeypatch.setattr(workbook_cache, 'CACHE_DIR', Path(tmp_path, 'cache'))
+    path = Path(tmp_path, 'directors-rota.xlsx')
+    shutil.copyfile(VALID_WORKBOOK_PATH, path)
+    workbook = load_workbook(path, SHEET_COLUMNS)
+    assert load_workbook(path, SHEET_COLUMNS) is workbook
+
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert load_workbook(path, SHEET_COLUMNS) is not workbook
+
+
+def test_missing_sheet_raises_key_error(tmp_path, monkeypatch):
+    monkeypatch.setattr(workbook_cache, 'CACHE_DIR', tmp_path)
+    workbook = load_workbook(
+        VALID_WORKBOOK_PATH, {'Main': [0, 1], 'Absent': [0]})
+    with pytest.raises(KeyError):
+        asyncio.run(workbook.get_worksheet('Absent'))
+
+
+def test_concurrent_cache_writes(tmp_path, monkeypatch):
+    monkeypatch.setattr(workbook_cache, 'CACHE_DIR', tmp_path)
+    identity = file_identity(VALID_WORKBOOK_PATH)
+    sheets = {'Main': [(index, 'AB') for index in range(1000)]}
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for _ in range(16):
+            executor.submit(
+                workbook_cache._write_cache, identity, {'Main': [0, 1]},
+                sheets)
+
+    assert workbook_cache._read_cache(identity, {'Main': [0]}) == sheets
+    assert [path.suffix for path in tmp_path.iterdir()] == ['.pickle']